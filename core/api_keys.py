@@ -0,0 +1,148 @@
+"""
+Verification of the API keys of users and endpoints.
+"""
+import threading
+import time
+
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+
+from core.models import Endpoint, User
+from core.models.utils import digest_api_key
+from core.utils import DaisyLogger
+
+logger = DaisyLogger(__name__)
+
+
+USER_KEY = "user"
+ENDPOINT_KEY = "endpoint"
+
+
+class VerifiedKeyCache:
+    """
+    In-process cache of the recently verified API keys, by their digest (see `digest_api_key`).
+    Entries expire after `ttl` seconds, so that a key changed in another process is not
+    accepted for longer than that. The rejected keys are remembered for `rejected_ttl` seconds,
+    a key created meanwhile in another process is refused for at most that long.
+    """
+
+    def __init__(self, ttl=60, max_size=1000, rejected_ttl=10):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.rejected_ttl = rejected_ttl
+        self._entries: Dict[str, Tuple[float, str, int]] = {}
+        self._rejected: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[Tuple[str, int]]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        expires, owner_type, owner_id = entry
+        if expires < time.monotonic():
+            with self._lock:
+                self._entries.pop(digest, None)
+            return None
+        return owner_type, owner_id
+
+    def set(self, digest: str, owner_type: str, owner_id: int):
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries.clear()
+            self._entries[digest] = (time.monotonic() + self.ttl, owner_type, owner_id)
+
+    def is_rejected(self, digest: str) -> bool:
+        expires = self._rejected.get(digest)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            with self._lock:
+                self._rejected.pop(digest, None)
+            return False
+        return True
+
+    def reject(self, digest: str):
+        with self._lock:
+            # kept apart, so that invalid keys never evict the verified ones
+            if len(self._rejected) >= self.max_size:
+                self._rejected.clear()
+            self._rejected[digest] = time.monotonic() + self.rejected_ttl
+
+    def forget(self, owner_type: str, owner_id: int, digest: Optional[str] = None):
+        """
+        Removes the keys of the user or endpoint, e.g. when its key changed,
+        and the entry of `digest` whoever it belonged to.
+        """
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._rejected.pop(digest, None)
+            for entry_digest, (_, entry_type, entry_id) in list(self._entries.items()):
+                if entry_type == owner_type and entry_id == owner_id:
+                    del self._entries[entry_digest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._rejected.clear()
+
+
+verified_keys = VerifiedKeyCache(
+    ttl=getattr(settings, "API_KEY_CACHE_TTL", 60),
+    max_size=getattr(settings, "API_KEY_CACHE_SIZE", 1000),
+    rejected_ttl=getattr(settings, "API_KEY_REJECTED_CACHE_TTL", 10),
+)
+
+
+def find_api_key_owner(api_key: str, digest: str) -> Optional[Tuple[str, int]]:
+    """
+    Looks up the user or the endpoint the key belongs to.
+    Endpoints saved before the digest existed are found through the (slow) hash of their key,
+    their digest is then stored so that the next lookup is fast.
+    """
+    user_id = User.objects.filter(api_key=api_key).values_list("pk", flat=True).first()
+    if user_id is not None:
+        return USER_KEY, user_id
+
+    endpoint_id = (
+        Endpoint.objects.filter(api_key_digest=digest)
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if endpoint_id is not None:
+        return ENDPOINT_KEY, endpoint_id
+
+    endpoints_without_digest = Endpoint.objects.filter(api_key_digest__isnull=True)
+    if not endpoints_without_digest.exists():
+        return None
+    hashed_key = get_hasher("default").encode(api_key, salt=settings.SECRET_KEY)
+    endpoint_id = (
+        endpoints_without_digest.filter(api_key=hashed_key)
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if endpoint_id is None:
+        return None
+    logger.info(f"Storing the API key digest of the endpoint {endpoint_id}")
+    Endpoint.objects.filter(pk=endpoint_id).update(api_key_digest=digest)
+    return ENDPOINT_KEY, endpoint_id
+
+
+def verify_api_key(api_key: str) -> Optional[Tuple[str, int]]:
+    """
+    Returns the type (`USER_KEY` or `ENDPOINT_KEY`) and the id of the owner of the key,
+    None if the key is not valid.
+    """
+    digest = digest_api_key(api_key)
+    owner = verified_keys.get(digest)
+    if owner is None:
+        if verified_keys.is_rejected(digest):
+            # as long as some endpoints have no digest, looking up an invalid key costs a hash
+            return None
+        owner = find_api_key_owner(api_key, digest)
+        if owner is not None:
+            verified_keys.set(digest, *owner)
+        else:
+            verified_keys.reject(digest)
+    return owner
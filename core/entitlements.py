@@ -0,0 +1,136 @@
+"""
+Maintenance of the active entitlements table (see `ActiveEntitlement`).
+
+The entitlement of an access is recomputed whenever the access, the exposures of its dataset
+or the OIDC id of its user or contact change, so that the entitlements API does not have
+to evaluate the accesses on every call.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import Count, QuerySet
+from django.utils import timezone
+
+from core.models import Access, ActiveEntitlement
+from core.models.access import StatusChoices
+
+
+def get_entitlement_values(access: Access) -> Optional[Dict]:
+    """
+    Returns the fields of the entitlement the access grants, None if it grants none.
+    As `Access.find_for_user`, only the active accesses to exposed datasets count;
+    the expiration date is checked when the entitlements are read.
+    """
+    holder = access.user or access.contact
+    if (
+        access.status != StatusChoices.active
+        or not access.exposure_count
+        or not access.dataset.elu_accession
+        or holder is None
+        or not holder.oidc_id
+    ):
+        return None
+    return {
+        "oidc_id": holder.oidc_id,
+        "elu_accession": access.dataset.elu_accession,
+        "expires_on": access.grant_expires_on,
+    }
+
+
+def refresh_entitlements(accesses: QuerySet) -> int:
+    """
+    Recomputes the entitlements of the accesses. Only the entitlements which changed are written,
+    with their modification date. Returns the number of entitlements written.
+    """
+    accesses = list(
+        accesses.select_related("dataset", "user", "contact").annotate(
+            exposure_count=Count("dataset__exposures")
+        )
+    )
+    if not accesses:
+        return 0
+    existing = {
+        entitlement.access_id: entitlement
+        for entitlement in ActiveEntitlement.objects.filter(access__in=accesses)
+    }
+    now = timezone.now()
+    created = []
+    updated = []
+    for access in accesses:
+        entitlement = existing.get(access.pk)
+        values = get_entitlement_values(access)
+        if values is None:
+            if entitlement is not None and not entitlement.revoked:
+                entitlement.revoked = True
+                entitlement.updated = now
+                updated.append(entitlement)
+        elif entitlement is None:
+            created.append(ActiveEntitlement(access=access, updated=now, **values))
+        elif entitlement.revoked or any(
+            getattr(entitlement, field) != value for field, value in values.items()
+        ):
+            for field, value in values.items():
+                setattr(entitlement, field, value)
+            entitlement.revoked = False
+            entitlement.updated = now
+            updated.append(entitlement)
+
+    ActiveEntitlement.objects.bulk_create(created, batch_size=1000)
+    ActiveEntitlement.objects.bulk_update(
+        updated,
+        ["oidc_id", "elu_accession", "expires_on", "revoked", "updated"],
+        batch_size=1000,
+    )
+    return len(created) + len(updated)
+
+
+def revoke_entitlements(accesses: QuerySet) -> int:
+    """
+    Marks the entitlements of the accesses as revoked, e.g. before the accesses are deleted
+    """
+    return ActiveEntitlement.objects.filter(access__in=accesses, revoked=False).update(
+        revoked=True, updated=timezone.now()
+    )
+
+
+def purge_revoked_entitlements(before: datetime) -> int:
+    """
+    Deletes the entitlements revoked before the date, returns the number of entitlements deleted
+    """
+    deleted, _ = ActiveEntitlement.objects.filter(
+        revoked=True, updated__lt=before
+    ).delete()
+    return deleted
+
+
+def get_entitlements(
+    oidc_ids: Iterable[str], today: Optional[date] = None
+) -> Tuple[Dict[str, List[str]], Optional[datetime]]:
+    """
+    Returns the accession numbers of the datasets each OIDC id is entitled to, in a single query,
+    and when the answer last changed (None if none of the ids ever had an entitlement).
+    An entitlement whose last day passed counts as changed at the end of that day,
+    even if its access was not terminated yet.
+    """
+    if today is None:
+        today = timezone.localdate()
+    entitlements = {oidc_id: set() for oidc_id in oidc_ids}
+    last_modified = None
+    rows = ActiveEntitlement.objects.for_oidc_ids(list(entitlements)).values_list(
+        "oidc_id", "elu_accession", "expires_on", "revoked", "updated"
+    )
+    for oidc_id, elu_accession, expires_on, revoked, changed in rows:
+        if not revoked:
+            if expires_on is None or expires_on >= today:
+                entitlements[oidc_id].add(elu_accession)
+            else:
+                expired = timezone.make_aware(
+                    datetime.combine(expires_on + timedelta(days=1), time.min)
+                )
+                changed = max(changed, expired)
+        if last_modified is None or changed > last_modified:
+            last_modified = changed
+    return (
+        {oidc_id: sorted(accessions) for oidc_id, accessions in entitlements.items()},
+        last_modified,
+    )
@@ -93,8 +93,12 @@ def shareFormFactory(*args, **kwargs):
             self.fields.pop("dataset")
             contracts = []
             if self.dataset.project and partner:
-                contracts = Contract.objects.filter(
-                    partners_roles__partner=partner, project=self.dataset.project
+                contracts = (
+                    Contract.objects.filter(
+                        partners_roles__partner=partner, project=self.dataset.project
+                    )
+                    .select_related("project")
+                    .prefetch_related("partners_roles__partner")
                 )
             if partner and contracts.count() == 0:
                 self.fields[
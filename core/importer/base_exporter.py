@@ -0,0 +1,254 @@
+import json
+import sys
+
+from typing import Dict, Iterable, Iterator, List, Tuple
+from urllib.parse import urljoin
+
+from django.conf import settings
+
+from core.importer.pagination import paginate_by_update
+from core.utils import DaisyLogger
+
+
+JSONSCHEMA_BASE_REMOTE_URL = getattr(settings, "IMPORT_JSON_SCHEMAS_URI")
+
+# One JSON document with the "items" list
+JSON_FORMAT = "json"
+# A header line with the "$schema", then one line per item
+NDJSON_FORMAT = "ndjson"
+EXPORT_FORMATS = [JSON_FORMAT, NDJSON_FORMAT]
+
+
+class BaseExporter:
+    """
+    Abstract base class for an exporter.
+    Provides common functions for walking the exported entities in chunks and
+    serializing them to a JSON document - either into a buffer/file, or as a stream of strings.
+
+    Take a look on `ProjectsExporter` or `DatasetsExporter` for information
+    how an implementation should look like.
+    """
+
+    # Number of entities loaded from the database at once
+    chunk_size = 200
+
+    # Used in the log messages
+    entity_name = "entity"
+
+    # Bounds of the primary keys to export, see `set_pk_range`
+    pk_range = None
+
+    logger = DaisyLogger(__name__)
+
+    def __init__(
+        self,
+        objects=None,
+        endpoint_id=-1,
+        include_unpublished=False,
+        chunk_size=None,
+        updated_since=None,
+        cursor=None,
+        limit=None,
+    ):
+        """
+        objects would be Django object manager containing entities to export,
+        i.e.:
+        objects = Dataset.objects.all()
+        objects = Dataset.objects.filter(acronym='test')
+
+        updated_since, cursor and limit narrow the export to one page of the entities
+        updated since then, see `paginate_by_update`
+        """
+        self.objects = objects
+        self.endpoint_id = endpoint_id
+        self.include_unpublished = include_unpublished
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        self.updated_since = updated_since
+        self.cursor = cursor
+        self.limit = limit
+        self.next_cursor = None
+
+    @property
+    def json_schema_name(self):
+        """
+        The name of the JSON schema file the exported items conform to, None if there is none
+        """
+        raise NotImplementedError(
+            "You must implement `json_schema_name` in your exporter class"
+        )
+
+    @property
+    def json_schema_uri(self):
+        if self.json_schema_name is None:
+            return None
+        return urljoin(JSONSCHEMA_BASE_REMOTE_URL, self.json_schema_name)
+
+    def set_objects(self, objects):
+        self.objects = objects
+
+    def get_queryset(self):
+        """
+        Returns the queryset of entities to export (`self.objects` narrowed by the publication status)
+        """
+        raise NotImplementedError(
+            "Abstract method: Implement this method in the child class."
+        )
+
+    def serialize(self, obj) -> Dict:
+        """
+        Returns the exported representation of a single entity
+        """
+        raise NotImplementedError(
+            "Abstract method: Implement this method in the child class."
+        )
+
+    def set_pk_range(self, first_pk, last_pk):
+        """
+        Narrows the export to the entities with a primary key between `first_pk` and `last_pk` (inclusive)
+        """
+        self.pk_range = (first_pk, last_pk)
+
+    def get_pk_ranges(self, shard_size) -> List[Tuple[int, int]]:
+        """
+        Splits the exported entities into ranges of `shard_size` consecutive primary keys,
+        see `set_pk_range`.
+        """
+        pk_ranges = []
+        first_pk = last_pk = None
+        count = 0
+        pks = self.get_queryset().order_by("pk").values_list("pk", flat=True)
+        for pk in pks.iterator():
+            if first_pk is None:
+                first_pk = pk
+            last_pk = pk
+            count += 1
+            if count == shard_size:
+                pk_ranges.append((first_pk, last_pk))
+                first_pk = None
+                count = 0
+        if first_pk is not None:
+            pk_ranges.append((first_pk, last_pk))
+        return pk_ranges
+
+    def iter_chunks(self) -> Iterator[List]:
+        """
+        Walks the queryset by ascending primary key, `chunk_size` entities at a time,
+        so that only one chunk is held in memory whatever the number of exported entities.
+        """
+        objects, self.next_cursor = paginate_by_update(
+            self.get_queryset(),
+            updated_since=self.updated_since,
+            cursor=self.cursor,
+            limit=self.limit,
+        )
+        if self.pk_range is not None:
+            objects = objects.filter(pk__gte=self.pk_range[0], pk__lte=self.pk_range[1])
+        objects = objects.order_by("pk")
+        last_pk = None
+        while True:
+            chunk_queryset = (
+                objects if last_pk is None else objects.filter(pk__gt=last_pk)
+            )
+            chunk = list(chunk_queryset[: self.chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            last_pk = chunk[-1].pk
+
+    def iter_dicts(self, stop_on_error=False, verbose=False) -> Iterator[Dict]:
+        for chunk in self.iter_chunks():
+            for obj in chunk:
+                self.logger.debug(f' * Exporting {self.entity_name}: "{obj}"...')
+                try:
+                    yield self.serialize(obj)
+                except Exception as e:
+                    self.logger.error(f'Export failed for {self.entity_name} "{obj}"')
+                    self.logger.error(str(e))
+                    if verbose:
+                        import traceback
+
+                        ex = traceback.format_exception(*sys.exc_info())
+                        self.logger.error("\n".join([e for e in ex]))
+                    if stop_on_error:
+                        raise e
+                    continue
+                self.logger.debug("   ... complete!")
+
+    def stream(self, stop_on_error=False, verbose=False, indent=None) -> Iterator[str]:
+        """
+        Yields the exported JSON document piece by piece: first the envelope with "$schema",
+        then one serialized item at a time, and finally the closing brackets.
+        A paginated export (with `limit`) ends with the cursor of the next page.
+        """
+        serialized_items = (
+            json.dumps(item, indent=indent)
+            for item in self.iter_dicts(stop_on_error=stop_on_error, verbose=verbose)
+        )
+        yield from self.stream_document(serialized_items)
+
+    def stream_document(self, serialized_items: Iterable[str]) -> Iterator[str]:
+        """
+        Wraps already serialized items into the exported JSON document
+        """
+        if self.json_schema_uri is None:
+            yield '{"items": ['
+        else:
+            yield '{"$schema": %s, "items": [' % json.dumps(self.json_schema_uri)
+        separator = "\n"
+        for serialized_item in serialized_items:
+            yield separator + serialized_item
+            separator = ",\n"
+        if self.limit is not None:
+            yield '\n], "next_cursor": %s}\n' % json.dumps(self.next_cursor)
+        else:
+            yield "\n]}\n"
+
+    def stream_ndjson(self, stop_on_error=False, verbose=False) -> Iterator[str]:
+        """
+        Yields the export as NDJSON: a header line with the "$schema"
+        (and with the cursor of the next page if the export is paginated),
+        then one line of compact JSON per exported item.
+        """
+        items = self.iter_dicts(stop_on_error=stop_on_error, verbose=verbose)
+        # the first item is fetched beforehand, so that the next page is known
+        first_item = next(items, None)
+        header = {"$schema": self.json_schema_uri}
+        if self.limit is not None:
+            header["next_cursor"] = self.next_cursor
+        yield json.dumps(header) + "\n"
+        if first_item is None:
+            return
+        yield json.dumps(first_item) + "\n"
+        for item in items:
+            yield json.dumps(item) + "\n"
+
+    def export_to_buffer(
+        self, buffer, stop_on_error=False, verbose=False, output_format=JSON_FORMAT
+    ):
+        if output_format == NDJSON_FORMAT:
+            parts = self.stream_ndjson(stop_on_error=stop_on_error, verbose=verbose)
+        else:
+            parts = self.stream(stop_on_error=stop_on_error, verbose=verbose, indent=4)
+        for part in parts:
+            buffer.write(part)
+        return buffer
+
+    def export_to_file(
+        self, file_handle, stop_on_error=False, verbose=False, output_format=JSON_FORMAT
+    ):
+        result = True
+        entity_name = self.entity_name.capitalize()
+        try:
+            self.export_to_buffer(
+                file_handle,
+                stop_on_error=stop_on_error,
+                verbose=verbose,
+                output_format=output_format,
+            )
+        except Exception as e:
+            self.logger.error(f"{entity_name} export failed")
+            self.logger.error(str(e))
+            result = False
+        self.logger.info(f"{entity_name} export complete see file: {file_handle}")
+        return result
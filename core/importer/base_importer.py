@@ -3,18 +3,32 @@ import sys
 import re
 
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterable, List
 
 from django.conf import settings
 from django.contrib.auth.models import Group
 
 from core.constants import Groups as GroupConstants
 from core.models import Partner, Contact, ContactType, User
-from core.utils import DaisyLogger
+from core.importer.base_exporter import JSON_FORMAT, NDJSON_FORMAT
+from core.utils import DaisyLogger, GZIP_SUFFIX, open_text_file
 
 
 PRINCIPAL_INVESTIGATOR = "Principal_Investigator"
 
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+def get_file_format(path_to_the_file: str) -> str:
+    """
+    Guesses the format of an imported file from its name, e.g. "datasets.ndjson.gz" is NDJSON
+    """
+    if path_to_the_file.endswith(GZIP_SUFFIX):
+        path_to_the_file = path_to_the_file[: -len(GZIP_SUFFIX)]
+    if path_to_the_file.endswith(NDJSON_SUFFIXES):
+        return NDJSON_FORMAT
+    return JSON_FORMAT
+
 
 class BaseImporter:
     """
@@ -90,14 +104,20 @@ class BaseImporter:
         self.logger.debug(message)
         return False
 
-    def import_json_file(self, path_to_the_file: str) -> bool:
+    def import_json_file(self, path_to_the_file: str, input_format=None) -> bool:
         """
-        Opens, loads and imports a JSON file.
+        Opens, loads and imports a JSON or NDJSON file, decompressed with gzip if its name ends with ".gz".
+        Unless `input_format` is given, it is guessed from the file name (see `get_file_format`).
         """
+        if input_format is None:
+            input_format = get_file_format(path_to_the_file)
         self.logger.info(f"Opening the file: {path_to_the_file}")
-        with open(path_to_the_file, encoding="utf-8") as json_file:
-            json_file_contents = json_file.read()
-            result = self.import_json(json_file_contents)
+        with open_text_file(path_to_the_file) as json_file:
+            if input_format == NDJSON_FORMAT:
+                result = self.import_ndjson_lines(json_file)
+            else:
+                json_file_contents = json_file.read()
+                result = self.import_json(json_file_contents)
             self.logger.info(
                 f"Successfully completed import for the file: {path_to_the_file}"
             )
@@ -115,6 +135,34 @@ class BaseImporter:
         self.logger.info(f"Import ({importer_class_name}) result: {status}")
         return result
 
+    def import_ndjson_lines(self, lines: Iterable[str]) -> bool:
+        """
+        Validates and imports the objects one line at a time.
+        The first line may be a header with the "$schema", records may carry it too.
+        """
+        result = True
+        importer_class_name = self.__class__.__name__
+        self.logger.info(
+            f'Attempting to use "{importer_class_name}" to parse and import the NDJSON'
+        )
+        count = 0
+        for line_number, line in enumerate(lines):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            schema = item.pop("$schema", None)
+            if line_number == 0 and schema is not None and set(item) <= {"next_cursor"}:
+                # header line
+                continue
+            if self.validate:
+                self.json_schema_validator.validate_items([item], self.logger)
+            result = self.import_object(item) and result
+            count += 1
+        self.logger.debug(f"Finished importing {count} object(s)")
+        status = "success" if result else "failed"
+        self.logger.info(f"Import ({importer_class_name}) result: {status}")
+        return result
+
     def import_object_list(self, json_list: List[Dict]) -> bool:
         """
         Validates and imports a list of objects.
@@ -0,0 +1,39 @@
+from django.conf import settings
+
+from core.importer.base_exporter import BaseExporter
+from core.models import Contract
+from core.utils import DaisyLogger
+
+logger = DaisyLogger(__name__)
+
+
+class ContractsExporter(BaseExporter):
+    """
+    objects would be Django object manager containing contracts to export,
+    i.e.:
+    objects = Contract.objects.all()
+    objects = Contract.objects.filter(project__acronym='test')
+    """
+
+    entity_name = "contract"
+    # There is no JSON schema for contracts (yet), "$schema" is left out of the export
+    json_schema_name = None
+    logger = logger
+
+    def get_queryset(self):
+        if self.objects is not None:
+            objects = self.objects
+        else:
+            objects = Contract.objects.all()
+
+        if not self.include_unpublished:
+            # contracts of the projects with datasets exposed to the endpoint
+            objects = objects.filter(
+                project__datasets__exposures__endpoint__id=self.endpoint_id
+            ).distinct()
+        return objects.for_export()
+
+    def serialize(self, contract):
+        cd = contract.to_dict()
+        cd["source"] = settings.SERVER_URL
+        return cd
@@ -24,6 +24,7 @@ from core.models.data_declaration import (
 )
 from core.models.storage_location import StorageLocationCategory, DataLocation
 from core.models.use_restriction import USE_RESTRICTION_CHOICES
+from core.permissions.custodians import assign_custodian_permissions
 from django.db.models import Count
 
 
@@ -98,8 +99,9 @@ class DatasetsImporter(BaseImporter):
 
         dataset.save()
         dataset.updated = True
-        for local_custodian in local_custodians:
-            local_custodian.assign_permissions_to_dataset(dataset)
+        assign_custodian_permissions(
+            Dataset, [(dataset.pk, custodian.pk) for custodian in local_custodians]
+        )
 
         studies_map = self.process_datadeclarations(dataset_dict, dataset)
 
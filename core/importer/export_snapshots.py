@@ -0,0 +1,209 @@
+import gzip
+import hashlib
+import threading
+
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.importer.datasets_exporter import DatasetsExporter
+from core.importer.projects_exporter import ProjectsExporter
+from core.models import ExportSnapshot
+from core.utils import DaisyLogger
+
+logger = DaisyLogger(__name__)
+
+_state = threading.local()
+
+# set while a rebuild of the snapshots is queued
+REBUILD_SCHEDULED_CACHE_KEY = "export_snapshots_rebuild_scheduled"
+
+EXPORTERS = {
+    DatasetsExporter.entity_name: DatasetsExporter,
+    ProjectsExporter.entity_name: ProjectsExporter,
+}
+
+
+def build_export_snapshot(
+    entity: str, endpoint_id: int, include_unpublished: bool
+) -> ExportSnapshot:
+    """
+    Renders the export of `entity` for the endpoint and stores it compressed.
+    The ETag and the last modification date only change when the rendered JSON does.
+    """
+    exporter = EXPORTERS[entity](
+        endpoint_id=endpoint_id, include_unpublished=include_unpublished
+    )
+    # Anything changed from now on must invalidate the snapshot being built
+    generated = timezone.now()
+    digest = hashlib.sha256()
+    buffer = BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as gzip_file:
+        for part in exporter.stream():
+            data = part.encode("utf-8")
+            digest.update(data)
+            gzip_file.write(data)
+    etag = digest.hexdigest()
+
+    previous = (
+        ExportSnapshot.objects.filter(
+            entity=entity,
+            endpoint_id=endpoint_id,
+            include_unpublished=include_unpublished,
+        )
+        .only("etag", "last_modified")
+        .first()
+    )
+    if previous is not None and previous.etag == etag:
+        last_modified = previous.last_modified
+    else:
+        last_modified = generated
+    snapshot, _ = ExportSnapshot.objects.update_or_create(
+        entity=entity,
+        endpoint_id=endpoint_id,
+        include_unpublished=include_unpublished,
+        defaults={
+            "content": buffer.getvalue(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "generated": generated,
+            "rebuild_started": None,
+        },
+    )
+    logger.debug(f"{snapshot} rendered, ETag: {etag}")
+    return snapshot
+
+
+def get_export_snapshot(
+    entity: str, endpoint_id: int, include_unpublished: bool
+) -> ExportSnapshot:
+    """
+    Returns the up-to-date snapshot of the export, (re)building it if it is missing or stale.
+    A stale snapshot is served as is while another process rebuilds it. The content is deferred, so that answering a conditional request does not load it.
+    """
+    snapshot = (
+        ExportSnapshot.objects.filter(
+            entity=entity,
+            endpoint_id=endpoint_id,
+            include_unpublished=include_unpublished,
+        )
+        .defer("content")
+        .first()
+    )
+    if snapshot is None:
+        return build_export_snapshot(entity, endpoint_id, include_unpublished)
+    if snapshot.is_stale:
+        # while another request or worker rebuilds it, the previous export is served
+        return rebuild_export_snapshot(snapshot) or snapshot
+    return snapshot
+
+
+def claim_export_snapshot_rebuild(snapshot: ExportSnapshot) -> bool:
+    """
+    Marks the snapshot as being rebuilt, returns False if another process is rebuilding it.
+    A claim older than EXPORT_SNAPSHOTS_REBUILD_TIMEOUT seconds was left by a failed rebuild.
+    """
+    now = timezone.now()
+    expired = now - timedelta(
+        seconds=getattr(settings, "EXPORT_SNAPSHOTS_REBUILD_TIMEOUT", 600)
+    )
+    claimed = (
+        ExportSnapshot.objects.filter(pk=snapshot.pk)
+        .filter(Q(rebuild_started__isnull=True) | Q(rebuild_started__lt=expired))
+        .update(rebuild_started=now)
+    )
+    return claimed == 1
+
+
+def rebuild_export_snapshot(snapshot: ExportSnapshot) -> Optional[ExportSnapshot]:
+    """
+    Re-renders the stale snapshot, returns None if another process is already rebuilding it
+    """
+    if not claim_export_snapshot_rebuild(snapshot):
+        return None
+    try:
+        return build_export_snapshot(
+            snapshot.entity, snapshot.endpoint_id, snapshot.include_unpublished
+        )
+    except Exception:
+        ExportSnapshot.objects.filter(pk=snapshot.pk).update(rebuild_started=None)
+        raise
+
+
+def invalidate_export_snapshots():
+    ExportSnapshot.objects.update(invalidated=timezone.now())
+
+
+def exported_entities_changed():
+    """
+    Invalidates the snapshots after a change of the exported entities, once the transaction
+    commits: writing them within it would lock them until then. The changes of a transaction
+    invalidate them once, and a single rebuild is queued for the changes of a few seconds.
+    """
+    if getattr(_state, "deferred", False):
+        _state.changed = True
+        return
+    _state.pending = True
+    # the callbacks of a rolled back transaction are dropped, the pending invalidation
+    # is then done with the next commit
+    transaction.on_commit(export_snapshots_committed)
+
+
+def export_snapshots_committed():
+    if not getattr(_state, "pending", False):
+        # already done by a callback of the same transaction
+        return
+    _state.pending = False
+    invalidate_export_snapshots()
+    schedule_export_snapshots_rebuild()
+
+
+def schedule_export_snapshots_rebuild():
+    from core.tasks import rebuild_export_snapshots
+
+    delay = getattr(settings, "EXPORT_SNAPSHOTS_REBUILD_DELAY", 5)
+    # the queued rebuild also covers the changes committed until it runs
+    if not cache.add(REBUILD_SCHEDULED_CACHE_KEY, True, timeout=delay):
+        return
+    try:
+        rebuild_export_snapshots.apply_async(countdown=delay)
+    except Exception as e:
+        # The snapshots are rebuilt on the next API call anyway
+        logger.error(f"Could not schedule the rebuild of export snapshots: {e}")
+
+
+@contextmanager
+def deferred_export_snapshots():
+    """
+    Suspends the invalidation of the snapshots for a bulk job, e.g. an import.
+    If the job changed any exported entity, they are invalidated once when it exits.
+    """
+    if getattr(_state, "deferred", False):
+        # nested block, the outer one invalidates the snapshots
+        yield
+        return
+    _state.deferred = True
+    _state.changed = False
+    try:
+        yield
+    finally:
+        _state.deferred = False
+        # also after a failure, the entities saved before it were changed
+        if _state.changed:
+            exported_entities_changed()
+
+
+def rebuild_stale_export_snapshots():
+    """
+    Re-renders the snapshots invalidated since they were generated
+    """
+    for snapshot in ExportSnapshot.objects.defer("content"):
+        if snapshot.is_stale:
+            rebuild_export_snapshot(snapshot)
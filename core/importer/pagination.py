@@ -0,0 +1,64 @@
+import base64
+
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(updated: datetime, pk: int) -> str:
+    value = f"{updated.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(value.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Returns the (`updated`, `id`) pair of the last entity of the previous page.
+    Raises ValueError if the cursor was not issued by `encode_cursor`.
+    """
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        updated, pk = value.split("|")
+        return parse_aware_datetime(updated), int(pk)
+    except (UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def parse_aware_datetime(value: str) -> datetime:
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid ISO 8601 date and time: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def paginate_by_update(
+    objects: QuerySet,
+    updated_since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[QuerySet, Optional[str]]:
+    """
+    Narrows `objects` to the entities updated since `updated_since` and following `cursor`,
+    ordered by (`updated`, `id`), at most `limit` of them.
+    Returns the narrowed queryset and the cursor of the next page, None on the last page.
+
+    The page is resolved with a single range scan on the (`updated`, `id`) index,
+    the returned queryset then only selects the entities of the page by their primary key.
+    """
+    if updated_since is not None:
+        objects = objects.filter(updated__gte=updated_since)
+    if cursor is not None:
+        last_updated, last_pk = decode_cursor(cursor)
+        objects = objects.filter(
+            Q(updated__gt=last_updated) | Q(updated=last_updated, pk__gt=last_pk)
+        )
+    if limit is None:
+        return objects, None
+
+    keys = list(objects.order_by("updated", "pk").values_list("updated", "pk")[:limit])
+    next_cursor = encode_cursor(*keys[-1]) if len(keys) == limit else None
+    return objects.filter(pk__in=[pk for _, pk in keys]), next_cursor
@@ -2,6 +2,7 @@ from core.importer.base_importer import BaseImporter
 from core.importer.JSONSchemaValidator import ProjectJSONSchemaValidator
 from core.models import Partner, Project, Publication
 from core.exceptions import ProjectImportError
+from core.permissions.custodians import assign_custodian_permissions
 
 
 class ProjectsImporter(BaseImporter):
@@ -117,8 +118,9 @@ class ProjectsImporter(BaseImporter):
 
         project.updated = True
         project.save()
-        for local_custodian in local_custodians:
-            local_custodian.assign_permissions_to_project(project)
+        assign_custodian_permissions(
+            Project, [(project.pk, custodian.pk) for custodian in local_custodians]
+        )
 
         if self.publish_on_import:
             self.publish_object(project)
@@ -0,0 +1,106 @@
+import json
+import multiprocessing
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator, List, Tuple
+
+from django.db import connections
+
+from core.importer.base_exporter import BaseExporter, JSON_FORMAT, NDJSON_FORMAT
+from core.utils import DaisyLogger, GZIP_SUFFIX, open_text_file
+
+logger = DaisyLogger(__name__)
+
+
+NDJSON_SHARD_SUFFIX = ".ndjson"
+
+
+def get_shard_path(file_path: str, index: int) -> str:
+    # shards of a compressed export are compressed too
+    if file_path.endswith(GZIP_SUFFIX):
+        base_path = file_path[: -len(GZIP_SUFFIX)]
+        return f"{base_path}.{index:05d}{NDJSON_SHARD_SUFFIX}{GZIP_SUFFIX}"
+    return f"{file_path}.{index:05d}{NDJSON_SHARD_SUFFIX}"
+
+
+def export_shard(
+    exporter: BaseExporter, pk_range: Tuple[int, int], shard_path: str
+) -> bool:
+    """
+    Runs in a worker process: exports the entities of the primary key range
+    to a NDJSON file, one entity per line after the header line.
+    """
+    exporter.set_pk_range(*pk_range)
+    try:
+        with open_text_file(shard_path, mode="w") as shard_file:
+            for line in exporter.stream_ndjson():
+                shard_file.write(line)
+    except Exception as e:
+        logger.error(f"Export of shard {shard_path} failed")
+        logger.error(str(e))
+        return False
+    finally:
+        connections.close_all()
+    logger.info(f"Shard {pk_range} exported to {shard_path}")
+    return True
+
+
+def iter_shard_lines(shard_paths: List[str]) -> Iterator[str]:
+    """
+    Yields the serialized items of the shards, skipping their header lines
+    """
+    for shard_path in shard_paths:
+        with open_text_file(shard_path, mode="r") as shard_file:
+            next(shard_file, None)
+            for line in shard_file:
+                line = line.rstrip("\n")
+                if line:
+                    yield line
+
+
+def export_in_shards(
+    exporter: BaseExporter,
+    file_path: str,
+    workers: int,
+    shard_size: int,
+    keep_shards=False,
+    output_format=JSON_FORMAT,
+) -> bool:
+    """
+    Exports the entities in parallel: `workers` processes export `shard_size` entities each
+    to a NDJSON shard file, which are then merged into the JSON or NDJSON document at `file_path`.
+    With `keep_shards`, the shards are left as they are instead (`<file_path>.00000.ndjson`, ...).
+    No process holds more than one chunk of entities in memory.
+    """
+    pk_ranges = exporter.get_pk_ranges(shard_size)
+    shard_paths = [get_shard_path(file_path, index) for index in range(len(pk_ranges))]
+    logger.info(f"Exporting {len(pk_ranges)} shard(s) with {workers} worker(s)")
+
+    # The forked workers must open their own database connections
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("fork")
+    ) as pool:
+        results = list(pool.map(export_shard, repeat(exporter), pk_ranges, shard_paths))
+    if not all(results):
+        logger.error(f"{exporter.entity_name.capitalize()} export failed")
+        return False
+
+    if keep_shards:
+        logger.info(f"Export complete see files: {get_shard_path(file_path, 0)}, ...")
+        return True
+
+    with open_text_file(file_path, mode="w") as export_file:
+        if output_format == NDJSON_FORMAT:
+            export_file.write(json.dumps({"$schema": exporter.json_schema_uri}) + "\n")
+            for line in iter_shard_lines(shard_paths):
+                export_file.write(line + "\n")
+        else:
+            for part in exporter.stream_document(iter_shard_lines(shard_paths)):
+                export_file.write(part)
+    for shard_path in shard_paths:
+        os.remove(shard_path)
+    logger.info(f"Export complete see file: {file_path}")
+    return True
@@ -1,8 +1,16 @@
 import os
 
+from contextlib import nullcontext
+
 from django.core.management import BaseCommand, CommandError
 
-JSON_SUFFIX = ".json"
+from core.importer.base_exporter import EXPORT_FORMATS, JSON_FORMAT
+from core.importer.export_snapshots import deferred_export_snapshots
+from core.importer.sharded_export import export_in_shards
+from core.search_updates import deferred_indexing
+from core.utils import GZIP_SUFFIX, open_text_file
+
+JSON_SUFFIXES = (".json", ".ndjson", ".jsonl")
 
 
 class ImportBaseCommand(BaseCommand):
@@ -41,6 +49,19 @@ class ImportBaseCommand(BaseCommand):
             help="JSON file(s) content is validated against JSON schema before import by default.",
             dest="skip_validation",
         )
+        parser.add_argument(
+            "--format",
+            choices=EXPORT_FORMATS,
+            default=None,
+            help="Format of the file(s): one JSON document, or NDJSON with one record per line. By default guessed from the file name (.ndjson, .jsonl). Files ending with .gz are decompressed.",
+            dest="input_format",
+        )
+        parser.add_argument(
+            "--defer-indexing",
+            action="store_true",
+            help="Do not update the search index for every saved record, reindex the imported records by batches at the end.",
+            dest="defer_indexing",
+        )
 
     def handle(self, *args, **options):
         try:
@@ -51,6 +72,7 @@ class ImportBaseCommand(BaseCommand):
             validate = not (options.get("no_validation"))
             path_to_json_directory = options.get("directory")
             skip_on_exist = options.get("skip_on_exist")
+            self.input_format = options.get("input_format")
 
             importer = self.get_importer(
                 publish_on_import=publish_on_import,
@@ -64,13 +86,17 @@ class ImportBaseCommand(BaseCommand):
                     "Either directory (--directory) or file (--file) argument must be specified!"
                 )
 
-            # Import files from directory
-            if path_to_json_directory:
-                self.import_directory(importer, path_to_json_directory)
+            indexing = (
+                deferred_indexing() if options.get("defer_indexing") else nullcontext()
+            )
+            with indexing, deferred_export_snapshots():
+                # Import files from directory
+                if path_to_json_directory:
+                    self.import_directory(importer, path_to_json_directory)
 
-            # Import records from file
-            if path_to_json_file:
-                self.import_file(importer, path_to_json_file)
+                # Import records from file
+                if path_to_json_file:
+                    self.import_file(importer, path_to_json_file)
 
             self.stdout.write(self.style.SUCCESS("Import was successful!"))
 
@@ -93,12 +119,18 @@ class ImportBaseCommand(BaseCommand):
 
     def import_directory(self, importer, dir_path):
         for json_file_path in os.listdir(dir_path):
-            if json_file_path.endswith(JSON_SUFFIX):
+            if json_file_path.endswith(GZIP_SUFFIX):
+                uncompressed_path = json_file_path[: -len(GZIP_SUFFIX)]
+            else:
+                uncompressed_path = json_file_path
+            if uncompressed_path.endswith(JSON_SUFFIXES):
                 correct_path = os.path.join(dir_path, json_file_path)
                 self.import_file(importer, correct_path)
 
     def import_file(self, importer, full_path):
-        if importer.import_json_file(full_path):
+        if importer.import_json_file(
+            full_path, input_format=getattr(self, "input_format", None)
+        ):
             return
         self.stdout.write(self.style.ERROR("Import failed"))
         if importer.exit_on_error:
@@ -117,18 +149,64 @@ class ExportBaseCommand(BaseCommand):
             help="Exporter allows export of all records include unpublished ones.",
             dest="include_unpublished",
         )
+        parser.add_argument(
+            "--format",
+            choices=EXPORT_FORMATS,
+            default=JSON_FORMAT,
+            help="Export one JSON document, or NDJSON: a header line with the $schema, then one record per line. A file name ending with .gz is compressed.",
+            dest="output_format",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes exporting the records in parallel, each one a shard of records at a time.",
+        )
+        parser.add_argument(
+            "--shard-size",
+            type=int,
+            default=5000,
+            help="Number of records per shard when exporting with several workers.",
+            dest="shard_size",
+        )
+        parser.add_argument(
+            "--keep-shards",
+            action="store_true",
+            help="Keep the NDJSON shard files (one record per line) next to the file instead of merging them into it.",
+            dest="keep_shards",
+        )
 
     def handle(self, *args, **options):
         if not (options.get("file")):
             raise CommandError("File (--file) argument must be specified!")
+        if options.get("workers") < 1:
+            raise CommandError("The number of workers (--workers) must be at least 1!")
+        if options.get("shard_size") < 1:
+            raise CommandError("The shard size (--shard-size) must be at least 1!")
 
         try:
             include_unpublished = options.get("include_unpublished")
             path_to_json_file = options.get("file")
+            workers = options.get("workers")
+            keep_shards = options.get("keep_shards")
+            output_format = options.get("output_format")
+            exp = self.get_exporter(include_unpublished=include_unpublished)
+
+            if workers > 1 or keep_shards:
+                if not export_in_shards(
+                    exp,
+                    path_to_json_file,
+                    workers=workers,
+                    shard_size=options.get("shard_size"),
+                    keep_shards=keep_shards,
+                    output_format=output_format,
+                ):
+                    raise CommandError("Export of some shards failed.")
+                self.stdout.write(self.style.SUCCESS("Export complete!"))
+                return
 
-            with open(path_to_json_file, mode="w+", encoding="utf-8") as json_file:
-                exp = self.get_exporter(include_unpublished=include_unpublished)
-                exp.export_to_file(json_file)
+            with open_text_file(path_to_json_file, mode="w") as json_file:
+                exp.export_to_file(json_file, output_format=output_format)
                 self.stdout.write(self.style.SUCCESS("Export complete!"))
 
         except Exception as e:
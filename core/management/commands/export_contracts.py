@@ -0,0 +1,9 @@
+from core.management.commands._private import ExportBaseCommand
+from core.importer.contracts_exporter import ContractsExporter
+
+
+class Command(ExportBaseCommand):
+    help = "export contract records to a designated file"
+
+    def get_exporter(self, include_unpublished=False):
+        return ContractsExporter(include_unpublished=include_unpublished)
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.core.management import BaseCommand
 
+from ...importer.export_snapshots import deferred_export_snapshots
 from ...importer.ldap_users_importer import LDAPUsersImporter
 
 
@@ -25,10 +26,11 @@ class Command(BaseCommand):
         )
         skip = options.get("skip")
         if not skip:
-            ldap_users_importer.import_all_users()
-            pis = settings.PREDEFINED_PIS_LIST
-            for pi in pis:
-                try:
-                    ldap_users_importer.import_from_username(pi, set_pi=True)
-                except AttributeError:
-                    pass
+            with deferred_export_snapshots():
+                ldap_users_importer.import_all_users()
+                pis = settings.PREDEFINED_PIS_LIST
+                for pi in pis:
+                    try:
+                        ldap_users_importer.import_from_username(pi, set_pi=True)
+                    except AttributeError:
+                        pass
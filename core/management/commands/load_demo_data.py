@@ -1,11 +1,15 @@
 import os
 
+from contextlib import nullcontext
+
 from django.conf import settings
 from django.core.management import BaseCommand
 
 from core.importer.datasets_importer import DatasetsImporter
+from core.importer.export_snapshots import deferred_export_snapshots
 from core.importer.projects_importer import ProjectsImporter
 from core.models import User
+from core.search_updates import deferred_indexing
 
 
 DEMO_DATA_DIR = os.path.join(settings.BASE_DIR, "data", "demo")
@@ -14,6 +18,14 @@ DEMO_DATA_DIR = os.path.join(settings.BASE_DIR, "data", "demo")
 class Command(BaseCommand):
     help = "load demo data into the database"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--defer-indexing",
+            action="store_true",
+            help="Do not update the search index for every saved record, reindex the loaded records by batches at the end.",
+            dest="defer_indexing",
+        )
+
     def _load_demo_projects(self):
         projects_json_file = os.path.join(DEMO_DATA_DIR, "projects.json")
         importer = ProjectsImporter(exit_on_error=False, verbose=True)
@@ -53,10 +65,15 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         try:
-            self._load_demo_projects()
-            self._load_demo_datasets()
-            self._create_demo_superuser()
-            self._reset_passwords()
+            indexing = (
+                deferred_indexing() if options.get("defer_indexing") else nullcontext()
+            )
+            with deferred_export_snapshots():
+                with indexing:
+                    self._load_demo_projects()
+                    self._load_demo_datasets()
+                self._create_demo_superuser()
+                self._reset_passwords()
 
         except Exception as e:
             msg = f"""Something went wrong during loading demo data ({__file__}: class {self.__class__.__name__})!
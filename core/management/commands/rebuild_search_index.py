@@ -0,0 +1,109 @@
+import math
+import multiprocessing
+import os
+
+from django.apps import apps
+from django.core.management import BaseCommand, call_command
+from django.db import connections
+from haystack import connections as haystack_connections
+
+from core.search_updates import bump_index_generation
+
+
+def index_shard(shard):
+    """
+    Indexes the objects of a model whose primary keys are within the shard's range,
+    sending them to the search backend by batches. Returns the number of objects indexed.
+    """
+    model_label, using, first_pk, last_pk, batch_size = shard
+    haystack_connections[using].reset_sessions()
+    index = (
+        haystack_connections[using]
+        .get_unified_index()
+        .get_index(apps.get_model(model_label))
+    )
+    backend = haystack_connections[using].get_backend()
+    queryset = (
+        index.build_queryset(using=using)
+        .filter(pk__gte=first_pk, pk__lte=last_pk)
+        .order_by("pk")
+    )
+    indexed = 0
+    last_indexed_pk = None
+    while True:
+        # by pk ranges rather than offsets, so that the later batches are as fast as the first
+        batch_queryset = queryset
+        if last_indexed_pk is not None:
+            batch_queryset = queryset.filter(pk__gt=last_indexed_pk)
+        batch = list(batch_queryset[:batch_size])
+        if not batch:
+            return indexed
+        backend.update(index, batch)
+        indexed += len(batch)
+        last_indexed_pk = batch[-1].pk
+
+
+class Command(BaseCommand):
+    help = (
+        "Clears the search index and rebuilds it, splitting every index in ranges of "
+        "primary keys which are indexed in parallel by worker processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of objects sent to the search backend at once (default: 1000)",
+        )
+        parser.add_argument(
+            "--using",
+            default="default",
+            help="The search connection to rebuild (default: default)",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options["workers"], 1)
+        batch_size = options["batch_size"]
+        using = options["using"]
+
+        call_command("clear_index", interactive=False, using=[using], verbosity=0)
+
+        shards = []
+        unified_index = haystack_connections[using].get_unified_index()
+        for model, index in unified_index.get_indexes().items():
+            pks = list(
+                index.build_queryset(using=using)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            shard_size = max(math.ceil(len(pks) / workers), batch_size)
+            for start in range(0, len(pks), shard_size):
+                shard_pks = pks[start : start + shard_size]
+                shards.append(
+                    (model._meta.label, using, shard_pks[0], shard_pks[-1], batch_size)
+                )
+
+        if workers > 1:
+            # the forked workers must open their own database connections
+            connections.close_all()
+            with multiprocessing.Pool(workers) as pool:
+                results = pool.map(index_shard, shards)
+        else:
+            results = [index_shard(shard) for shard in shards]
+
+        indexed_by_model = {
+            model._meta.label: 0 for model in unified_index.get_indexed_models()
+        }
+        for shard, indexed in zip(shards, results):
+            indexed_by_model[shard[0]] += indexed
+        for model_label, indexed in indexed_by_model.items():
+            bump_index_generation(model_label)
+            verbose_name_plural = apps.get_model(model_label)._meta.verbose_name_plural
+            self.stdout.write(f"{verbose_name_plural.capitalize()}: {indexed} indexed")
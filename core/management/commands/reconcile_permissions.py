@@ -0,0 +1,44 @@
+from django.core.management import BaseCommand
+
+from core.models import Contract, Dataset, Project
+from core.permissions.custodians import assign_custodian_permissions
+from core.permissions.effective import rebuild_effective_permissions
+
+
+class Command(BaseCommand):
+    help = (
+        "Gives the local custodians of every project, dataset and contract "
+        "the permissions they are missing, e.g. after a bulk import, "
+        "then rebuilds the effective permissions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of entities reconciled at once (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        self.assign_custodian_permissions(batch_size)
+        effective = rebuild_effective_permissions(batch_size)
+        self.stdout.write(f"Effective permissions: {effective}")
+
+    def assign_custodian_permissions(self, batch_size):
+        for model in [Project, Dataset, Contract]:
+            custodians = model.local_custodians.through.objects.order_by(
+                f"{model._meta.model_name}_id"
+            ).values_list(f"{model._meta.model_name}_id", "user_id")
+            assigned = 0
+            batch = []
+            for custodian in custodians.iterator():
+                batch.append(custodian)
+                if len(batch) >= batch_size:
+                    assigned += assign_custodian_permissions(model, batch)
+                    batch = []
+            assigned += assign_custodian_permissions(model, batch)
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural.capitalize()}: {assigned} permission(s) assigned"
+            )
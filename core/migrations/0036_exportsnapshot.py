@@ -0,0 +1,97 @@
+# Generated by Django 3.2.20 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0035_auto_20231108_1041"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "entity",
+                    models.CharField(
+                        help_text="The name of the exported entity, e.g. dataset or project.",
+                        max_length=32,
+                        verbose_name="Entity",
+                    ),
+                ),
+                (
+                    "endpoint_id",
+                    models.IntegerField(
+                        help_text="The endpoint the export is served to, -1 when it is not tied to an endpoint.",
+                        verbose_name="Endpoint ID",
+                    ),
+                ),
+                (
+                    "include_unpublished",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Whether the export contains the entities that are not exposed to the endpoint.",
+                        verbose_name="Includes unpublished entities",
+                    ),
+                ),
+                (
+                    "content",
+                    models.BinaryField(
+                        help_text="The gzip-compressed JSON export.",
+                        verbose_name="Content",
+                    ),
+                ),
+                (
+                    "etag",
+                    models.CharField(
+                        help_text="The digest of the uncompressed export.",
+                        max_length=64,
+                        verbose_name="ETag",
+                    ),
+                ),
+                (
+                    "last_modified",
+                    models.DateTimeField(
+                        help_text="When the content of the export last changed.",
+                        verbose_name="Last modified",
+                    ),
+                ),
+                (
+                    "generated",
+                    models.DateTimeField(
+                        help_text="When the export was last rendered.",
+                        verbose_name="Generated",
+                    ),
+                ),
+                (
+                    "invalidated",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="When an exported entity last changed.",
+                        null=True,
+                        verbose_name="Invalidated",
+                    ),
+                ),
+            ],
+            options={
+                "get_latest_by": "generated",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="exportsnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("entity", "endpoint_id", "include_unpublished"),
+                name="unique_export_snapshot",
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.20 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0036_exportsnapshot"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cohort",
+            index=models.Index(fields=["updated", "id"], name="cohort_updated_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="contract",
+            index=models.Index(
+                fields=["updated", "id"], name="contract_updated_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dataset",
+            index=models.Index(fields=["updated", "id"], name="dataset_updated_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="partner",
+            index=models.Index(fields=["updated", "id"], name="partner_updated_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(fields=["updated", "id"], name="project_updated_id_idx"),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.20 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0037_updated_id_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="endpoint",
+            name="api_key_digest",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Keyed digest of the API key, used to authenticate the endpoint quickly.",
+                max_length=64,
+                null=True,
+                unique=True,
+                verbose_name="API Key digest",
+            ),
+        ),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 3.2.20 on 2026-10-18 14:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+INSERT_EFFECTIVE_PERMISSIONS = (
+    "INSERT INTO core_effectivepermission "
+    "(user_id, content_type_id, object_id, codename, source) "
+)
+
+
+def get_populate_statements():
+    """
+    Fills the effective permissions from the guardian tables,
+    as `core.permissions.effective.rebuild_effective_permissions` does
+    """
+    statements = []
+    for model in ["project", "dataset"]:
+        statements.append(
+            INSERT_EFFECTIVE_PERMISSIONS
+            + "SELECT DISTINCT op.user_id, p.content_type_id, op.content_object_id, p.codename, 'direct' "
+            f"FROM core_{model}userobjectpermission op "
+            "INNER JOIN auth_permission p ON p.id = op.permission_id"
+        )
+        statements.append(
+            INSERT_EFFECTIVE_PERMISSIONS
+            + "SELECT DISTINCT ug.user_id, p.content_type_id, op.content_object_id, p.codename, 'group' "
+            f"FROM core_{model}groupobjectpermission op "
+            "INNER JOIN auth_permission p ON p.id = op.permission_id "
+            "INNER JOIN core_user_groups ug ON ug.group_id = op.group_id"
+        )
+    # contracts have no direct foreign key permission tables
+    statements.append(
+        INSERT_EFFECTIVE_PERMISSIONS
+        + "SELECT DISTINCT op.user_id, op.content_type_id, CAST(op.object_pk AS integer), p.codename, 'direct' "
+        "FROM guardian_userobjectpermission op "
+        "INNER JOIN auth_permission p ON p.id = op.permission_id "
+        "INNER JOIN django_content_type ct ON ct.id = op.content_type_id "
+        "WHERE ct.app_label = 'core' AND ct.model = 'contract'"
+    )
+    statements.append(
+        INSERT_EFFECTIVE_PERMISSIONS
+        + "SELECT DISTINCT ug.user_id, op.content_type_id, CAST(op.object_pk AS integer), p.codename, 'group' "
+        "FROM guardian_groupobjectpermission op "
+        "INNER JOIN auth_permission p ON p.id = op.permission_id "
+        "INNER JOIN django_content_type ct ON ct.id = op.content_type_id "
+        "INNER JOIN core_user_groups ug ON ug.group_id = op.group_id "
+        "WHERE ct.app_label = 'core' AND ct.model = 'contract'"
+    )
+    for model in ["dataset", "contract"]:
+        statements.append(
+            INSERT_EFFECTIVE_PERMISSIONS
+            + f"SELECT DISTINCT ep.user_id, ct.id, e.id, REPLACE(ep.codename, 'project', '{model}'), 'inherited' "
+            "FROM core_effectivepermission ep "
+            "INNER JOIN django_content_type pct ON pct.id = ep.content_type_id "
+            f"INNER JOIN core_{model} e ON e.project_id = ep.object_id "
+            "INNER JOIN django_content_type ct "
+            f"ON ct.app_label = 'core' AND ct.model = '{model}' "
+            "WHERE pct.app_label = 'core' AND pct.model = 'project' "
+            "AND ep.source IN ('direct', 'group')"
+        )
+    return statements
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("guardian", "0002_generic_permissions_index"),
+        ("core", "0038_endpoint_api_key_digest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EffectivePermission",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField(verbose_name="Object ID")),
+                (
+                    "codename",
+                    models.CharField(
+                        help_text="The codename of the permission, e.g. change_dataset.",
+                        max_length=100,
+                        verbose_name="Permission",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[
+                            ("direct", "Direct"),
+                            ("group", "Group"),
+                            ("inherited", "Inherited"),
+                        ],
+                        help_text="How the user holds the permission.",
+                        max_length=16,
+                        verbose_name="Source",
+                    ),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                        verbose_name="Content type",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="effective_permissions",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="User",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="effectivepermission",
+            constraint=models.UniqueConstraint(
+                fields=("content_type", "object_id", "user", "codename", "source"),
+                name="unique_effective_permission",
+            ),
+        ),
+        migrations.RunSQL(get_populate_statements(), migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 3.2.20 on 2026-10-18 16:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# The OIDC id of the user if the access has one, otherwise of the contact,
+# as the holder of `core.entitlements.get_entitlement_values`
+HOLDER_OIDC_ID = "CASE WHEN a.user_id IS NOT NULL THEN u.oidc_id ELSE c.oidc_id END"
+
+# Same conditions as `core.entitlements.get_entitlement_values`
+POPULATE_ACTIVE_ENTITLEMENTS = (
+    "INSERT INTO core_activeentitlement "
+    "(access_id, oidc_id, elu_accession, expires_on, revoked, updated) "
+    f"SELECT a.id, {HOLDER_OIDC_ID}, d.elu_accession, a.grant_expires_on, "
+    "FALSE, CURRENT_TIMESTAMP "
+    "FROM core_access a "
+    "INNER JOIN core_dataset d ON d.id = a.dataset_id "
+    "LEFT OUTER JOIN core_user u ON u.id = a.user_id "
+    "LEFT OUTER JOIN core_contact c ON c.id = a.contact_id "
+    "WHERE a.status = 'active' "
+    "AND d.elu_accession IS NOT NULL AND d.elu_accession <> '' "
+    f"AND {HOLDER_OIDC_ID} IS NOT NULL "
+    f"AND {HOLDER_OIDC_ID} <> '' "
+    "AND EXISTS (SELECT 1 FROM core_exposure e WHERE e.dataset_id = a.dataset_id)"
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0039_effectivepermission"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActiveEntitlement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "oidc_id",
+                    models.CharField(
+                        db_index=True,
+                        help_text="The OIDC id of the user or contact that has the access.",
+                        max_length=64,
+                        verbose_name="OIDC ID",
+                    ),
+                ),
+                (
+                    "elu_accession",
+                    models.CharField(
+                        help_text="The accession number of the dataset.",
+                        max_length=20,
+                        verbose_name="Accession number",
+                    ),
+                ),
+                (
+                    "expires_on",
+                    models.DateField(
+                        blank=True,
+                        help_text="The last day of the access, if it expires.",
+                        null=True,
+                        verbose_name="Expires on",
+                    ),
+                ),
+                (
+                    "revoked",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Whether the access was terminated, suspended or deleted.",
+                        verbose_name="Revoked",
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        help_text="When the entitlement last changed.",
+                        verbose_name="Updated",
+                    ),
+                ),
+                (
+                    "access",
+                    models.OneToOneField(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="entitlement",
+                        to="core.access",
+                        verbose_name="Access",
+                    ),
+                ),
+            ],
+            options={
+                "get_latest_by": "updated",
+            },
+        ),
+        migrations.RunSQL(POPULATE_ACTIVE_ENTITLEMENTS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.20 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0040_activeentitlement"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchIndexGeneration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model_label",
+                    models.CharField(
+                        help_text="The label of the indexed model, e.g. core.Dataset.",
+                        max_length=100,
+                        unique=True,
+                        verbose_name="Model",
+                    ),
+                ),
+                (
+                    "generation",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="The number of updates of the index.",
+                        verbose_name="Generation",
+                    ),
+                ),
+            ],
+        ),
+    ]
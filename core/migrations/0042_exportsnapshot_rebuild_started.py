@@ -0,0 +1,22 @@
+# Generated by Django 3.2.20 on 2026-10-18 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0041_searchindexgeneration"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportsnapshot",
+            name="rebuild_started",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When a rebuild of the stale export started, it is served meanwhile.",
+                null=True,
+                verbose_name="Rebuild started",
+            ),
+        ),
+    ]
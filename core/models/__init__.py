@@ -26,6 +26,10 @@ from .term_model import StudyTerm, GeneTerm, PhenotypeTerm, DiseaseTerm
 from .data_log_type import DataLogType
 from .endpoint import Endpoint
 from .exposure import Exposure
+from .export_snapshot import ExportSnapshot
+from .effective_permission import EffectivePermission
+from .active_entitlement import ActiveEntitlement
+from .search_index_generation import SearchIndexGeneration
 
 # They need to be after User because of the inner references
 from .user import User
@@ -63,5 +67,9 @@ __all__ = [
     "DataLogType",
     "Endpoint",
     "Exposure",
+    "ExportSnapshot",
+    "EffectivePermission",
+    "ActiveEntitlement",
+    "SearchIndexGeneration",
     "User",
 ]
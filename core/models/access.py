@@ -84,6 +84,12 @@ class Access(CoreModel, NotifyMixin, metaclass=CoreNotifyMeta):
                 update_fields=("status", "access_notes"),
             )
         cls.objects.bulk_update(accesses_to_expire, ["status", "access_notes"])
+        # bulk_update does not send post_save either
+        from core.entitlements import refresh_entitlements
+
+        refresh_entitlements(
+            cls.objects.filter(pk__in=[access.pk for access in accesses_to_expire])
+        )
         logger.debug("Accesses expired successfully")
 
     def clean(self):
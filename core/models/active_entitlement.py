@@ -0,0 +1,62 @@
+from django.db import models
+
+
+class ActiveEntitlementQuerySet(models.QuerySet):
+    def for_oidc_ids(self, oidc_ids):
+        return self.filter(oidc_id__in=oidc_ids)
+
+
+class ActiveEntitlement(models.Model):
+    """
+    Represents the access of a user or contact, by its OIDC id, to an exposed dataset.
+    The table is derived from the accesses (see `core.entitlements`), so that the entitlements
+    of many users are read with a single indexed query. Revoked entitlements are kept for a while,
+    so that clients asking for the changes since a date learn about the revocation.
+    """
+
+    class Meta:
+        app_label = "core"
+        get_latest_by = "updated"
+
+    objects = ActiveEntitlementQuerySet.as_manager()
+
+    access = models.OneToOneField(
+        "core.Access",
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="entitlement",
+        verbose_name="Access",
+    )
+
+    oidc_id = models.CharField(
+        max_length=64,
+        db_index=True,
+        verbose_name="OIDC ID",
+        help_text="The OIDC id of the user or contact that has the access.",
+    )
+
+    elu_accession = models.CharField(
+        max_length=20,
+        verbose_name="Accession number",
+        help_text="The accession number of the dataset.",
+    )
+
+    expires_on = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Expires on",
+        help_text="The last day of the access, if it expires.",
+    )
+
+    revoked = models.BooleanField(
+        default=False,
+        verbose_name="Revoked",
+        help_text="Whether the access was terminated, suspended or deleted.",
+    )
+
+    updated = models.DateTimeField(
+        verbose_name="Updated", help_text="When the entitlement last changed."
+    )
+
+    def __str__(self):
+        return f"{self.oidc_id} {self.elu_accession} (until {self.expires_on})"
@@ -4,11 +4,32 @@ from django.conf import settings
 from .utils import CoreTrackedDBModel, TextFieldWithInputWidget
 
 
+class CohortQuerySet(models.QuerySet):
+    def for_export(self):
+        """
+        Prefetches the relations walked by `Cohort.serialize_to_export`
+        """
+        # imported here, Contact is registered after Cohort
+        from core.models import Contact
+
+        return self.prefetch_related(
+            models.Prefetch(
+                "owners",
+                queryset=Contact.objects.select_related("type").prefetch_related(
+                    "partners"
+                ),
+            ),
+            "institutes",
+        )
+
+
 class Cohort(CoreTrackedDBModel):
     class Meta:
         app_label = "core"
         get_latest_by = "added"
         ordering = ["added"]
+        # Keyset pagination of the export API by update
+        indexes = [models.Index(fields=["updated", "id"], name="cohort_updated_id_idx")]
 
     class AppMeta:
         help_text = (
@@ -16,6 +37,8 @@ class Cohort(CoreTrackedDBModel):
             "Longitudinal, case-control, family studies are typical examples of cohorts."
         )
 
+    objects = CohortQuerySet.as_manager()
+
     ethics_confirmation = models.BooleanField(
         default=True,
         blank=False,
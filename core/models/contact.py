@@ -5,6 +5,14 @@ from core.models.contact_type import ContactType
 from core.models.utils import CoreModel, TextFieldWithInputWidget
 
 
+class ContactQuerySet(models.QuerySet):
+    def for_export(self):
+        """
+        Prefetches the relations walked by `Contact.serialize_to_export`
+        """
+        return self.select_related("type").prefetch_related("partners")
+
+
 class Contact(CoreModel):
 
     """
@@ -23,6 +31,8 @@ class Contact(CoreModel):
     class AppMeta:
         help_text = "Contacts are people affiliated with Partner institutions. Collaborator PIs, Project Officers at the EU are examples of contacts."
 
+    objects = ContactQuerySet.as_manager()
+
     address = TextFieldWithInputWidget(blank=True, null=True, verbose_name="Address")
 
     email = models.EmailField(verbose_name="E-mail of the contact")
@@ -4,6 +4,7 @@ from django.urls import reverse
 
 from core import constants
 from core.permissions.mapping import PERMISSION_MAPPING
+from core.permissions.querysets import PermissionQuerySetMixin
 from .contact import Contact
 from .partner import Partner, HomeOrganisation
 from .utils import CoreModel
@@ -66,6 +67,30 @@ class PartnerRole(CoreModel):
         return f"{partner} on {project_acronym} {roles}"
 
 
+class ContractQuerySet(PermissionQuerySetMixin, models.QuerySet):
+    def for_export(self):
+        """
+        Fetches everything `Contract.to_dict` walks through in a fixed number of queries
+        """
+        contacts = Contact.objects.select_related("type").prefetch_related("partners")
+        partner_roles = PartnerRole.objects.select_related("partner").prefetch_related(
+            "roles", models.Prefetch("contacts", queryset=contacts)
+        )
+        return self.select_related("project").prefetch_related(
+            "local_custodians__groups",
+            models.Prefetch("partners_roles", queryset=partner_roles),
+        )
+
+    def get_perm_filter(self, user, perm_value):
+        # as ContractChecker, falls back to the permission on the project
+        from core.models import Project
+
+        projects = Project.objects.with_perm(user, perm_value)
+        return super().get_perm_filter(user, perm_value) | models.Q(
+            project__in=projects
+        )
+
+
 class Contract(CoreModel):
     """
     Represents a contract, which can be source or recipient of dataset if it's not internal project
@@ -78,6 +103,10 @@ class Contract(CoreModel):
         permissions = PERMISSION_MAPPING[
             "Contract"
         ]  # Adds PROTECTED and ADMIN permissions to Contract
+        # Keyset pagination of the export API by update
+        indexes = [
+            models.Index(fields=["updated", "id"], name="contract_updated_id_idx")
+        ]
 
     class AppMeta:
         help_text = (
@@ -86,6 +115,8 @@ class Contract(CoreModel):
             " Material Transfer Agreements."
         )
 
+    objects = ContractQuerySet.as_manager()
+
     local_custodians = models.ManyToManyField(
         "core.User",
         blank=False,
@@ -138,15 +169,20 @@ class Contract(CoreModel):
 
     @property
     def partner_roles(self):
-        return PartnerRole.objects.filter(contract=self)
+        # goes through the relation so that prefetched partner roles are reused
+        return self.partners_roles.all()
 
     def __str__(self):
         return self.short_name()
 
     def short_name(self):
-        partners_list = (
-            ", ".join([p.name for p in self.partners.all()]) or "Undefined partner(s)"
+        # goes through the partner roles so that they are reused when prefetched,
+        # in the order of the `partners` query
+        partners = sorted(
+            (partner_role.partner for partner_role in self.partners_roles.all()),
+            key=lambda partner: partner.name,
         )
+        partners_list = ", ".join([p.name for p in partners]) or "Undefined partner(s)"
         if self.project:
             project_name = (
                 self.project.acronym
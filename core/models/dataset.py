@@ -16,6 +16,7 @@ from core import constants
 from core.utils import DaisyLogger
 from core.models import DataDeclaration
 from core.permissions.mapping import PERMISSION_MAPPING
+from core.permissions.querysets import PermissionQuerySetMixin
 from notification import NotifyMixin
 from notification.models import Notification, NotificationVerb
 from .utils import CoreTrackedModel, TextFieldWithInputWidget, CoreNotifyMeta
@@ -28,6 +29,43 @@ if typing.TYPE_CHECKING:
 logger = DaisyLogger(__name__)
 
 
+class DatasetQuerySet(PermissionQuerySetMixin, models.QuerySet):
+    def for_export(self):
+        """
+        Prefetches all the relations walked by `Dataset.to_dict`, so that serializing
+        any number of datasets costs a fixed number of queries.
+        """
+        # imported here, these models are registered after Dataset
+        from core.models import DataLocation, Share, UseRestriction
+
+        return self.select_related("project").prefetch_related(
+            "local_custodians__groups",
+            models.Prefetch(
+                "data_locations",
+                queryset=DataLocation.objects.select_related("backend"),
+            ),
+            "data_locations__accesses",
+            models.Prefetch("shares", queryset=Share.objects.select_related("partner")),
+            "data_declarations__cohorts",
+            models.Prefetch(
+                "data_declarations__data_use_restrictions",
+                queryset=UseRestriction.objects.with_use_class_label(),
+            ),
+            "data_declarations__data_types_generated",
+            "data_declarations__data_types_received",
+            "legal_basis_definitions__legal_basis_types",
+            "legal_basis_definitions__personal_data_types",
+            "legal_basis_definitions__data_declarations",
+        )
+
+    def get_perm_filter(self, user, perm_value):
+        # as DatasetChecker, falls back to the permission on the project
+        from core.models import Project
+
+        projects = Project.objects.with_perm(user, perm_value)
+        return super().get_perm_filter(user, perm_value) | Q(project__in=projects)
+
+
 class Dataset(CoreTrackedModel, NotifyMixin, metaclass=CoreNotifyMeta):
     class Meta:
         app_label = "core"
@@ -36,10 +74,16 @@ class Dataset(CoreTrackedModel, NotifyMixin, metaclass=CoreNotifyMeta):
         permissions = PERMISSION_MAPPING[
             "Dataset"
         ]  # Adds PROTECTED and ADMIN permissions to Dataset
+        # Keyset pagination of the export API by update
+        indexes = [
+            models.Index(fields=["updated", "id"], name="dataset_updated_id_idx")
+        ]
 
     class AppMeta:
         help_text = "Datasets are physical/logical units of data with an associated storage location and access control policy. "
 
+    objects = DatasetQuerySet.as_manager()
+
     comments = models.TextField(
         verbose_name="Other Comments",
         blank=True,
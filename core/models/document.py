@@ -18,6 +18,7 @@ from django.core.files.storage import default_storage
 from django.urls import reverse
 
 from .utils import CoreModel, CoreNotifyMeta
+from core.permissions.querysets import get_permission_value
 from core.utils import DaisyLogger
 from notification.models import Notification, NotificationVerb
 from notification import NotifyMixin
@@ -39,6 +40,26 @@ def get_file_name(instance, filename):
     )
 
 
+class DocumentQuerySet(models.QuerySet):
+    def with_perm(self, user, perm):
+        """
+        Narrows the queryset to the documents on which `user` has the permission `perm`.
+        As DocumentChecker, the permission is the one on the project, dataset or contract
+        the document is attached to.
+        """
+        from core.models import Contract, Dataset, Project
+
+        perm_value = get_permission_value(perm)
+        attached_to = Q(pk__in=[])
+        for model in (Project, Dataset, Contract):
+            objects = model.objects.with_perm(user, perm_value)
+            attached_to |= Q(
+                content_type=ContentType.objects.get_for_model(model),
+                object_id__in=objects.values("pk"),
+            )
+        return self.filter(attached_to)
+
+
 class Document(CoreModel, NotifyMixin, metaclass=CoreNotifyMeta):
     """
     Represents a document
@@ -60,6 +81,8 @@ class Document(CoreModel, NotifyMixin, metaclass=CoreNotifyMeta):
         get_latest_by = "added"
         ordering = ["added"]
 
+    objects = DocumentQuerySet.as_manager()
+
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey("content_type", "object_id")
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from model_utils import Choices
+
+
+class EffectivePermissionQuerySet(models.QuerySet):
+    def for_object(self, obj):
+        return self.filter(
+            content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk
+        )
+
+    def for_user(self, user):
+        return self.filter(user=user)
+
+
+class EffectivePermission(models.Model):
+    """
+    Represents an object permission a user holds on a project, dataset or contract,
+    either directly, through one of its groups or inherited from the parent project.
+    The table is derived from the guardian permissions (see `core.permissions.effective`).
+    """
+
+    SOURCES = Choices(
+        ("direct", "Direct"),
+        ("group", "Group"),
+        ("inherited", "Inherited"),
+    )
+
+    class Meta:
+        app_label = "core"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "user", "codename", "source"],
+                name="unique_effective_permission",
+            )
+        ]
+
+    objects = EffectivePermissionQuerySet.as_manager()
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="effective_permissions",
+        verbose_name="User",
+    )
+
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, verbose_name="Content type"
+    )
+
+    object_id = models.PositiveIntegerField(verbose_name="Object ID")
+
+    codename = models.CharField(
+        max_length=100,
+        verbose_name="Permission",
+        help_text="The codename of the permission, e.g. change_dataset.",
+    )
+
+    source = models.CharField(
+        max_length=16,
+        choices=SOURCES,
+        verbose_name="Source",
+        help_text="How the user holds the permission.",
+    )
+
+    def __str__(self):
+        return f"{self.user} {self.codename} {self.object_id} ({self.source})"
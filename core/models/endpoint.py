@@ -5,7 +5,7 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.contrib.auth.hashers import make_password
 
-from .utils import CoreModel, HashedField
+from .utils import CoreModel, HashedField, digest_api_key
 
 
 class Endpoint(CoreModel):
@@ -45,6 +45,16 @@ class Endpoint(CoreModel):
         """,
     )
 
+    api_key_digest = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="API Key digest",
+        help_text="Keyed digest of the API key, used to authenticate the endpoint quickly.",
+    )
+
     def clean(self):
         """
         This function gets called from the Django admin before save so we use it to validate the url pattern and the api key.
@@ -64,5 +74,10 @@ class Endpoint(CoreModel):
             # Preventing integrity Errors in the future of having two endpoints with the same api key
             raise ValidationError("Please use a different API key.")
 
+    def save(self, *args, **kwargs):
+        # Computed from the same value as the hash of `api_key`
+        self.api_key_digest = digest_api_key(self.api_key)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name}"
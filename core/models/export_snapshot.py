@@ -0,0 +1,76 @@
+from django.db import models
+
+
+class ExportSnapshot(models.Model):
+    """
+    Represents a pre-rendered, gzip-compressed export of datasets or projects,
+    as served by the API to an endpoint (or to the global API key).
+    """
+
+    class Meta:
+        app_label = "core"
+        get_latest_by = "generated"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["entity", "endpoint_id", "include_unpublished"],
+                name="unique_export_snapshot",
+            )
+        ]
+
+    entity = models.CharField(
+        max_length=32,
+        verbose_name="Entity",
+        help_text="The name of the exported entity, e.g. dataset or project.",
+    )
+
+    endpoint_id = models.IntegerField(
+        verbose_name="Endpoint ID",
+        help_text="The endpoint the export is served to, -1 when it is not tied to an endpoint.",
+    )
+
+    include_unpublished = models.BooleanField(
+        default=False,
+        verbose_name="Includes unpublished entities",
+        help_text="Whether the export contains the entities that are not exposed to the endpoint.",
+    )
+
+    content = models.BinaryField(
+        verbose_name="Content", help_text="The gzip-compressed JSON export."
+    )
+
+    etag = models.CharField(
+        max_length=64,
+        verbose_name="ETag",
+        help_text="The digest of the uncompressed export.",
+    )
+
+    last_modified = models.DateTimeField(
+        verbose_name="Last modified",
+        help_text="When the content of the export last changed.",
+    )
+
+    generated = models.DateTimeField(
+        verbose_name="Generated",
+        help_text="When the export was last rendered.",
+    )
+
+    invalidated = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Invalidated",
+        help_text="When an exported entity last changed.",
+    )
+
+    rebuild_started = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Rebuild started",
+        help_text="When a rebuild of the stale export started, it is served meanwhile.",
+    )
+
+    @property
+    def is_stale(self):
+        return self.invalidated is not None and self.invalidated >= self.generated
+
+    def __str__(self):
+        return f"Export snapshot: {self.entity}s@{self.endpoint_id}"
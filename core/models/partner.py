@@ -38,6 +38,10 @@ class Partner(CoreTrackedDBModel):
         app_label = "core"
         get_latest_by = "added"
         ordering = ["name"]
+        # Keyset pagination of the export API by update
+        indexes = [
+            models.Index(fields=["updated", "id"], name="partner_updated_id_idx")
+        ]
 
     class AppMeta:
         help_text = (
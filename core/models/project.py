@@ -15,10 +15,12 @@ from guardian.models import GroupObjectPermissionBase, UserObjectPermissionBase
 
 from core import constants
 from core.permissions.mapping import PERMISSION_MAPPING
+from core.permissions.querysets import PermissionQuerySetMixin
 from notification import NotifyMixin
 from notification.models import NotificationVerb, Notification
 from core.utils import DaisyLogger
 
+from .contact import Contact
 from .utils import CoreTrackedModel, COMPANY, CoreNotifyMeta
 from .partner import HomeOrganisation
 
@@ -30,6 +32,25 @@ if typing.TYPE_CHECKING:
 logger = DaisyLogger(__name__)
 
 
+class ProjectQuerySet(PermissionQuerySetMixin, models.QuerySet):
+    def for_export(self):
+        """
+        Prefetches all the relations walked by `Project.to_dict`, so that serializing
+        any number of projects costs a fixed number of queries.
+        """
+        return self.prefetch_related(
+            models.Prefetch(
+                "contacts",
+                queryset=Contact.objects.select_related("type").prefetch_related(
+                    "partners"
+                ),
+            ),
+            "local_custodians__groups",
+            "company_personnel",
+            "publications",
+        )
+
+
 class Project(CoreTrackedModel, NotifyMixin, metaclass=CoreNotifyMeta):
     class Meta:
         app_label = "core"
@@ -38,6 +59,10 @@ class Project(CoreTrackedModel, NotifyMixin, metaclass=CoreNotifyMeta):
         permissions = PERMISSION_MAPPING[
             "Project"
         ]  # Adds PROTECTED and ADMIN to permissions on Project
+        # Keyset pagination of the export API by update
+        indexes = [
+            models.Index(fields=["updated", "id"], name="project_updated_id_idx")
+        ]
 
     class AppMeta:
         help_text = (
@@ -45,6 +70,8 @@ class Project(CoreTrackedModel, NotifyMixin, metaclass=CoreNotifyMeta):
             "legal and administrative processes followed for their setup."
         )
 
+    objects = ProjectQuerySet.as_manager()
+
     acronym = models.CharField(
         blank=False,
         null=False,
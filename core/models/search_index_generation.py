@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class SearchIndexGeneration(models.Model):
+    """
+    Represents the version of the search index of a model, incremented whenever
+    its documents are updated, so that the results cached from the index can be told stale
+    (see `core.search_updates`).
+    """
+
+    class Meta:
+        app_label = "core"
+
+    model_label = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Model",
+        help_text="The label of the indexed model, e.g. core.Dataset.",
+    )
+
+    generation = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Generation",
+        help_text="The number of updates of the index.",
+    )
+
+    def __str__(self):
+        return f"{self.model_label} ({self.generation})"
@@ -1,14 +1,84 @@
 import logging
+from typing import List, Tuple
+
 from django.conf import settings
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models.signals import post_delete, post_save, pre_delete, m2m_changed
 from django.dispatch import receiver
+from guardian.models import GroupObjectPermission, UserObjectPermission
 
-from core.models import Dataset, Project, User, Contract
-from core.search_indexes import DatasetIndex, ProjectIndex, ContractIndex
+from core.api_keys import ENDPOINT_KEY, USER_KEY, verified_keys
+from core.importer.export_snapshots import exported_entities_changed
+from core.entitlements import refresh_entitlements, revoke_entitlements
+from core.models import (
+    Access,
+    Cohort,
+    Contact,
+    Endpoint,
+    Dataset,
+    Project,
+    User,
+    Contract,
+    DataDeclaration,
+    DataLocation,
+    Exposure,
+    LegalBasis,
+    Partner,
+    Publication,
+    Share,
+    UseRestriction,
+)
+from core.models.dataset import (
+    DatasetGroupObjectPermission,
+    DatasetUserObjectPermission,
+)
+from core.models.project import (
+    ProjectGroupObjectPermission,
+    ProjectUserObjectPermission,
+)
+from core.models.utils import digest_api_key
+from core.permissions.context import clear_permission_context
+from core.permissions.custodians import (
+    assign_custodian_permissions,
+    remove_custodian_permissions,
+)
+from core.permissions.effective import (
+    INHERITING_MODELS,
+    forget_effective_permissions,
+    groups_changed,
+    permission_row_changed,
+    refresh_effective_permissions,
+    user_groups_cleared,
+)
+from core.search_updates import index_later
+from core.user_directory import user_directory
 
 logger = logging.getLogger("daisy.signals")
 
 
+def index_custodians_change(model, instance, action, reverse, pk_set):
+    """
+    Reindexes the entities whose custodians changed, once the change is committed
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        index_later(model, [instance.pk])
+    elif pk_set:
+        # changed from the user side
+        index_later(model, pk_set)
+
+
+def get_custodian_pairs(instance, reverse, pk_set) -> List[Tuple[int, int]]:
+    """
+    Returns the (object primary key, user id) pairs changed in a local custodians m2m,
+    whichever side it was changed from
+    """
+    if reverse:
+        # changed from the user side, the primary keys are the objects'
+        return [(object_pk, instance.pk) for object_pk in pk_set]
+    return [(instance.pk, user_id) for user_id in pk_set]
+
+
 @receiver(
     m2m_changed,
     sender=Dataset.local_custodians.through,
@@ -18,25 +88,23 @@ def dataset_local_custodians_changed(sender, instance, action, pk_set, **kwargs)
     """
     Dataset m2m changed
     * Change custodians permissions
-    * Index dataset
+    * Reindex dataset once the change is committed
     """
     if action == "post_add":
-        added_custodians_ids = pk_set
-        added_custodians = User.objects.filter(pk__in=added_custodians_ids)
         logger.debug(
             f'[dataset_local_custodians_changed] action: {action} on "{instance}". Adding custodians: {pk_set} .'
         )
-        for custodian in added_custodians:
-            custodian.assign_permissions_to_dataset(instance)
+        assign_custodian_permissions(
+            Dataset, get_custodian_pairs(instance, kwargs["reverse"], pk_set)
+        )
     elif action == "post_remove":
-        removed_custodians_ids = pk_set
-        removed_custodians = User.objects.filter(pk__in=removed_custodians_ids)
         logger.debug(
             f'[dataset_local_custodians_changed] action: {action} on "{instance}". Removing custodians: {pk_set} .'
         )
-        for custodian in removed_custodians:
-            custodian.remove_permissions_to_dataset(instance)
-    DatasetIndex().update_object(instance)
+        remove_custodian_permissions(
+            Dataset, get_custodian_pairs(instance, kwargs["reverse"], pk_set)
+        )
+    index_custodians_change(Dataset, instance, action, kwargs["reverse"], pk_set)
 
 
 @receiver(
@@ -46,21 +114,19 @@ def dataset_local_custodians_changed(sender, instance, action, pk_set, **kwargs)
 )
 def contract_local_custodians_changed(sender, instance, action, pk_set, **kwargs):
     """
-    Dataset m2m changed
+    Contract m2m changed
     * Change custodians permissions
-    * Index dataset
+    * Reindex contract once the change is committed
     """
     if action == "post_add":
-        added_custodians_ids = pk_set
-        added_custodians = User.objects.filter(pk__in=added_custodians_ids)
-        for custodian in added_custodians:
-            custodian.assign_permissions_to_contract(instance)
+        assign_custodian_permissions(
+            Contract, get_custodian_pairs(instance, kwargs["reverse"], pk_set)
+        )
     elif action == "post_remove":
-        removed_custodians_ids = pk_set
-        removed_custodians = User.objects.filter(pk__in=removed_custodians_ids)
-        for custodian in removed_custodians:
-            custodian.remove_permissions_to_contract(instance)
-    ContractIndex().update_object(instance)
+        remove_custodian_permissions(
+            Contract, get_custodian_pairs(instance, kwargs["reverse"], pk_set)
+        )
+    index_custodians_change(Contract, instance, action, kwargs["reverse"], pk_set)
 
 
 @receiver(
@@ -72,23 +138,270 @@ def project_local_custodians_changed(sender, **kwargs):
     """
     Project m2m changed
     * Change custodians permissions
-    * Index project
+    * Reindex project once the change is committed
     """
     instance = kwargs.get("instance")
     action = kwargs.get("action")
     pk_set = kwargs.get("pk_set")
 
     if action == "post_add":
-        added_custodians_ids = pk_set
-        added_custodians = User.objects.filter(pk__in=added_custodians_ids)
-        for custodian in added_custodians:
-            custodian.assign_permissions_to_project(instance)
+        assign_custodian_permissions(
+            Project, get_custodian_pairs(instance, kwargs.get("reverse"), pk_set)
+        )
     elif action == "post_remove":
-        removed_custodians_ids = pk_set
-        removed_custodians = User.objects.filter(pk__in=removed_custodians_ids)
-        for custodian in removed_custodians:
-            custodian.remove_permissions_to_project(instance)
-    ProjectIndex().update_object(instance)
+        remove_custodian_permissions(
+            Project, get_custodian_pairs(instance, kwargs.get("reverse"), pk_set)
+        )
+    index_custodians_change(Project, instance, action, kwargs.get("reverse"), pk_set)
+
+
+# fields saved alone which are not exported, e.g. at each login
+UNEXPORTED_UPDATE_FIELDS = {"last_login"}
+
+
+def exported_entity_changed(sender, instance, **kwargs):
+    """
+    Dataset, project or anything they export saved or deleted
+    * Invalidate export snapshots, and rebuild them once the change is committed
+    """
+    update_fields = kwargs.get("update_fields")
+    if update_fields and update_fields <= UNEXPORTED_UPDATE_FIELDS:
+        return
+    logger.debug(f'[exported_entity_changed] "{instance}" changed.')
+    exported_entities_changed()
+
+
+def exported_relation_changed(sender, instance, action, **kwargs):
+    """
+    Exported m2m changed
+    * Invalidate export snapshots, and rebuild them once the change is committed
+    """
+    if action in ("post_add", "post_remove", "post_clear"):
+        logger.debug(f'[exported_relation_changed] "{instance}" changed.')
+        exported_entities_changed()
+
+
+for exported_model in [
+    Dataset,
+    Project,
+    Exposure,
+    DataDeclaration,
+    LegalBasis,
+    Share,
+    DataLocation,
+    Access,
+    Cohort,
+    Contact,
+    Partner,
+    Publication,
+    UseRestriction,
+    User,
+]:
+    model_name = exported_model.__name__.lower()
+    post_save.connect(
+        exported_entity_changed,
+        sender=exported_model,
+        dispatch_uid=f"{model_name}_saved_export_snapshots",
+    )
+    post_delete.connect(
+        exported_entity_changed,
+        sender=exported_model,
+        dispatch_uid=f"{model_name}_deleted_export_snapshots",
+    )
+
+for exported_relation in [
+    Dataset.local_custodians,
+    Project.local_custodians,
+    Project.contacts,
+    Project.company_personnel,
+    Project.publications,
+    DataDeclaration.cohorts,
+    DataDeclaration.data_types_generated,
+    DataDeclaration.data_types_received,
+    LegalBasis.data_declarations,
+    LegalBasis.legal_basis_types,
+    LegalBasis.personal_data_types,
+    Contact.partners,
+    Access.defined_on_locations,
+    User.groups,
+]:
+    through = exported_relation.through
+    m2m_changed.connect(
+        exported_relation_changed,
+        sender=through,
+        dispatch_uid=f"{through._meta.model_name}_changed_export_snapshots",
+    )
+
+
+@receiver(
+    m2m_changed,
+    sender=User.groups.through,
+    dispatch_uid="user_groups_changed",
+)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    User groups m2m changed
+    * Reset the group names cached on the user
+    * Drop the permission decisions of the current request
+    * Refresh the effective permissions held through the groups
+    """
+    if action in ("post_add", "post_remove", "post_clear"):
+        clear_permission_context()
+        if reverse:
+            groups_changed([instance.pk])
+        else:
+            instance.forget_group_names()
+            if action == "post_clear":
+                user_groups_cleared(instance.pk)
+            else:
+                groups_changed(pk_set)
+
+
+def object_permission_changed(sender, instance, **kwargs):
+    """
+    Object permission assigned or removed
+    * Drop the permission decisions of the current request
+    * Refresh the effective permissions on the object
+    """
+    clear_permission_context()
+    permission_row_changed(instance)
+
+
+for permission_model in [
+    UserObjectPermission,
+    GroupObjectPermission,
+    DatasetUserObjectPermission,
+    DatasetGroupObjectPermission,
+    ProjectUserObjectPermission,
+    ProjectGroupObjectPermission,
+]:
+    model_name = permission_model.__name__.lower()
+    post_save.connect(
+        object_permission_changed,
+        sender=permission_model,
+        dispatch_uid=f"{model_name}_saved_object_permission",
+    )
+    post_delete.connect(
+        object_permission_changed,
+        sender=permission_model,
+        dispatch_uid=f"{model_name}_deleted_object_permission",
+    )
+
+
+@receiver(post_save, sender=Dataset, dispatch_uid="dataset_saved_effective_permissions")
+@receiver(
+    post_save, sender=Contract, dispatch_uid="contract_saved_effective_permissions"
+)
+def inheriting_entity_saved(sender, instance, **kwargs):
+    """
+    Dataset or contract saved
+    * Refresh its effective permissions, its project may have changed
+    """
+    refresh_effective_permissions(sender, [instance.pk])
+
+
+@receiver(
+    pre_delete, sender=Project, dispatch_uid="project_deleting_effective_permissions"
+)
+def project_deleting(sender, instance, **kwargs):
+    """
+    Project about to be deleted
+    * Remember its datasets and contracts, they stop inheriting its permissions
+    """
+    instance.inheriting_entities = {
+        model: list(model.objects.filter(project=instance).values_list("pk", flat=True))
+        for model in INHERITING_MODELS
+    }
+
+
+@receiver(
+    post_delete, sender=Project, dispatch_uid="project_deleted_effective_permissions"
+)
+@receiver(
+    post_delete, sender=Dataset, dispatch_uid="dataset_deleted_effective_permissions"
+)
+@receiver(
+    post_delete, sender=Contract, dispatch_uid="contract_deleted_effective_permissions"
+)
+def effective_permissions_entity_deleted(sender, instance, **kwargs):
+    """
+    Project, dataset or contract deleted
+    * Delete its effective permissions
+    * Refresh the ones of the datasets and contracts of a project
+    """
+    forget_effective_permissions(instance)
+    for model, object_pks in getattr(instance, "inheriting_entities", {}).items():
+        refresh_effective_permissions(model, object_pks)
+
+
+@receiver(post_save, sender=Access, dispatch_uid="access_saved_entitlements")
+def access_saved(sender, instance, **kwargs):
+    """
+    Access saved
+    * Refresh its entitlement
+    """
+    refresh_entitlements(Access.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_delete, sender=Access, dispatch_uid="access_deleting_entitlements")
+def access_deleting(sender, instance, **kwargs):
+    """
+    Access about to be deleted
+    * Revoke its entitlement
+    """
+    revoke_entitlements(Access.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Exposure, dispatch_uid="exposure_saved_entitlements")
+@receiver(post_delete, sender=Exposure, dispatch_uid="exposure_deleted_entitlements")
+@receiver(post_save, sender=Dataset, dispatch_uid="dataset_saved_entitlements")
+def entitled_dataset_changed(sender, instance, **kwargs):
+    """
+    Dataset or one of its exposures saved or deleted
+    * Refresh the entitlements of the accesses to the dataset
+    """
+    dataset_id = instance.pk if sender is Dataset else instance.dataset_id
+    refresh_entitlements(Access.objects.filter(dataset_id=dataset_id))
+
+
+@receiver(post_save, sender=User, dispatch_uid="user_saved_entitlements")
+@receiver(post_save, sender=Contact, dispatch_uid="contact_saved_entitlements")
+def access_holder_saved(sender, instance, **kwargs):
+    """
+    User or contact saved
+    * Refresh the entitlements of its accesses, its OIDC id may have changed
+    """
+    update_fields = kwargs.get("update_fields")
+    if update_fields and set(update_fields) == {"last_login"}:
+        return
+    if sender is User:
+        refresh_entitlements(Access.objects.filter(user=instance))
+    else:
+        refresh_entitlements(Access.objects.filter(contact=instance))
+
+
+@receiver(post_save, sender=Endpoint, dispatch_uid="endpoint_saved_api_key")
+@receiver(post_delete, sender=Endpoint, dispatch_uid="endpoint_deleted_api_key")
+def endpoint_api_key_changed(sender, instance, **kwargs):
+    """
+    Endpoint saved or deleted
+    * Forget its verified API key
+    """
+    verified_keys.forget(ENDPOINT_KEY, instance.pk, instance.api_key_digest)
+
+
+@receiver(post_save, sender=User, dispatch_uid="user_saved")
+@receiver(post_delete, sender=User, dispatch_uid="user_deleted")
+def user_changed(sender, instance, **kwargs):
+    """
+    User saved or deleted
+    * Forget its verified API key
+    * Reload the user directory, unless only the last login changed
+    """
+    verified_keys.forget(USER_KEY, instance.pk, digest_api_key(instance.api_key))
+    update_fields = kwargs.get("update_fields")
+    if not update_fields or set(update_fields) != {"last_login"}:
+        user_directory.clear()
 
 
 # @receiver(post_save, sender=Project, dispatch_uid='project_saved')
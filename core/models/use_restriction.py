@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery
 
 from model_utils import Choices
 
@@ -14,12 +15,28 @@ USE_RESTRICTION_CHOICES = Choices(
 )
 
 
+class UseRestrictionQuerySet(models.QuerySet):
+    def with_use_class_label(self):
+        """
+        Annotates the name of the restriction class, so that `to_dict` does not query it
+        """
+        return self.annotate(
+            use_class_label=Subquery(
+                RestrictionClass.objects.filter(
+                    code=OuterRef("restriction_class")
+                ).values("name")[:1]
+            )
+        )
+
+
 class UseRestriction(CoreModel):
     class Meta:
         app_label = "core"
         get_latest_by = "added"
         ordering = ["added"]
 
+    objects = UseRestrictionQuerySet.as_manager()
+
     data_declaration = models.ForeignKey(
         "core.DataDeclaration",
         related_name="data_use_restrictions",
@@ -82,11 +99,15 @@ class UseRestriction(CoreModel):
         """
         Used for import/export - the keys are conformant to the schema
         """
+        # annotated by `UseRestrictionQuerySet.with_use_class_label`
+        use_class_label = getattr(self, "use_class_label", None)
+        if use_class_label is None:
+            use_class_label = RestrictionClass.objects.get(
+                code=self.restriction_class
+            ).name
         return {
             "use_class": self.restriction_class,
-            "use_class_label": RestrictionClass.objects.get(
-                code=self.restriction_class
-            ).name,
+            "use_class_label": use_class_label,
             "use_class_note": self.use_class_note,
             "use_restriction_note": self.notes,
             "use_restriction_rule": self.use_restriction_rule,
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import FrozenSet, List, Union
 
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
@@ -6,15 +6,13 @@ from django.db import models
 from django.utils.crypto import get_random_string
 from enumchoicefield import EnumChoiceField
 from enumchoicefield.enum import ChoiceEnum
-from guardian.shortcuts import assign_perm, remove_perm
 
 from core import constants
 from core.models import Access, Dataset, Contract, Project
-from core.permissions import (
-    ProjectChecker,
-    DatasetChecker,
-    ContractChecker,
-    AutoChecker,
+from core.permissions.context import get_permission_context
+from core.permissions.custodians import (
+    assign_custodian_permissions,
+    remove_custodian_permissions,
 )
 from .utils import TextFieldWithInputWidget
 
@@ -132,6 +130,9 @@ class User(AbstractUser):
         UserSource, default=UserSource.MANUAL, blank=False, null=False
     )
 
+    # Names of the groups, see `get_group_names`
+    _group_names = None
+
     def __str__(self):
         fullname = self.get_full_name()
         return fullname or self.username
@@ -149,13 +150,32 @@ class User(AbstractUser):
         self.full_name = f"{self.first_name} {self.last_name}"
         super(User, self).save(*args, **kw)
 
+    def get_group_names(self) -> FrozenSet[str]:
+        """
+        Returns the names of the user's groups.
+        They are loaded once per user instance - i.e. once per request for `request.user` -
+        or taken from the prefetched groups (e.g. `prefetch_related("local_custodians__groups")`).
+        Changes of the groups through this instance reset them (see `forget_group_names`).
+        """
+        if "groups" in getattr(self, "_prefetched_objects_cache", {}):
+            return frozenset(group.name for group in self.groups.all())
+        if self._group_names is None:
+            self._group_names = frozenset(self.groups.values_list("name", flat=True))
+        return self._group_names
+
+    def forget_group_names(self):
+        self._group_names = None
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.forget_group_names()
+
     def is_part_of(self, *args):
         """
         Check if user is part of the group or goups given.
         """
-        if len(args) == 1:
-            return self.groups.filter(name=args[0]).exists()
-        return self.groups.filter(name__in=args).exists()
+        group_names = self.get_group_names()
+        return any(str(arg) in group_names for arg in args)
 
     def can_publish(self):
         return self.is_superuser or self.is_part_of(constants.Groups.DATA_STEWARD.value)
@@ -174,125 +194,41 @@ class User(AbstractUser):
     def is_notifications_admin(self):
         return self.is_data_steward
 
-    @staticmethod
-    def _assign_perm(permission, user_object, permission_object):
-        if not user_object.has_perm(permission, permission_object):
-            assign_perm(permission, user_object, permission_object)
-
-    @staticmethod
-    def _remove_perm(permission, user_object, permission_object):
-        if user_object.has_perm(permission, permission_object):
-            remove_perm(permission, user_object, permission_object)
-
     def assign_permissions_to_dataset(self, dataset_object):
-        self._assign_perm(
-            f"core.{constants.Permissions.PROTECTED.value}_dataset",
-            self,
-            dataset_object,
-        )
-        self._assign_perm(
-            f"core.{constants.Permissions.ADMIN.value}_dataset", self, dataset_object
-        )
-        self._assign_perm(
-            f"core.{constants.Permissions.DELETE.value}_dataset", self, dataset_object
-        )
-        self._assign_perm(
-            f"core.{constants.Permissions.EDIT.value}_dataset", self, dataset_object
-        )
+        assign_custodian_permissions(Dataset, [(dataset_object.pk, self.pk)])
 
     def remove_permissions_to_dataset(self, dataset_object):
-        self._remove_perm(
-            f"core.{constants.Permissions.PROTECTED.value}_dataset",
-            self,
-            dataset_object,
-        )
-        self._remove_perm(
-            f"core.{constants.Permissions.ADMIN.value}_dataset", self, dataset_object
-        )
-        self._remove_perm(
-            f"core.{constants.Permissions.DELETE.value}_dataset", self, dataset_object
-        )
-        self._remove_perm(
-            f"core.{constants.Permissions.EDIT.value}_dataset", self, dataset_object
-        )
+        remove_custodian_permissions(Dataset, [(dataset_object.pk, self.pk)])
 
     def assign_permissions_to_contract(self, contract):
-        self._assign_perm(
-            f"core.{constants.Permissions.PROTECTED.value}_contract", self, contract
-        )
-        self._assign_perm(
-            f"core.{constants.Permissions.ADMIN.value}_contract", self, contract
-        )
-        self._assign_perm(
-            f"core.{constants.Permissions.DELETE.value}_contract", self, contract
-        )
-        self._assign_perm(
-            f"core.{constants.Permissions.EDIT.value}_contract", self, contract
-        )
+        assign_custodian_permissions(Contract, [(contract.pk, self.pk)])
 
     def remove_permissions_to_contract(self, contract):
-        self._remove_perm(
-            f"core.{constants.Permissions.PROTECTED.value}_contract", self, contract
-        )
-        self._remove_perm(
-            f"core.{constants.Permissions.ADMIN.value}_contract", self, contract
-        )
-        self._remove_perm(
-            f"core.{constants.Permissions.DELETE.value}_contract", self, contract
-        )
-        self._remove_perm(
-            f"core.{constants.Permissions.EDIT.value}_contract", self, contract
-        )
+        remove_custodian_permissions(Contract, [(contract.pk, self.pk)])
 
     def assign_permissions_to_project(self, project_object):
-        self._assign_perm(
-            f"core.{constants.Permissions.PROTECTED.value}_project",
-            self,
-            project_object,
-        )
-        self._assign_perm(
-            f"core.{constants.Permissions.ADMIN.value}_project", self, project_object
-        )
-        self._assign_perm(
-            f"core.{constants.Permissions.DELETE.value}_project", self, project_object
-        )
-        self._assign_perm(
-            f"core.{constants.Permissions.EDIT.value}_project", self, project_object
-        )
+        assign_custodian_permissions(Project, [(project_object.pk, self.pk)])
 
     def remove_permissions_to_project(self, project_object):
-        self._remove_perm(
-            f"core.{constants.Permissions.PROTECTED.value}_project",
-            self,
-            project_object,
-        )
-        self._remove_perm(
-            f"core.{constants.Permissions.ADMIN.value}_project", self, project_object
-        )
-        self._remove_perm(
-            f"core.{constants.Permissions.DELETE.value}_project", self, project_object
-        )
-        self._remove_perm(
-            f"core.{constants.Permissions.EDIT.value}_project", self, project_object
-        )
+        remove_custodian_permissions(Project, [(project_object.pk, self.pk)])
 
     def is_admin_of_project(self, project_object):
-        return ProjectChecker(self).check(
+        return get_permission_context(self).check(
             f"core.{constants.Permissions.ADMIN.value}_project", project_object
         )
 
     def can_edit_project(self, project_object):
-        return ProjectChecker(self).check(
+        return get_permission_context(self).check(
             f"core.{constants.Permissions.EDIT.value}_project", project_object
         )
 
     def is_admin_of_dataset(self, dataset_object):
-        return DatasetChecker(self).check(
+        return get_permission_context(self).check(
             f"core.{constants.Permissions.ADMIN.value}_dataset", dataset_object
         )
 
     def can_edit_dataset(self, dataset_object):
-        return DatasetChecker(self).check(
+        return get_permission_context(self).check(
             f"core.{constants.Permissions.EDIT.value}_dataset", dataset_object
         )
 
@@ -300,14 +236,14 @@ class User(AbstractUser):
         """
         Check if the user has the correct permission on the object.
         """
-        return AutoChecker(self).check(perm, obj)
+        return get_permission_context(self).check(perm, obj)
 
     def can_edit_contract(self, contract):
         """
         Check if user can edit a contract.
         Should return True if user is data steward, legal or local custodian on contract
         """
-        return ContractChecker(self).check(
+        return get_permission_context(self).check(
             f"core.{constants.Permissions.EDIT.value}_contract", contract
         )
 
@@ -316,7 +252,7 @@ class User(AbstractUser):
         Check if user can see protected elements of Contract, Dataset, or Project
         Should return True if user is data stewards, auditor, legal (for contract) or local custodian of object
         """
-        return AutoChecker(self).check(
+        return get_permission_context(self).check(
             f"core.{constants.Permissions.PROTECTED.value}_{obj.__class__.__name__.lower()}",
             obj,
         )
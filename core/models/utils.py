@@ -7,6 +7,7 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models import TextField
+from django.utils.crypto import salted_hmac
 from django.utils.module_loading import import_string
 from django.contrib.auth.hashers import make_password
 
@@ -132,6 +133,14 @@ class TextFieldWithInputWidget(TextField):
         return super().formfield(**defaults)
 
 
+def digest_api_key(value):
+    """
+    Returns a keyed digest (HMAC-SHA256) of an API key: unlike the hash of `HashedField`,
+    it is fast enough to look the key up on every request.
+    """
+    return salted_hmac("core.api_key", value, algorithm="sha256").hexdigest()
+
+
 class HashedField(models.CharField):
     """
     A custom field that will store a hash of the provided value.
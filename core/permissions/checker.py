@@ -3,12 +3,14 @@ Module that handle permission management.
 """
 import logging
 
-from typing import Union, Optional, TYPE_CHECKING
+from collections import defaultdict
+from typing import Dict, Iterable, List, Union, Optional, TYPE_CHECKING
 from abc import ABCMeta, abstractmethod
 
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import Group
 from django.core.exceptions import PermissionDenied, ObjectDoesNotExist
+from django.db.models import prefetch_related_objects
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils.functional import wraps
@@ -252,6 +254,20 @@ class AutoChecker(AbstractChecker):
         "DataLocation": DatasetEntityChecker,
     }
 
+    # attribute holding the parent entity the permissions are inherited from,
+    # and the lookups to prefetch to reach it
+    __parents = {
+        "Dataset": ("project", ["project"]),
+        "Contract": ("project", ["project"]),
+        "PartnerRole": ("contract", ["contract"]),
+        "Document": ("content_object", ["content_type", "content_object"]),
+        "DataDeclaration": ("dataset", ["dataset"]),
+        "Access": ("dataset", ["dataset"]),
+        "LegalBasis": ("dataset", ["dataset"]),
+        "Share": ("dataset", ["dataset"]),
+        "DataLocation": ("dataset", ["dataset"]),
+    }
+
     # override default check method
     def check(self, perm: str, obj: "Model", **kwargs) -> bool:
         return self._check(perm, obj, **kwargs)
@@ -281,6 +297,43 @@ class AutoChecker(AbstractChecker):
             )
             return all(value)
 
+    def prefetch_perms(self, objects: Iterable["Model"]) -> None:
+        """
+        Loads the object permissions of the user (and of its groups) on the objects
+        and on the parents they inherit permissions from, with a few queries per model.
+        The following checks on these objects are then answered from the checker cache.
+        """
+        objects_by_model = defaultdict(list)
+        for obj in objects:
+            objects_by_model[obj.__class__].append(obj)
+
+        for model, model_objects in objects_by_model.items():
+            if model.__name__ == "User":
+                continue
+            self.checker.prefetch_perms(model_objects)
+            if model.__name__ not in self.__parents:
+                continue
+            parent_attribute, lookups = self.__parents[model.__name__]
+            prefetch_related_objects(model_objects, *lookups)
+            parents = [getattr(obj, parent_attribute) for obj in model_objects]
+            self.prefetch_perms(parent for parent in parents if parent is not None)
+
+    def check_many(
+        self, perms: List[str], objects: Iterable["Model"], **kwargs
+    ) -> Dict["Model", Dict[str, bool]]:
+        """
+        Check each permission on each object, e.g. for the rows of a list.
+        The permissions are prefetched for the whole batch (see `prefetch_perms`),
+        so the number of queries does not grow with the number of objects.
+        Returns the results by object, then by permission.
+        """
+        objects = list(objects)
+        self.prefetch_perms(objects)
+        return {
+            obj: {perm: self.check(perm, obj, **dict(kwargs)) for perm in perms}
+            for obj in objects
+        }
+
 
 def permission_required(perm, target, lookup_variables):
     """
@@ -305,10 +358,11 @@ def permission_required(perm, target, lookup_variables):
             obj = get_object_or_404(model, **lookup_dict)
 
             # check permission
-            has_perm = AutoChecker(request.user).check(
+            from core.permissions.context import get_permission_context
+
+            if not get_permission_context(request.user).check(
                 f"core.{perm.value}_{target}", obj
-            )
-            if not AutoChecker(request.user).check(f"core.{perm.value}_{target}", obj):
+            ):
                 raise PermissionDenied
             return view_func(request, *args, **kwargs)
 
@@ -350,7 +404,9 @@ def permission_required_from_content_type(
             except ObjectDoesNotExist:
                 raise Http404
             # check permission
-            if not AutoChecker(request.user).check(
+            from core.permissions.context import get_permission_context
+
+            if not get_permission_context(request.user).check(
                 f"core.{perm.value}_{obj.__class__.__name__.lower()}", obj
             ):
                 raise PermissionDenied
@@ -382,8 +438,10 @@ class CheckerMixin(PermissionRequiredMixin):
             logger.warning(f"No permission target defined, using the object class name")
             self.permission_target = obj.__class__.__name__.lower()
 
+        from core.permissions.context import get_permission_context
+
         perm = f"core.{self.permission_required.value}_{self.permission_target}"
-        has_permission = AutoChecker(request.user).check(perm, obj)
+        has_permission = get_permission_context(request.user).check(perm, obj)
         if not has_permission:
             raise PermissionDenied()
         return None
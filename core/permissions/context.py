@@ -0,0 +1,121 @@
+"""
+Permission decisions shared by all the checks made while handling a request.
+"""
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple, Union, TYPE_CHECKING
+
+from django.contrib.auth.models import Group
+from guardian.core import ObjectPermissionChecker
+
+from core.permissions.checker import AutoChecker
+
+if TYPE_CHECKING:
+    from django.db.models import Model
+    from core.models.user import User
+
+
+class PermissionContext:
+    """
+    Owns one ObjectPermissionChecker for the user and remembers the result of every
+    (permission, object) check, so that repeating a check costs no query.
+    The decisions are dropped with `clear`, e.g. when permissions are assigned.
+    """
+
+    def __init__(self, user_or_group: Union["User", "Group"]) -> None:
+        self.user_or_group = user_or_group
+        self._checker: Optional[ObjectPermissionChecker] = None
+        self._decisions: Dict[Tuple, bool] = {}
+
+    @property
+    def checker(self) -> ObjectPermissionChecker:
+        # created on first use, the user of the request is lazy
+        if self._checker is None:
+            self._checker = ObjectPermissionChecker(self.user_or_group)
+        return self._checker
+
+    def is_for(self, user_or_group: Union["User", "Group"]) -> bool:
+        return (
+            isinstance(user_or_group, Group) == isinstance(self.user_or_group, Group)
+            and user_or_group.pk == self.user_or_group.pk
+        )
+
+    def get_decision_key(
+        self, perm: Union[str, List[str]], obj: "Model", **kwargs
+    ) -> Optional[Tuple]:
+        if obj.pk is None:
+            return None
+        if isinstance(perm, list):
+            perm = tuple(perm)
+        return perm, obj._meta.label, obj.pk, tuple(sorted(kwargs.items()))
+
+    def check(self, perm: Union[str, List[str]], obj: "Model", **kwargs) -> bool:
+        key = self.get_decision_key(perm, obj, **kwargs)
+        if key is not None and key in self._decisions:
+            return self._decisions[key]
+        decision = AutoChecker(self.user_or_group, checker=self.checker).check(
+            perm, obj, **kwargs
+        )
+        if key is not None:
+            self._decisions[key] = decision
+        return decision
+
+    def check_many(
+        self, perms: List[str], objects: Iterable["Model"]
+    ) -> Dict["Model", Dict[str, bool]]:
+        """
+        As `AutoChecker.check_many`, the decisions are remembered for the following checks
+        """
+        results = AutoChecker(self.user_or_group, checker=self.checker).check_many(
+            perms, objects
+        )
+        for obj, decisions in results.items():
+            for perm, decision in decisions.items():
+                key = self.get_decision_key(perm, obj)
+                if key is not None:
+                    self._decisions[key] = decision
+        return results
+
+    def clear(self) -> None:
+        self._checker = None
+        self._decisions.clear()
+
+
+_current_context: ContextVar[Optional[PermissionContext]] = ContextVar(
+    "permission_context", default=None
+)
+
+
+def get_permission_context(user_or_group: Union["User", "Group"]) -> PermissionContext:
+    """
+    Returns the permission context of the current request when it belongs to `user_or_group`,
+    otherwise a new context which lives as long as the caller keeps it.
+    """
+    context = _current_context.get()
+    if context is not None and context.is_for(user_or_group):
+        return context
+    return PermissionContext(user_or_group)
+
+
+def clear_permission_context() -> None:
+    """
+    Drops the decisions of the current request, its permissions changed
+    """
+    context = _current_context.get()
+    if context is not None:
+        context.clear()
+
+
+class PermissionContextMiddleware:
+    """
+    Installs a permission context for the user of each request
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _current_context.set(PermissionContext(request.user))
+        try:
+            return self.get_response(request)
+        finally:
+            _current_context.reset(token)
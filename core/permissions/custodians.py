@@ -0,0 +1,118 @@
+"""
+Bulk assignment of the permissions local custodians get on their projects, datasets and contracts.
+"""
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+from typing import Iterable, List, Tuple, Type
+
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Model, Q
+from guardian.utils import get_user_obj_perms_model
+
+from core.constants import Permissions
+from core.permissions.context import clear_permission_context
+from core.permissions.effective import (
+    deferred_effective_permissions,
+    get_object_lookups,
+    refresh_effective_permissions,
+)
+
+CUSTODIAN_PERMISSIONS = [
+    Permissions.PROTECTED,
+    Permissions.ADMIN,
+    Permissions.DELETE,
+    Permissions.EDIT,
+]
+
+
+def get_custodian_permissions(model: Type[Model]) -> List[Permission]:
+    codenames = [
+        f"{perm.value}_{model._meta.model_name}" for perm in CUSTODIAN_PERMISSIONS
+    ]
+    return list(
+        Permission.objects.filter(
+            content_type=ContentType.objects.get_for_model(model),
+            codename__in=codenames,
+        )
+    )
+
+
+def _group_by_object(custodians: Iterable[Tuple[int, int]]):
+    user_ids_by_object = defaultdict(set)
+    for object_pk, user_id in custodians:
+        user_ids_by_object[object_pk].add(user_id)
+    return user_ids_by_object
+
+
+def assign_custodian_permissions(
+    model: Type[Model], custodians: Iterable[Tuple[int, int]], batch_size=500
+) -> int:
+    """
+    Gives the custodian permissions to the (object primary key, user id) pairs of `custodians`.
+    Only the missing rows are inserted, with one query to find the existing rows
+    and a bulk insert. Returns the number of permissions assigned.
+    """
+    user_ids_by_object = _group_by_object(custodians)
+    if not user_ids_by_object:
+        return 0
+    perms_model = get_user_obj_perms_model(model)
+    is_generic = perms_model.objects.is_generic()
+    object_field = "object_pk" if is_generic else "content_object_id"
+    permissions = get_custodian_permissions(model)
+    user_ids = set.union(*user_ids_by_object.values())
+
+    existing = set(
+        perms_model.objects.filter(
+            get_object_lookups(perms_model, model, user_ids_by_object),
+            user_id__in=user_ids,
+            permission__in=permissions,
+        ).values_list(object_field, "user_id", "permission_id")
+    )
+    content_type = ContentType.objects.get_for_model(model)
+    missing = []
+    for object_pk, object_user_ids in user_ids_by_object.items():
+        object_key = str(object_pk) if is_generic else object_pk
+        for user_id in object_user_ids:
+            for permission in permissions:
+                if (object_key, user_id, permission.pk) in existing:
+                    continue
+                row = perms_model(user_id=user_id, permission=permission)
+                if is_generic:
+                    row.content_type = content_type
+                    row.object_pk = object_key
+                else:
+                    row.content_object_id = object_pk
+                missing.append(row)
+
+    perms_model.objects.bulk_create(
+        missing, batch_size=batch_size, ignore_conflicts=True
+    )
+    if missing:
+        # bulk_create does not send post_save
+        clear_permission_context()
+        refresh_effective_permissions(model, user_ids_by_object)
+    return len(missing)
+
+
+def remove_custodian_permissions(
+    model: Type[Model], custodians: Iterable[Tuple[int, int]]
+) -> int:
+    """
+    Takes the custodian permissions back from the (object primary key, user id) pairs
+    of `custodians`, with a single delete. Returns the number of permissions removed.
+    """
+    user_ids_by_object = _group_by_object(custodians)
+    if not user_ids_by_object:
+        return 0
+    perms_model = get_user_obj_perms_model(model)
+    lookups = [
+        get_object_lookups(perms_model, model, [object_pk]) & Q(user_id__in=user_ids)
+        for object_pk, user_ids in user_ids_by_object.items()
+    ]
+    with deferred_effective_permissions():
+        deleted, _ = perms_model.objects.filter(
+            reduce(or_, lookups), permission__in=get_custodian_permissions(model)
+        ).delete()
+    return deleted
@@ -0,0 +1,226 @@
+"""
+Maintenance of the effective permissions table (see `EffectivePermission`).
+
+The rows of an object are recomputed from the guardian permissions whenever one of them
+changes, so reading who holds which permission on an object is a single indexed query.
+"""
+import threading
+
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterable, List, Set, Tuple, Type
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Model, Q
+from guardian.utils import get_group_obj_perms_model, get_user_obj_perms_model
+
+from core.models import Contract, Dataset, EffectivePermission, Project
+
+EFFECTIVE_PERMISSION_MODELS = (Project, Dataset, Contract)
+# entities which inherit the permissions of their project
+INHERITING_MODELS = (Dataset, Contract)
+
+SOURCES = EffectivePermission.SOURCES
+
+_deferred = threading.local()
+
+
+def get_object_lookups(perms_model, model: Type[Model], object_pks: Iterable) -> Q:
+    """
+    Returns the lookup of the object permission rows of the objects,
+    in the direct foreign key table of the model or in the generic one of guardian
+    """
+    if perms_model.objects.is_generic():
+        return Q(
+            content_type=ContentType.objects.get_for_model(model),
+            object_pk__in=[str(pk) for pk in object_pks],
+        )
+    return Q(content_object_id__in=list(object_pks))
+
+
+def get_permission_holders(
+    model: Type[Model], object_pks: Iterable
+) -> List[Tuple[int, int, str, str]]:
+    """
+    Returns the (object pk, user id, codename, source) of the permissions held on the objects,
+    directly or through a group
+    """
+    holders = []
+    for perms_model, user_field, source in [
+        (get_user_obj_perms_model(model), "user", SOURCES.direct),
+        (get_group_obj_perms_model(model), "group__user", SOURCES.group),
+    ]:
+        object_field = (
+            "object_pk" if perms_model.objects.is_generic() else "content_object_id"
+        )
+        rows = perms_model.objects.filter(
+            get_object_lookups(perms_model, model, object_pks),
+            **{f"{user_field}__isnull": False},
+        ).values_list(object_field, user_field, "permission__codename")
+        holders.extend(
+            (int(object_pk), user_id, codename, source)
+            for object_pk, user_id, codename in rows
+        )
+    return holders
+
+
+def compute_effective_permissions(
+    model: Type[Model], object_pks: Iterable
+) -> Set[Tuple[int, int, str, str]]:
+    object_pks = list(object_pks)
+    permissions = set(get_permission_holders(model, object_pks))
+    if model in INHERITING_MODELS:
+        # as the checkers, <perm>_dataset is inherited from <perm>_project
+        object_pks_by_project = defaultdict(list)
+        for object_pk, project_id in model.objects.filter(
+            pk__in=object_pks, project__isnull=False
+        ).values_list("pk", "project_id"):
+            object_pks_by_project[project_id].append(object_pk)
+        model_name = model._meta.model_name
+        for project_pk, user_id, codename, _ in get_permission_holders(
+            Project, object_pks_by_project
+        ):
+            for object_pk in object_pks_by_project[project_pk]:
+                permissions.add(
+                    (
+                        object_pk,
+                        user_id,
+                        codename.replace("project", model_name),
+                        SOURCES.inherited,
+                    )
+                )
+    return permissions
+
+
+def _refresh(model: Type[Model], object_pks: Set, with_inheriting=True):
+    content_type = ContentType.objects.get_for_model(model)
+    rows = [
+        EffectivePermission(
+            content_type=content_type,
+            object_id=object_pk,
+            user_id=user_id,
+            codename=codename,
+            source=source,
+        )
+        for object_pk, user_id, codename, source in compute_effective_permissions(
+            model, object_pks
+        )
+    ]
+    EffectivePermission.objects.filter(
+        content_type=content_type, object_id__in=object_pks
+    ).delete()
+    EffectivePermission.objects.bulk_create(rows, batch_size=1000)
+    if model is Project and with_inheriting:
+        for inheriting_model in INHERITING_MODELS:
+            inheriting_pks = inheriting_model.objects.filter(
+                project_id__in=object_pks
+            ).values_list("pk", flat=True)
+            _refresh(inheriting_model, set(inheriting_pks))
+
+
+def refresh_effective_permissions(model: Type[Model], object_pks: Iterable):
+    """
+    Recomputes the effective permissions on the objects (and on the entities inheriting from them),
+    at the end of the `deferred_effective_permissions` block if one is open
+    """
+    if model not in EFFECTIVE_PERMISSION_MODELS:
+        return
+    object_pks = set(object_pks)
+    if not object_pks:
+        return
+    pending = getattr(_deferred, "pending", None)
+    if pending is not None:
+        pending[model].update(object_pks)
+        return
+    _refresh(model, object_pks)
+
+
+@contextmanager
+def deferred_effective_permissions():
+    """
+    Collects the objects whose permissions change in the block,
+    their effective permissions are recomputed once when it exits
+    """
+    if getattr(_deferred, "pending", None) is not None:
+        # nested block, the outer one refreshes
+        yield
+        return
+    _deferred.pending = defaultdict(set)
+    try:
+        yield
+        pending = _deferred.pending
+    finally:
+        _deferred.pending = None
+    for model, object_pks in pending.items():
+        _refresh(model, object_pks)
+
+
+def permission_row_changed(row: Model):
+    """
+    Refreshes the object of a guardian object permission row which was saved or deleted
+    """
+    if hasattr(row, "object_pk"):
+        model = ContentType.objects.get_for_id(row.content_type_id).model_class()
+        if model in EFFECTIVE_PERMISSION_MODELS:
+            refresh_effective_permissions(model, [int(row.object_pk)])
+    else:
+        model = row._meta.get_field("content_object").related_model
+        refresh_effective_permissions(model, [row.content_object_id])
+
+
+def groups_changed(group_ids: Iterable[int]):
+    """
+    Refreshes the objects on which the groups hold permissions, their members changed
+    """
+    group_ids = list(group_ids)
+    for model in EFFECTIVE_PERMISSION_MODELS:
+        perms_model = get_group_obj_perms_model(model)
+        if perms_model.objects.is_generic():
+            object_pks = perms_model.objects.filter(
+                content_type=ContentType.objects.get_for_model(model),
+                group_id__in=group_ids,
+            ).values_list("object_pk", flat=True)
+        else:
+            object_pks = perms_model.objects.filter(group_id__in=group_ids).values_list(
+                "content_object_id", flat=True
+            )
+        refresh_effective_permissions(model, {int(pk) for pk in object_pks})
+
+
+def user_groups_cleared(user_id: int):
+    """
+    Refreshes the objects on which the user held permissions through its groups
+    """
+    group_permissions = EffectivePermission.objects.filter(
+        user_id=user_id, source__in=[SOURCES.group, SOURCES.inherited]
+    ).values_list("content_type_id", "object_id")
+    object_pks_by_model = defaultdict(set)
+    for content_type_id, object_id in group_permissions:
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        object_pks_by_model[model].add(object_id)
+    for model, object_pks in object_pks_by_model.items():
+        refresh_effective_permissions(model, object_pks)
+
+
+def forget_effective_permissions(obj: Model):
+    EffectivePermission.objects.for_object(obj).delete()
+
+
+def rebuild_effective_permissions(batch_size=500) -> int:
+    """
+    Recomputes the whole table, e.g. after permissions were changed without signals.
+    Returns the number of effective permissions.
+    """
+    for model in EFFECTIVE_PERMISSION_MODELS:
+        content_type = ContentType.objects.get_for_model(model)
+        EffectivePermission.objects.filter(content_type=content_type).exclude(
+            object_id__in=model.objects.values("pk")
+        ).delete()
+        object_pks = list(model.objects.order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(object_pks), batch_size):
+            _refresh(
+                model,
+                set(object_pks[start : start + batch_size]),
+                with_inheriting=False,
+            )
+    return EffectivePermission.objects.count()
@@ -0,0 +1,55 @@
+"""
+Permission filtering done by the database, following the same rules as the checkers.
+"""
+from typing import Union, TYPE_CHECKING
+
+from django.db.models import Q, QuerySet
+from guardian.shortcuts import get_objects_for_user
+
+from core.constants import Permissions
+
+if TYPE_CHECKING:
+    from core.models.user import User
+
+
+def get_permission_value(perm: Union[Permissions, str]) -> str:
+    """
+    Returns the codename prefix of the permission,
+    given as a `Permissions` member, its name (e.g. "edit") or its value (e.g. "change").
+    """
+    if isinstance(perm, Permissions):
+        return perm.value
+    if perm.upper() in Permissions.__members__:
+        return Permissions[perm.upper()].value
+    return Permissions(perm).value
+
+
+class PermissionQuerySetMixin:
+    """
+    Adds `with_perm` to the querysets of the entities protected by object permissions.
+    """
+
+    def with_perm(
+        self: QuerySet, user: "User", perm: Union[Permissions, str]
+    ) -> QuerySet:
+        """
+        Narrows the queryset to the entities on which `user` has the permission `perm`,
+        globally, on the entity itself or on the entity it inherits its permissions from.
+        The queryset stays lazy, the permissions are resolved with subqueries.
+        """
+        if not user.is_active:
+            return self.none()
+        return self.filter(self.get_perm_filter(user, get_permission_value(perm)))
+
+    def get_perm_filter(self: QuerySet, user: "User", perm_value: str) -> Q:
+        """
+        Returns the lookup of the entities on which `user` has the permission,
+        globally or on the entity itself. Overridden to add the inherited permissions.
+        """
+        codename = f"{perm_value}_{self.model._meta.model_name}"
+        if user.has_perm(f"{self.model._meta.app_label}.{codename}"):
+            return Q()
+        objects = get_objects_for_user(
+            user, codename, klass=self.model, accept_global_perms=False
+        )
+        return Q(pk__in=objects.values("pk"))
@@ -0,0 +1,551 @@
+"""
+Backends of the faceted search of the list pages (see `web.views.facet_view_utils`).
+
+`SolrSearchBackend` searches the haystack index. `OrmSearchBackend` runs the same searches
+as database queries: the facet counts are grouped aggregates and the full text search matches
+the fields rendered by the index templates. It needs no search server, for the small deployments
+and the environments without Solr. The backend is chosen by the SEARCH_BACKEND setting.
+"""
+import re
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    Exists,
+    F,
+    Model,
+    OuterRef,
+    Q,
+    QuerySet,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Concat, ExtractYear, Lower, NullIf
+from django.utils.module_loading import import_string
+from haystack import connections as haystack_connections
+from haystack.constants import DEFAULT_ALIAS
+from haystack.inputs import AutoQuery, Exact
+from haystack.query import SearchQuerySet
+
+from core.models import Document, Exposure
+from core.models.partner import GEO_CATEGORY, SECTOR_CATEGORY
+from core.utils import DaisyLogger
+
+log = DaisyLogger(__name__)
+
+# Number of objects fetched at once when iterating over all the results of an ORM search
+ORM_ITERATOR_BATCH_SIZE = 1000
+
+
+class SearchBackend:
+    """
+    Searches the objects of a model. The results of `search` behave as a `SearchQuerySet`:
+    they can be counted and sliced, `values(*fields)` turns them into dictionaries of stored
+    index fields and `facet_counts()` returns the counts of the facets requested.
+    """
+
+    # whether the facet counts can be cached until the model's index is updated
+    cache_facets = True
+
+    def search(
+        self,
+        model: Type[Model],
+        query: Optional[str],
+        filters: Dict[str, List[str]],
+        facets: Optional[Iterable[str]] = None,
+        order_by: Optional[str] = None,
+    ):
+        raise NotImplementedError
+
+    def search_pks(
+        self,
+        model: Type[Model],
+        query: Optional[str],
+        filters: Dict[str, List[str]],
+        order_by: Optional[str] = None,
+    ) -> List:
+        """
+        Returns the primary keys of all the objects matching the search, in the order of the results
+        """
+        raise NotImplementedError
+
+
+class SolrSearchBackend(SearchBackend):
+    """
+    Searches the haystack index
+    """
+
+    def search(self, model, query, filters, facets=None, order_by=None):
+        queryset = SearchQuerySet().models(model)
+        # filter by facets filters
+        for key, values in filters.items():
+            tmp = None
+            if isinstance(values, (list, tuple)):
+                # objects having all the values of a repeated key
+                for value in values:
+                    if tmp is None:
+                        tmp = Q(**{key: Exact(value)})
+                    else:
+                        tmp &= Q(**{key: Exact(value)})
+            else:
+                # only one value, no need to loop.
+                tmp = Q(**{key: Exact(values)})
+            queryset = queryset.filter(tmp)
+
+        # execute the query
+        if query:
+            queryset = queryset.filter(content=AutoQuery(query))
+        # get facets
+        if facets:
+            for field in facets:
+                queryset = queryset.facet(field)
+        # apply order_by if any
+        if order_by:
+            queryset = queryset.order_by(order_by)
+        return queryset
+
+    def search_pks(self, model, query, filters, order_by=None):
+        results = self.search(model, query, filters, order_by=order_by).values_list(
+            "pk", flat=True
+        )
+        # the hit count costs a one row request, then all the pks are fetched
+        # in a single request returning only the identifiers of the documents
+        count = results.count()
+        if not count:
+            return []
+        return [model._meta.pk.to_python(pk) for pk in results[0:count]]
+
+
+def to_bool(value: str) -> bool:
+    return value == "true"
+
+
+def format_facet_value(value) -> str:
+    """
+    Formats a value as Solr returns it in the facet counts
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def contact_name(prefix: str, with_type: bool = False):
+    """
+    The names of the contacts at the end of the `prefix` lookup, as they are indexed
+    (`str(contact)` with their type), NULL for the objects without contacts
+    """
+    parts = [f"{prefix}__first_name", Value(" "), f"{prefix}__last_name"]
+    if with_type:
+        parts += [Value(" ("), f"{prefix}__type__name", Value(")")]
+    # the NULL columns of the missing contacts are concatenated as empty strings
+    missing = "".join(part.value for part in parts if isinstance(part, Value))
+    return NullIf(Concat(*parts, output_field=CharField()), Value(missing))
+
+
+def project_name(prefix: str):
+    """
+    The name of the project at the end of the `prefix` lookup, as `str(project)`
+    """
+    return Case(
+        When(**{f"{prefix}__isnull": True}, then=Value(None)),
+        default=Coalesce(
+            NullIf(F(f"{prefix}__acronym"), Value("")),
+            NullIf(F(f"{prefix}__title"), Value("")),
+            Value("undefined"),
+        ),
+        output_field=CharField(),
+    )
+
+
+def choice_display(field_name: str, choices):
+    return Case(
+        *[When(**{field_name: key}, then=Value(label)) for key, label in choices],
+        output_field=CharField(),
+    )
+
+
+class OrmSearchField:
+    """
+    An index field computed by the database: the values of its lookups (or expressions),
+    converted from the filters' strings by `to_python`. The objects without any value
+    have `empty_value`, if any, as the index does.
+    """
+
+    def __init__(self, *sources, to_python=str, empty_value: Optional[str] = None):
+        self.sources = sources
+        self.to_python = to_python
+        self.empty_value = empty_value
+
+    def get_expressions(self):
+        return [
+            F(source) if isinstance(source, str) else source for source in self.sources
+        ]
+
+
+class OrmSearchDefinition:
+    """
+    How the index of a model is searched in the database: the lookups matched by the full text
+    search, those of the index template, and the fields which can be filtered and faceted
+    """
+
+    def __init__(self, text: List[str], fields: Dict[str, OrmSearchField]):
+        self.text = text
+        self.fields = fields
+
+    def get_text_q(self, term: str) -> Q:
+        q = Q()
+        for lookup in self.text:
+            q |= Q(**{f"{lookup}__icontains": term})
+        return q
+
+    def get_value_pks(self, queryset: QuerySet, field_name: str, value=None):
+        """
+        Returns, as subqueries, the primary keys of the objects of the queryset
+        whose field has the value (any value if None)
+        """
+        subqueries = []
+        for expression in self.fields[field_name].get_expressions():
+            with_values = queryset.annotate(_value=expression)
+            if value is None:
+                with_values = with_values.filter(_value__isnull=False)
+            else:
+                with_values = with_values.filter(_value=value)
+            subqueries.append(with_values.values("pk"))
+        return subqueries
+
+    def get_filter_q(self, model: Type[Model], field_name: str, value: str) -> Q:
+        field = self.fields.get(field_name)
+        if field is None:
+            # as Solr, matches nothing
+            return Q(pk__in=[])
+        if field.empty_value is not None and value == field.empty_value:
+            q = Q()
+            for pks in self.get_value_pks(model.objects.all(), field_name):
+                q &= ~Q(pk__in=pks)
+            return q
+        try:
+            value = field.to_python(value)
+        except ValueError:
+            return Q(pk__in=[])
+        q = Q(pk__in=[])
+        for pks in self.get_value_pks(model.objects.all(), field_name, value):
+            q |= Q(pk__in=pks)
+        return q
+
+    def count_facet(self, queryset: QuerySet, field_name: str) -> List[Tuple[str, int]]:
+        """
+        Returns the values of the field and their number of objects, by decreasing count
+        """
+        field = self.fields[field_name]
+        matches = queryset.model.objects.filter(pk__in=queryset.values("pk"))
+        expressions = field.get_expressions()
+        counts = Counter()
+        if len(expressions) == 1:
+            rows = (
+                matches.annotate(_value=expressions[0])
+                .values("_value")
+                .annotate(_count=Count("pk", distinct=True))
+                .order_by()
+            )
+            for row in rows:
+                counts[row["_value"]] += row["_count"]
+        else:
+            # an object counts once for a value, whichever lookup yields it
+            pairs = set()
+            for expression in expressions:
+                pairs.update(
+                    matches.annotate(_value=expression)
+                    .values_list("_value", "pk")
+                    .distinct()
+                )
+            counts.update(value for value, _ in pairs)
+        counts.pop(None, None)
+        if field.empty_value is not None:
+            for pks in self.get_value_pks(matches, field_name):
+                matches = matches.exclude(pk__in=pks)
+            empty = matches.count()
+            if empty:
+                counts[field.empty_value] += empty
+        facet_counts = [
+            (format_facet_value(value), count) for value, count in counts.items()
+        ]
+        return sorted(facet_counts, key=lambda item: (-item[1], item[0]))
+
+
+ORM_SEARCH_DEFINITIONS = {
+    "core.Cohort": OrmSearchDefinition(
+        text=[
+            "title",
+            "comments",
+            "owners__first_name",
+            "owners__last_name",
+            "institutes__name",
+        ],
+        fields={
+            "owners": OrmSearchField(contact_name("owners", with_type=True)),
+            "institutes": OrmSearchField("institutes__name"),
+            "ethics_confirmation": OrmSearchField(
+                "ethics_confirmation", to_python=to_bool
+            ),
+        },
+    ),
+    "core.Contact": OrmSearchDefinition(
+        text=["first_name", "last_name", "type__name", "partners__name"],
+        fields={
+            "type": OrmSearchField("type__name"),
+            "partners": OrmSearchField("partners__name"),
+        },
+    ),
+    "core.Contract": OrmSearchDefinition(
+        text=[
+            "project__acronym",
+            "project__title",
+            "data_declarations__title",
+            "local_custodians__full_name",
+            "partners_roles__partner__name",
+            "partners_roles__roles__display_name",
+            "partners_roles__contacts__first_name",
+            "partners_roles__contacts__last_name",
+        ],
+        fields={
+            "contacts": OrmSearchField(
+                contact_name("partners_roles__contacts"),
+                empty_value="no collaborator",
+            ),
+            "partners": OrmSearchField("partners_roles__partner__name"),
+            "project": OrmSearchField(project_name("project")),
+            "has_legal_documents": OrmSearchField(
+                Exists(Document.objects.filter(contracts=OuterRef("pk"))),
+                to_python=to_bool,
+            ),
+        },
+    ),
+    "core.Dataset": OrmSearchDefinition(
+        text=[
+            "title",
+            "unique_id",
+            "data_declarations__data_types_generated__name",
+            "data_declarations__data_types_received__name",
+            "local_custodians__full_name",
+            "other_external_id",
+            "project__acronym",
+            "project__title",
+        ],
+        fields={
+            "local_custodians": OrmSearchField("local_custodians__full_name"),
+            "data_types": OrmSearchField(
+                "data_declarations__data_types_generated__name",
+                "data_declarations__data_types_received__name",
+            ),
+            "is_published": OrmSearchField(
+                Exists(Exposure.objects.filter(dataset=OuterRef("pk"))),
+                to_python=to_bool,
+            ),
+        },
+    ),
+    "core.Partner": OrmSearchDefinition(
+        text=["acronym", "name", "address"],
+        fields={
+            "geo_category": OrmSearchField(
+                choice_display("geo_category", GEO_CATEGORY)
+            ),
+            "sector_category": OrmSearchField(
+                choice_display("sector_category", SECTOR_CATEGORY)
+            ),
+            "is_clinical": OrmSearchField("is_clinical", to_python=to_bool),
+        },
+    ),
+    "core.Project": OrmSearchDefinition(
+        text=[
+            "acronym",
+            "description",
+            "title",
+            "local_custodians__full_name",
+            "publications__citation",
+            "funding_sources__name",
+            "study_terms__label",
+            "disease_terms__label",
+            "phenotype_terms__label",
+            "gene_terms__label",
+            "contacts__first_name",
+            "contacts__last_name",
+            "company_personnel__full_name",
+        ],
+        fields={
+            "local_custodians": OrmSearchField("local_custodians__full_name"),
+            "start_year": OrmSearchField(ExtractYear("start_date"), to_python=int),
+            "end_year": OrmSearchField(ExtractYear("end_date"), to_python=int),
+            "disease_terms": OrmSearchField("disease_terms__label"),
+            "study_terms": OrmSearchField("study_terms__label"),
+            "phenotype_terms": OrmSearchField("phenotype_terms__label"),
+            "gene_terms": OrmSearchField("gene_terms__label"),
+            "has_cner": OrmSearchField("has_cner", to_python=to_bool),
+            "has_erp": OrmSearchField("has_erp", to_python=to_bool),
+            "has_legal_documents": OrmSearchField(
+                Exists(Document.objects.filter(projects=OuterRef("pk"))),
+                to_python=to_bool,
+            ),
+            "funding_sources": OrmSearchField("funding_sources__name"),
+            "company_personnel": OrmSearchField("company_personnel__full_name"),
+            "contacts": OrmSearchField(contact_name("contacts", with_type=True)),
+        },
+    ),
+}
+
+
+def parse_query(query: str) -> List[Tuple[str, bool]]:
+    """
+    Splits the user query as `AutoQuery` does: returns the words and "quoted phrases",
+    with whether they are excluded (prefixed with `-`)
+    """
+    terms = []
+    for excluded, phrase, word in re.findall(r'(-?)(?:"([^"]+)"|(\S+))', query):
+        term = (phrase or word).strip()
+        if term:
+            terms.append((term, excluded == "-"))
+    return terms
+
+
+def get_stored_value(index, obj: Model, field_name: str):
+    """
+    Returns the value of the index field as it is stored for the object
+    """
+    if field_name == "pk":
+        return obj.pk
+    field = index.fields[field_name]
+    prepare = getattr(index, f"prepare_{field_name}", None)
+    return field.convert(prepare(obj) if prepare else field.prepare(obj))
+
+
+class OrmSearchResults:
+    """
+    The objects matched by `OrmSearchBackend`, with the part of the `SearchQuerySet` interface
+    used by the list pages. After `values(*fields)`, each result is the dictionary
+    of the stored index fields, prepared by the model's index from the objects of the slice only.
+    """
+
+    def __init__(self, definition, index, queryset, facets, fields=None):
+        self.definition = definition
+        self.index = index
+        self.queryset = queryset
+        self.facets = facets
+        self.fields = fields
+        self._count = None
+        self._slices = {}
+
+    def values(self, *fields):
+        return OrmSearchResults(
+            self.definition, self.index, self.queryset, self.facets, fields
+        )
+
+    def count(self) -> int:
+        if self._count is None:
+            self._count = self.queryset.count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        for start in range(0, self.count(), ORM_ITERATOR_BATCH_SIZE):
+            yield from self[start : start + ORM_ITERATOR_BATCH_SIZE]
+
+    def __getitem__(self, k):
+        if isinstance(k, int):
+            return self[k : k + 1][0]
+        key = (k.start, k.stop)
+        if key not in self._slices:
+            objects = list(self.queryset[k])
+            if self.fields is not None:
+                objects = [
+                    {
+                        field: get_stored_value(self.index, obj, field)
+                        for field in self.fields
+                    }
+                    for obj in objects
+                ]
+            self._slices[key] = objects
+        return self._slices[key]
+
+    def facet_counts(self) -> Dict:
+        return {
+            "fields": {
+                field_name: self.definition.count_facet(self.queryset, field_name)
+                for field_name in self.facets
+                if field_name in self.definition.fields
+            }
+        }
+
+
+class OrmSearchBackend(SearchBackend):
+    """
+    Searches the database (see `ORM_SEARCH_DEFINITIONS`). The results are sorted
+    by one of the model's own fields (lowercased for the `<field>_l` index fields),
+    the facet counts are always current, so they are not cached.
+    """
+
+    cache_facets = False
+
+    def search(self, model, query, filters, facets=None, order_by=None):
+        try:
+            definition = ORM_SEARCH_DEFINITIONS[model._meta.label]
+        except KeyError:
+            raise ValueError(f"{model._meta.label} cannot be searched in the database")
+
+        matches = model.objects.all()
+        for key, values in filters.items():
+            if not isinstance(values, (list, tuple)):
+                values = [values]
+            for value in values:
+                matches = matches.filter(definition.get_filter_q(model, key, value))
+        for term, excluded in parse_query(query or ""):
+            # by subqueries, the joins of the lookups would repeat the objects
+            term_pks = model.objects.filter(definition.get_text_q(term)).values("pk")
+            if excluded:
+                matches = matches.exclude(pk__in=term_pks)
+            else:
+                matches = matches.filter(pk__in=term_pks)
+
+        index = haystack_connections[DEFAULT_ALIAS].get_unified_index().get_index(model)
+        queryset = index.index_queryset().filter(pk__in=matches.values("pk"))
+        ordering = self.get_ordering(model, order_by)
+        queryset = queryset.order_by(*ordering, "pk")
+        return OrmSearchResults(definition, index, queryset, list(facets or []))
+
+    def search_pks(self, model, query, filters, order_by=None):
+        results = self.search(model, query, filters, order_by=order_by)
+        return list(
+            results.queryset.prefetch_related(None).values_list("pk", flat=True)
+        )
+
+    def get_ordering(self, model, order_by: Optional[str]) -> List:
+        if not order_by:
+            return []
+        field_name = order_by.lstrip("-")
+        lowercase = field_name.endswith("_l")
+        if lowercase:
+            field_name = field_name[:-2]
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            log.debug("search order ignored", order_by=order_by)
+            return []
+        if field.is_relation:
+            log.debug("search order ignored", order_by=order_by)
+            return []
+        expression = Lower(field_name) if lowercase else F(field_name)
+        if order_by.startswith("-"):
+            return [expression.desc()]
+        return [expression.asc()]
+
+
+def get_search_backend() -> SearchBackend:
+    return import_string(
+        getattr(settings, "SEARCH_BACKEND", "core.search_backends.SolrSearchBackend")
+    )()
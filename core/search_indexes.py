@@ -1,4 +1,5 @@
 from celery_haystack.indexes import CelerySearchIndex
+from django.db.models import Prefetch
 from haystack import indexes
 
 from core.models import (
@@ -9,7 +10,7 @@ from core.models import (
     Cohort,
     Contact,
     Partner,
-    GDPRRole,
+    PartnerRole,
 )
 
 
@@ -20,6 +21,16 @@ class DataDeclarationIndex(CelerySearchIndex, indexes.Indexable):
     def get_updated_field(self):
         return "updated"
 
+    def index_queryset(self, using=None):
+        return DataDeclaration.objects.select_related(
+            "dataset__project"
+        ).prefetch_related(
+            "cohorts",
+            "data_types_generated",
+            "data_types_received",
+            "dataset__local_custodians",
+        )
+
     text = indexes.CharField(document=True, use_template=True)
     pk = indexes.IntegerField(indexed=True, stored=True, faceted=True)
     cohorts = indexes.MultiValueField(indexed=True, stored=True, faceted=True)
@@ -54,7 +65,7 @@ class DataDeclarationIndex(CelerySearchIndex, indexes.Indexable):
         text_parts = [
             obj.title,
             str(obj.dataset),
-            " ".join([str(c for c in obj.cohorts.all())]),
+            " ".join([str(c) for c in obj.cohorts.all()]),
             " ".join([str(l) for l in obj.dataset.local_custodians.all()]),
         ]
         if obj.dataset.project:
@@ -96,6 +107,12 @@ class CohortIndex(CelerySearchIndex, indexes.Indexable):
     def get_updated_field(self):
         return "updated"
 
+    def index_queryset(self, using=None):
+        return Cohort.objects.prefetch_related(
+            Prefetch("owners", queryset=Contact.objects.select_related("type")),
+            "institutes",
+        )
+
     text = indexes.CharField(document=True, use_template=True)
     pk = indexes.IntegerField(indexed=True, stored=True, faceted=True)
     owners = indexes.MultiValueField(indexed=True, stored=True, faceted=True)
@@ -125,6 +142,14 @@ class DatasetIndex(CelerySearchIndex, indexes.Indexable):
     def get_model(self):
         return Dataset
 
+    def index_queryset(self, using=None):
+        return Dataset.objects.select_related("project").prefetch_related(
+            "local_custodians",
+            "exposures",
+            "data_declarations__data_types_generated",
+            "data_declarations__data_types_received",
+        )
+
     # needed
     text = indexes.CharField(document=True, use_template=True)
 
@@ -145,6 +170,14 @@ class DatasetIndex(CelerySearchIndex, indexes.Indexable):
 
     unique_id = indexes.CharField(indexed=True, stored=True, faceted=True)
 
+    autocomplete = indexes.EdgeNgramField()
+
+    def prepare_autocomplete(self, obj):
+        text_parts = [obj.title]
+        if obj.project:
+            text_parts.append(str(obj.project))
+        return " ".join(text_parts)
+
     def prepare_title(self, obj):
         return obj.title
 
@@ -178,6 +211,18 @@ class ContractIndex(CelerySearchIndex, indexes.Indexable):
     def get_updated_field(self):
         return "updated"
 
+    def index_queryset(self, using=None):
+        partners_roles = PartnerRole.objects.select_related("partner").prefetch_related(
+            "roles",
+            Prefetch("contacts", queryset=Contact.objects.select_related("type")),
+        )
+        return Contract.objects.select_related("project").prefetch_related(
+            "local_custodians",
+            "data_declarations",
+            "legal_documents",
+            Prefetch("partners_roles", queryset=partners_roles),
+        )
+
     # needed
     text = indexes.CharField(document=True, use_template=True)
 
@@ -197,12 +242,25 @@ class ContractIndex(CelerySearchIndex, indexes.Indexable):
 
     data_declarations = indexes.MultiValueField(indexed=True, stored=True, faceted=True)
 
+    title = indexes.CharField(indexed=True, stored=True)
+
+    autocomplete = indexes.EdgeNgramField()
+
+    def prepare_title(self, obj):
+        return str(obj)
+
+    def prepare_autocomplete(self, obj):
+        return self.prepare_title(obj)
+
     def prepare_local_custodians(self, obj):
         return [u.full_name for u in obj.local_custodians.all()]
 
     def prepare_partners_roles(self, obj):
-        roles = GDPRRole.objects.filter(partners_roles__contract=obj).distinct()
-        return [str(r) for r in roles]
+        roles = {}
+        for partner_role in obj.partners_roles.all():
+            for role in partner_role.roles.all():
+                roles[role.pk] = role
+        return [str(r) for r in roles.values()]
 
     def prepare_contacts(self, obj):
         contacts = []
@@ -218,7 +276,7 @@ class ContractIndex(CelerySearchIndex, indexes.Indexable):
         return [p.partner.name for p in obj.partners_roles.all()]
 
     def prepare_has_legal_documents(self, obj):
-        return obj.legal_documents.exists()
+        return len(obj.legal_documents.all()) > 0
 
     def prepare_project(self, obj):
         try:
@@ -250,6 +308,14 @@ class PartnerIndex(CelerySearchIndex, indexes.Indexable):
     is_clinical = indexes.BooleanField(indexed=True, stored=True, faceted=True)
     geo_category = indexes.CharField(indexed=True, stored=True, faceted=True)
     sector_category = indexes.CharField(indexed=True, stored=True, faceted=True)
+    title = indexes.CharField(indexed=True, stored=True)
+    autocomplete = indexes.EdgeNgramField()
+
+    def prepare_title(self, obj):
+        return obj.name
+
+    def prepare_autocomplete(self, obj):
+        return " ".join(part for part in [obj.name, obj.acronym] if part)
 
     def prepare_name(self, obj):
         return obj.name
@@ -289,6 +355,9 @@ class ContactIndex(CelerySearchIndex, indexes.Indexable):
     def get_updated_field(self):
         return "updated"
 
+    def index_queryset(self, using=None):
+        return Contact.objects.select_related("type").prefetch_related("partners")
+
     # needed
     text = indexes.CharField(document=True, use_template=True)
 
@@ -302,6 +371,16 @@ class ContactIndex(CelerySearchIndex, indexes.Indexable):
 
     type = indexes.CharField(indexed=False, stored=True, faceted=True)
 
+    title = indexes.CharField(indexed=True, stored=True)
+
+    autocomplete = indexes.EdgeNgramField()
+
+    def prepare_title(self, obj):
+        return obj.full_name()
+
+    def prepare_autocomplete(self, obj):
+        return obj.full_name()
+
     def prepare_first_name(self, obj):
         return obj.first_name
 
@@ -330,6 +409,20 @@ class ProjectIndex(CelerySearchIndex, indexes.Indexable):
     def get_updated_field(self):
         return "updated"
 
+    def index_queryset(self, using=None):
+        return Project.objects.select_related("umbrella_project").prefetch_related(
+            Prefetch("contacts", queryset=Contact.objects.select_related("type")),
+            "company_personnel",
+            "funding_sources",
+            "publications",
+            "local_custodians",
+            "legal_documents",
+            "disease_terms",
+            "gene_terms",
+            "phenotype_terms",
+            "study_terms",
+        )
+
     # needed
     text = indexes.CharField(document=True, use_template=True)
     acronym = indexes.CharField(indexed=True, stored=True, faceted=True)
@@ -356,6 +449,10 @@ class ProjectIndex(CelerySearchIndex, indexes.Indexable):
     title = indexes.CharField(indexed=True, stored=True, faceted=True)
     title_l = indexes.CharField(indexed=False, stored=True)
     local_custodians = indexes.MultiValueField(indexed=True, stored=True, faceted=True)
+    autocomplete = indexes.EdgeNgramField()
+
+    def prepare_autocomplete(self, obj):
+        return " ".join(part for part in [obj.acronym, obj.title] if part)
 
     def prepare_acronym_l(self, obj):
         if obj.acronym:
@@ -381,7 +478,7 @@ class ProjectIndex(CelerySearchIndex, indexes.Indexable):
         return [str(o) for o in obj.local_custodians.all()]
 
     def prepare_has_legal_documents(self, obj):
-        return obj.legal_documents.exists()
+        return len(obj.legal_documents.all()) > 0
 
     def prepare_acronym(self, obj):
         return obj.acronym
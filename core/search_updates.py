@@ -0,0 +1,220 @@
+"""
+Coalescing of the search index updates.
+
+The indexed objects which are saved, deleted or whose custodians change are collected
+as (model, pk) pairs. Once the transaction commits (or the request ends), the pairs are sent
+deduplicated, as a single Celery task per index, so the search index is never updated inside the request.
+"""
+import threading
+
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+from typing import Dict, Iterable, Type
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import F, Model
+from django.db.models.signals import post_delete, post_save
+from haystack import connection_router, connections as haystack_connections
+from haystack.exceptions import NotHandled
+from haystack.signals import BaseSignalProcessor
+
+from core.models import SearchIndexGeneration
+from core.utils import DaisyLogger
+
+logger = DaisyLogger(__name__)
+
+_pending = threading.local()
+
+
+def get_indexes(model: Type[Model]):
+    """
+    Returns the (alias, backend, index) of the search connections which index the model
+    """
+    indexes = []
+    for using in connection_router.for_write(models=[model]):
+        try:
+            index = haystack_connections[using].get_unified_index().get_index(model)
+        except NotHandled:
+            continue
+        indexes.append((using, haystack_connections[using].get_backend(), index))
+    return indexes
+
+
+def is_indexed(model: Type[Model]) -> bool:
+    return len(get_indexes(model)) > 0
+
+
+def index_later(model: Type[Model], pks: Iterable):
+    """
+    Schedules the reindexing of the objects, once the transaction commits
+    or at the end of the `coalesced_index_updates` block if one is open
+    """
+    pks = {pk for pk in pks if pk is not None}
+    if not pks or not is_indexed(model):
+        return
+    if getattr(_pending, "pks", None) is None:
+        _pending.pks = defaultdict(set)
+    _pending.pks[model._meta.label].update(pks)
+    if not getattr(_pending, "deferred", False):
+        # the updates collected by a rolled back transaction are sent with the next commit,
+        # reindexing them is harmless
+        transaction.on_commit(flush_index_updates)
+
+
+def flush_index_updates():
+    """
+    Sends the collected updates, one task per index
+    """
+    from core.tasks import update_search_index
+
+    pending = getattr(_pending, "pks", None)
+    _pending.pks = None
+    if not pending:
+        return
+    for model_label, pks in pending.items():
+        try:
+            update_search_index.delay(model_label, sorted(pks))
+        except Exception as e:
+            logger.error(f"Could not schedule the reindexing of {model_label}: {e}")
+
+
+@contextmanager
+def coalesced_index_updates():
+    """
+    Collects the objects to reindex in the block, their updates are sent once when it exits
+    """
+    if getattr(_pending, "deferred", False):
+        # nested block, the outer one sends the updates
+        yield
+        return
+    _pending.deferred = True
+    try:
+        yield
+    finally:
+        _pending.deferred = False
+        transaction.on_commit(flush_index_updates)
+
+
+@contextmanager
+def deferred_indexing():
+    """
+    Suspends the search index signals for a bulk job, e.g. an import, and records the objects touched.
+    When it exits they are reindexed in this process, by batches, once the transaction commits.
+    """
+    signal_processor = django_apps.get_app_config("haystack").signal_processor
+    suspend = not isinstance(signal_processor, CoalescingSignalProcessor)
+    if suspend:
+        signal_processor.teardown()
+        recorder = CoalescingSignalProcessor(haystack_connections, connection_router)
+    previous_deferred = getattr(_pending, "deferred", False)
+    previous_pks = getattr(_pending, "pks", None)
+    _pending.deferred = True
+    _pending.pks = None
+    try:
+        yield
+    finally:
+        pending = _pending.pks or {}
+        _pending.deferred = previous_deferred
+        _pending.pks = previous_pks
+        if suspend:
+            recorder.teardown()
+            signal_processor.setup()
+        # also after a failure, the objects saved before it must be reindexed
+        transaction.on_commit(partial(reindex_objects, pending))
+
+
+def reindex_objects(pks_by_model_label: Dict[str, Iterable]):
+    for model_label, pks in pks_by_model_label.items():
+        update_index_objects(model_label, pks)
+
+
+def update_index_objects(model_label: str, pks: Iterable, batch_size=1000):
+    """
+    Reindexes the objects of the model, by batches, and removes from the index
+    the ones that no longer exist
+    """
+    model = django_apps.get_model(model_label)
+    pks = sorted(set(pks))
+    for using, backend, index in get_indexes(model):
+        for start in range(0, len(pks), batch_size):
+            batch_pks = pks[start : start + batch_size]
+            objects = list(index.index_queryset(using=using).filter(pk__in=batch_pks))
+            if objects:
+                backend.update(index, objects)
+            deleted_pks = set(batch_pks) - {obj.pk for obj in objects}
+            for pk in deleted_pks:
+                backend.remove(f"{model._meta.app_label}.{model._meta.model_name}.{pk}")
+    bump_index_generation(model_label)
+
+
+def get_index_generation(model: Type[Model]) -> int:
+    return (
+        SearchIndexGeneration.objects.filter(model_label=model._meta.label)
+        .values_list("generation", flat=True)
+        .first()
+        or 0
+    )
+
+
+def get_index_generations(models: Iterable[Type[Model]]) -> Dict[str, int]:
+    """
+    Returns the generation of the index of each model, in a single query
+    """
+    generations = {model._meta.label: 0 for model in models}
+    generations.update(
+        SearchIndexGeneration.objects.filter(
+            model_label__in=list(generations)
+        ).values_list("model_label", "generation")
+    )
+    return generations
+
+
+def bump_index_generation(model_label: str):
+    """
+    Marks the index of the model as updated, the results cached from it become stale
+    """
+    bumped = SearchIndexGeneration.objects.filter(model_label=model_label).update(
+        generation=F("generation") + 1
+    )
+    if not bumped:
+        _, created = SearchIndexGeneration.objects.get_or_create(
+            model_label=model_label, defaults={"generation": 1}
+        )
+        if not created:
+            # created concurrently
+            bump_index_generation(model_label)
+
+
+class SearchIndexUpdateMiddleware:
+    """
+    Sends the search index updates of each request once, when it ends
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with coalesced_index_updates():
+            return self.get_response(request)
+
+
+class CoalescingSignalProcessor(BaseSignalProcessor):
+    """
+    Reindexes the saved and deleted objects through `index_later`
+    """
+
+    def setup(self):
+        post_save.connect(self.handle_save)
+        post_delete.connect(self.handle_delete)
+
+    def teardown(self):
+        post_save.disconnect(self.handle_save)
+        post_delete.disconnect(self.handle_delete)
+
+    def handle_save(self, sender, instance, **kwargs):
+        index_later(sender, [instance.pk])
+
+    def handle_delete(self, sender, instance, **kwargs):
+        index_later(sender, [instance.pk])
@@ -1,16 +1,27 @@
-from datetime import date
+from datetime import date, timedelta
 from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from core.entitlements import purge_revoked_entitlements
+from core.importer.export_snapshots import (
+    deferred_export_snapshots,
+    rebuild_stale_export_snapshots,
+)
 from core.models.access import Access
 from core.lcsb.rems import synchronizer
+from core.search_updates import update_index_objects
 
 
 @shared_task
 def check_accesses_expiration():
     """
-    Task to expire accesses with a passed `grant_expiration_date` value
+    Task to expire accesses with a passed `grant_expiration_date` value,
+    and to forget the entitlements revoked long ago
     """
     upper_date = date.today()
     Access.expire_accesses(upper_date)
+    retention = getattr(settings, "REVOKED_ENTITLEMENTS_RETENTION_DAYS", 30)
+    purge_revoked_entitlements(timezone.now() - timedelta(days=retention))
 
 
 @shared_task
@@ -18,4 +29,21 @@ def run_synchronizer():
     """
     Task to synchronize users and contacts with the external system
     """
-    synchronizer.synchronize_all()
+    with deferred_export_snapshots():
+        synchronizer.synchronize_all()
+
+
+@shared_task
+def rebuild_export_snapshots():
+    """
+    Task to re-render the export snapshots invalidated by changes of the exported entities
+    """
+    rebuild_stale_export_snapshots()
+
+
+@shared_task
+def update_search_index(model_label, pks):
+    """
+    Task to reindex the objects of a model, and to remove the deleted ones from the index
+    """
+    update_index_objects(model_label, pks)
@@ -2,7 +2,21 @@ import json
 import pytest
 from io import StringIO
 
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.importer.base_exporter import NDJSON_FORMAT
+from core.importer.contracts_exporter import ContractsExporter
 from core.importer.datasets_exporter import DatasetsExporter
+from core.importer.export_snapshots import (
+    REBUILD_SCHEDULED_CACHE_KEY,
+    claim_export_snapshot_rebuild,
+    deferred_export_snapshots,
+    get_export_snapshot,
+    invalidate_export_snapshots,
+)
 from core.importer.partners_exporter import PartnersExporter
 from core.importer.projects_exporter import ProjectsExporter
 from core.importer.JSONSchemaValidator import (
@@ -10,6 +24,7 @@ from core.importer.JSONSchemaValidator import (
     DatasetJSONSchemaValidator,
     InstitutionJSONSchemaValidator,
 )
+from core.models import Contract, Dataset, ExportSnapshot, GDPRRole
 from test import factories
 
 
@@ -128,3 +143,227 @@ def test_export_datasets(
 
     schema = DatasetJSONSchemaValidator()
     assert schema.validate_items(dataset_dicts)
+
+
+@pytest.mark.django_db
+def test_export_stream_in_chunks(
+    celery_session_worker,
+    contact_types,
+    partners,
+    gdpr_roles,
+    storage_resources,
+    can_defer_constraint_checks,
+):
+    for i in range(5):
+        factories.ProjectFactory.create(acronym=f"PRJ_{i}", title=f"Project {i}")
+
+    exp = ProjectsExporter(include_unpublished=True, chunk_size=2)
+    assert 3 == len(list(exp.iter_chunks()))
+
+    parts = list(exp.stream())
+    # envelope, one part per project, closing brackets
+    assert 7 == len(parts)
+    document = json.loads("".join(parts))
+    assert exp.json_schema_uri == document["$schema"]
+    assert [f"PRJ_{i}" for i in range(5)] == [p["acronym"] for p in document["items"]]
+
+
+@pytest.mark.django_db
+def test_export_shards(
+    celery_session_worker,
+    contact_types,
+    partners,
+    gdpr_roles,
+    storage_resources,
+    can_defer_constraint_checks,
+):
+    for i in range(5):
+        factories.ProjectFactory.create(acronym=f"PRJ_{i}", title=f"Project {i}")
+
+    exp = ProjectsExporter(include_unpublished=True)
+    pk_ranges = exp.get_pk_ranges(2)
+    assert [2, 2, 1] == [
+        len(exp.get_queryset().filter(pk__gte=first, pk__lte=last))
+        for first, last in pk_ranges
+    ]
+
+    shard_lines = []
+    for pk_range in pk_ranges:
+        exp.set_pk_range(*pk_range)
+        shard_lines.extend(line.rstrip("\n") for line in exp.stream_ndjson())
+    document = json.loads("".join(exp.stream_document(shard_lines)))
+    assert exp.json_schema_uri == document["$schema"]
+    assert [f"PRJ_{i}" for i in range(5)] == [p["acronym"] for p in document["items"]]
+
+
+@pytest.mark.parametrize(
+    "options", [{"workers": 0}, {"shard_size": 0}, {"workers": 0, "keep_shards": True}]
+)
+def test_export_shards_invalid_options(options, tmp_path):
+    with pytest.raises(CommandError):
+        call_command("export_datasets", file=str(tmp_path / "datasets.json"), **options)
+
+
+@pytest.mark.django_db
+def test_export_ndjson(
+    celery_session_worker,
+    contact_types,
+    partners,
+    gdpr_roles,
+    storage_resources,
+    can_defer_constraint_checks,
+):
+    for i in range(3):
+        factories.ProjectFactory.create(acronym=f"PRJ_{i}", title=f"Project {i}")
+
+    exp = ProjectsExporter(include_unpublished=True)
+    buffer = exp.export_to_buffer(StringIO(), output_format=NDJSON_FORMAT)
+    lines = buffer.getvalue().splitlines()
+    assert 4 == len(lines)
+    assert {"$schema": exp.json_schema_uri} == json.loads(lines[0])
+    assert [f"PRJ_{i}" for i in range(3)] == [
+        json.loads(line)["acronym"] for line in lines[1:]
+    ]
+
+
+@pytest.mark.django_db
+def test_export_datasets_in_fixed_number_of_queries(
+    celery_session_worker,
+    contact_types,
+    partners,
+    gdpr_roles,
+    storage_resources,
+    can_defer_constraint_checks,
+):
+    VIP = factories.VIPGroup()
+    rebecca = factories.UserFactory.create(
+        first_name="Rebecca", last_name="Kafe", groups=[VIP]
+    )
+    embury = factories.UserFactory.create(first_name="Embury", last_name="Bask")
+
+    def count_export_queries():
+        exp = DatasetsExporter(include_unpublished=True)
+        with CaptureQueriesContext(connection) as context:
+            dataset_dicts = export_entities(exp)
+        return len(context.captured_queries), dataset_dicts
+
+    dataset = factories.DatasetFactory.create(
+        title="Dataset 0", local_custodians=[rebecca, embury]
+    )
+    factories.DataLocationFactory.create(dataset=dataset)
+    factories.ShareFactory.create(dataset=dataset)
+    # warm up the cached home organisation
+    count_export_queries()
+    queries_for_one, _ = count_export_queries()
+
+    for i in range(1, 4):
+        dataset = factories.DatasetFactory.create(
+            title=f"Dataset {i}", local_custodians=[rebecca, embury]
+        )
+        factories.DataLocationFactory.create(dataset=dataset)
+        factories.ShareFactory.create(dataset=dataset)
+    queries_for_four, dataset_dicts = count_export_queries()
+
+    assert queries_for_one == queries_for_four
+    assert [d.to_dict() for d in Dataset.objects.order_by("pk")] == dataset_dicts
+
+
+@pytest.mark.django_db
+def test_export_contracts_in_fixed_number_of_queries(
+    celery_session_worker,
+    contact_types,
+    partners,
+    gdpr_roles,
+    storage_resources,
+    can_defer_constraint_checks,
+):
+    VIP = factories.VIPGroup()
+    rebecca = factories.UserFactory.create(
+        first_name="Rebecca", last_name="Kafe", groups=[VIP]
+    )
+
+    def create_contract():
+        contract = factories.ContractFactory.create(local_custodians=[rebecca])
+        partner_role = factories.PartnerRoleFactory.create(contract=contract)
+        partner_role.roles.add(GDPRRole.objects.first())
+        partner_role.contacts.add(factories.ContactFactory.create())
+
+    def count_export_queries():
+        exp = ContractsExporter(include_unpublished=True)
+        with CaptureQueriesContext(connection) as context:
+            contract_dicts = export_entities(exp)
+        return len(context.captured_queries), contract_dicts
+
+    create_contract()
+    # warm up the cached home organisation
+    count_export_queries()
+    queries_for_one, _ = count_export_queries()
+
+    for _ in range(3):
+        create_contract()
+    queries_for_four, contract_dicts = count_export_queries()
+
+    assert queries_for_one == queries_for_four
+    assert [c.to_dict() for c in Contract.objects.order_by("pk")] == [
+        {key: value for key, value in c.items() if key != "source"}
+        for c in contract_dicts
+    ]
+
+
+@pytest.mark.django_db
+def test_export_snapshots_invalidated_once(mocker, django_capture_on_commit_callbacks):
+    """
+    Tests that the snapshots are invalidated once the transaction commits, once per transaction,
+    and that a single rebuild is queued
+    """
+    cache.delete(REBUILD_SCHEDULED_CACHE_KEY)
+    invalidate = mocker.patch(
+        "core.importer.export_snapshots.invalidate_export_snapshots"
+    )
+    rebuild = mocker.patch("core.tasks.rebuild_export_snapshots.apply_async")
+    with django_capture_on_commit_callbacks(execute=True):
+        for _ in range(3):
+            factories.DatasetFactory(local_custodians=[factories.UserFactory()])
+        invalidate.assert_not_called()
+    assert invalidate.call_count == 1
+    assert rebuild.call_count == 1
+
+    # a rebuild is already queued
+    with django_capture_on_commit_callbacks(execute=True):
+        factories.DatasetFactory()
+    assert invalidate.call_count == 2
+    assert rebuild.call_count == 1
+
+
+@pytest.mark.django_db
+def test_export_snapshots_deferred(mocker, django_capture_on_commit_callbacks):
+    """
+    Tests that the snapshots are invalidated once at the end of a bulk job
+    """
+    cache.delete(REBUILD_SCHEDULED_CACHE_KEY)
+    invalidate = mocker.patch(
+        "core.importer.export_snapshots.invalidate_export_snapshots"
+    )
+    rebuild = mocker.patch("core.tasks.rebuild_export_snapshots.apply_async")
+    with django_capture_on_commit_callbacks(execute=True):
+        with deferred_export_snapshots():
+            factories.DatasetFactory()
+            factories.ProjectFactory()
+    assert invalidate.call_count == 1
+    assert rebuild.call_count == 1
+
+
+@pytest.mark.django_db
+def test_stale_export_snapshot_served_while_rebuilt():
+    factories.ExposureFactory()
+    snapshot = get_export_snapshot("dataset", -1, True)
+    invalidate_export_snapshots()
+
+    # Check if the stale snapshot is served while another process rebuilds it
+    assert claim_export_snapshot_rebuild(snapshot)
+    assert get_export_snapshot("dataset", -1, True).etag == snapshot.etag
+    assert get_export_snapshot("dataset", -1, True).is_stale
+
+    # Check if it is rebuilt once the rebuild is done or abandoned
+    ExportSnapshot.objects.update(rebuild_started=None)
+    assert not get_export_snapshot("dataset", -1, True).is_stale
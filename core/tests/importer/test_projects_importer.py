@@ -1,3 +1,5 @@
+import gzip
+import json
 import os
 
 import pytest
@@ -56,3 +58,27 @@ def test_import_projects(celery_session_worker, contact_types, partners):
 @pytest.mark.django_db
 def test_process_publication(*args, **kwargs):
     pass
+
+
+@pytest.mark.django_db
+def test_import_projects_ndjson_gzip(
+    celery_session_worker, contact_types, partners, tmp_path
+):
+    VIP = factories.VIPGroup()
+    factories.UserFactory.create(first_name="Rebecca", last_name="Kafe", groups=[VIP])
+    factories.UserFactory.create(first_name="Embury", last_name="Bask")
+
+    projects_json = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "../data/projects.json"
+    )
+    importer = ProjectsImporter(exit_on_error=True, verbose=False, validate=True)
+    with open(projects_json, encoding="utf-8") as json_file:
+        document = json.load(json_file)
+    projects_ndjson = str(tmp_path / "projects.ndjson.gz")
+    with gzip.open(projects_ndjson, "wt", encoding="utf-8") as ndjson_file:
+        ndjson_file.write(json.dumps({"$schema": importer.json_schema_uri}) + "\n")
+        for item in document["items"]:
+            ndjson_file.write(json.dumps(item) + "\n")
+
+    assert importer.import_json_file(projects_ndjson)
+    assert 2 == Project.objects.count()
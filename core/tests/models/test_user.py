@@ -0,0 +1,21 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.constants import Groups
+from test.factories import DataStewardGroup, UserFactory, VIPGroup
+
+
+def test_is_part_of_caches_group_names():
+    user = UserFactory.create(groups=[VIPGroup()])
+
+    with CaptureQueriesContext(connection) as context:
+        assert user.is_part_of(Groups.VIP.value)
+        assert not user.is_data_steward
+        assert not user.can_edit_metadata()
+    assert 1 == len(context.captured_queries)
+
+    # the cached names are reset when the groups change
+    user.groups.add(DataStewardGroup())
+    assert user.is_data_steward
+    user.groups.clear()
+    assert not user.is_part_of(Groups.VIP.value, Groups.DATA_STEWARD.value)
@@ -1,7 +1,24 @@
 import pytest
+from io import StringIO
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from guardian.shortcuts import assign_perm, remove_perm
 
 from core import constants
+from core.models import Contract, Dataset, Document, EffectivePermission, Project
 from core.permissions import GROUP_PERMISSIONS
+from core.permissions.checker import AutoChecker
+from core.permissions.context import (
+    PermissionContextMiddleware,
+    get_permission_context,
+)
+from core.permissions.custodians import (
+    CUSTODIAN_PERMISSIONS,
+    remove_custodian_permissions,
+)
 from test.factories import *
 
 
@@ -396,3 +413,249 @@ def test_project_entity_permissions(permissions, group, entity_factory):
         assert user.has_permission_on_object(
             f"core.{constants.Permissions.EDIT.value}_project", new_entity
         )
+
+
+def test_check_many_in_fixed_number_of_queries(permissions):
+    """
+    Tests that AutoChecker.check_many gives the same results as AutoChecker.check,
+    with a number of queries independent of the number of objects
+
+    FIXTURE:
+        permissions: Needed to load default permissions
+    """
+    user = UserFactory(groups=[VIPGroup()])
+    user.save()
+    perms = [
+        f"core.{constants.Permissions.EDIT.value}_dataset",
+        f"core.{constants.Permissions.PROTECTED.value}_dataset",
+    ]
+
+    def create_datasets(prefix, count):
+        datasets = []
+        for i in range(count):
+            project = ProjectFactory()
+            project.save()
+            dataset = DatasetFactory(title=f"{prefix} {i}", project=project)
+            dataset.save()
+            # alternate the permissions inherited from the project and held on the dataset
+            if i % 2:
+                project.local_custodians.set([user])
+                project.save()
+            else:
+                dataset.local_custodians.set([user])
+                dataset.save()
+            datasets.append(dataset)
+        datasets.append(DatasetFactory(title=f"{prefix} without permissions"))
+        return datasets
+
+    def count_check_queries(datasets):
+        datasets = Dataset.objects.filter(pk__in=[d.pk for d in datasets])
+        with CaptureQueriesContext(connection) as context:
+            results = AutoChecker(user).check_many(perms, datasets)
+        return len(context.captured_queries), results
+
+    queries_for_two, _ = count_check_queries(create_datasets("First", 1))
+    datasets = create_datasets("Second", 4)
+    queries_for_five, results = count_check_queries(datasets)
+
+    assert queries_for_two == queries_for_five
+    for dataset in datasets:
+        assert results[dataset] == {
+            perm: AutoChecker(user).check(perm, dataset) for perm in perms
+        }
+    assert not any(results[datasets[-1]].values())
+
+
+@pytest.mark.parametrize("group", [VIPGroup, DataStewardGroup])
+def test_with_perm_follows_the_checkers(permissions, group):
+    """
+    Tests that the querysets filtered by permission in the database
+    hold the same entities as the ones accepted by the checkers
+
+    FIXTURE:
+        permissions: Needed to load default permissions
+
+    PARAMETERS:
+        group: The group the user belongs to
+    """
+    user = UserFactory(groups=[group()])
+    user.save()
+    custodian_project = ProjectFactory(title="Custodian project")
+    custodian_project.local_custodians.set([user])
+    custodian_project.save()
+    other_project = ProjectFactory(title="Other project")
+    other_project.save()
+    custodian_dataset = DatasetFactory(title="Custodian dataset", project=other_project)
+    custodian_dataset.local_custodians.set([user])
+    custodian_dataset.save()
+    DatasetFactory(title="Inheriting dataset", project=custodian_project).save()
+    DatasetFactory(title="Other dataset", project=other_project).save()
+    ContractFactory(project=custodian_project).save()
+    ContractFactory(project=other_project).save()
+    for project in list(Project.objects.all()):
+        ProjectDocumentFactory(content_object=project).save()
+    for dataset in list(Dataset.objects.all()):
+        DatasetDocumentFactory(content_object=dataset).save()
+
+    checker = AutoChecker(user)
+    for perm in [constants.Permissions.EDIT, constants.Permissions.PROTECTED]:
+        for model in [Project, Dataset, Contract, Document]:
+            target = model.__name__.lower()
+            expected = {
+                obj.pk
+                for obj in model.objects.all()
+                if checker.check(f"core.{perm.value}_{target}", obj)
+            }
+            assert expected == set(
+                model.objects.with_perm(user, perm).values_list("pk", flat=True)
+            )
+
+
+def test_permission_context_remembers_decisions(permissions, rf):
+    """
+    Tests that the checks repeated while handling a request cost no query,
+    and that changing a permission drops the remembered decisions
+
+    FIXTURE:
+        permissions: Needed to load default permissions
+        rf: Request factory
+    """
+    user = UserFactory(groups=[VIPGroup()])
+    user.save()
+    dataset = DatasetFactory(title="Remembered dataset")
+    dataset.save()
+    edit_perm = f"core.{constants.Permissions.EDIT.value}_dataset"
+
+    def view(request):
+        first_check = request.user.can_edit_dataset(dataset)
+        with CaptureQueriesContext(connection) as context:
+            repeated_checks = [
+                request.user.can_edit_dataset(dataset),
+                request.user.has_permission_on_object(edit_perm, dataset),
+                get_permission_context(request.user).check(edit_perm, dataset),
+            ]
+        assert 0 == len(context.captured_queries)
+        assert [first_check] * 3 == repeated_checks
+
+        dataset.local_custodians.set([request.user])
+        return request.user.can_edit_dataset(dataset)
+
+    request = rf.get("/")
+    request.user = user
+    assert PermissionContextMiddleware(view)(request)
+
+
+@pytest.mark.parametrize(
+    "factory, related_name",
+    [
+        (DatasetFactory, "datasets"),
+        (ContractFactory, "contracts"),
+        (ProjectFactory, "project_set"),
+    ],
+)
+def test_custodian_permissions_from_user_side(permissions, factory, related_name):
+    """
+    Tests that the custodian permissions follow the custodians added and removed
+    from the user side of the relation
+
+    FIXTURE:
+        permissions: Needed to load default permissions
+    """
+    user = UserFactory(groups=[VIPGroup()])
+    other_user = UserFactory(groups=[VIPGroup()])
+    obj = factory()
+    other_obj = factory()
+    target = obj.__class__.__name__.lower()
+    perms = [f"core.{perm.value}_{target}" for perm in CUSTODIAN_PERMISSIONS]
+
+    getattr(user, related_name).add(obj)
+    assert AutoChecker(user).check(perms, obj)
+    assert not AutoChecker(user).check(perms, other_obj)
+    assert not AutoChecker(other_user).check(perms, obj)
+
+    getattr(user, related_name).remove(obj)
+    assert not AutoChecker(user).check(perms, obj)
+
+
+def test_reconcile_permissions(permissions):
+    """
+    Tests that the reconcile_permissions command gives back the custodian permissions
+    lost by the local custodians, and leaves the other users alone
+
+    FIXTURE:
+        permissions: Needed to load default permissions
+    """
+    custodians = [UserFactory(groups=[VIPGroup()]) for _ in range(3)]
+    other_user = UserFactory(groups=[VIPGroup()])
+    project = ProjectFactory(title="Reconciled project")
+    project.local_custodians.set(custodians)
+    dataset = DatasetFactory(title="Reconciled dataset", project=project)
+    dataset.local_custodians.set(custodians)
+    contract = ContractFactory(project=project)
+    contract.local_custodians.set(custodians)
+    objects = [project, dataset, contract]
+
+    def custodian_perms(obj):
+        target = obj.__class__.__name__.lower()
+        return [f"core.{perm.value}_{target}" for perm in CUSTODIAN_PERMISSIONS]
+
+    for obj in objects:
+        for custodian in custodians:
+            remove_custodian_permissions(obj.__class__, [(obj.pk, custodian.pk)])
+            assert not AutoChecker(custodian).check(custodian_perms(obj), obj)
+
+    call_command("reconcile_permissions", batch_size=2, stdout=StringIO())
+
+    for obj in objects:
+        for custodian in custodians:
+            assert AutoChecker(custodian).check(custodian_perms(obj), obj)
+        assert not AutoChecker(other_user).check(custodian_perms(obj), obj)
+
+
+def test_effective_permissions(permissions):
+    """
+    Tests that the effective permissions follow the direct, group and inherited permissions
+
+    FIXTURE:
+        permissions: Needed to load default permissions
+    """
+    user = UserFactory(groups=[VIPGroup()])
+    user.save()
+    group = Group.objects.create(name="Effective group")
+    project = ProjectFactory(title="Effective project")
+    project.save()
+    dataset = DatasetFactory(title="Effective dataset", project=project)
+    dataset.save()
+    edit_project = f"{constants.Permissions.EDIT.value}_project"
+    edit_dataset = f"{constants.Permissions.EDIT.value}_dataset"
+    SOURCES = EffectivePermission.SOURCES
+
+    def effective_permissions(obj):
+        return set(
+            EffectivePermission.objects.for_object(obj)
+            .filter(user=user)
+            .values_list("codename", "source")
+        )
+
+    assert set() == effective_permissions(dataset)
+
+    assign_perm(edit_project, user, project)
+    assert {(edit_project, SOURCES.direct)} == effective_permissions(project)
+    assert {(edit_dataset, SOURCES.inherited)} == effective_permissions(dataset)
+
+    assign_perm(edit_dataset, group, dataset)
+    user.groups.add(group)
+    assert {
+        (edit_dataset, SOURCES.inherited),
+        (edit_dataset, SOURCES.group),
+    } == effective_permissions(dataset)
+
+    remove_perm(edit_project, user, project)
+    user.groups.clear()
+    assert set() == effective_permissions(project)
+    assert set() == effective_permissions(dataset)
+
+    dataset.local_custodians.set([user])
+    assert {
+        (f"{perm.value}_dataset", SOURCES.direct) for perm in CUSTODIAN_PERMISSIONS
+    } == effective_permissions(dataset)
@@ -0,0 +1,40 @@
+from core.models import Dataset
+from core.search_backends import OrmSearchBackend
+from test.factories import DatasetFactory, ExposureFactory, UserFactory
+
+
+def test_orm_search_backend():
+    """
+    Tests that the database search matches, filters and counts the facets as the index does
+    """
+    custodian = UserFactory(first_name="Ann", last_name="Smith")
+    published = DatasetFactory(title="Genome dataset", local_custodians=[custodian])
+    ExposureFactory(dataset=published)
+    DatasetFactory(title="Other dataset", local_custodians=[custodian])
+    backend = OrmSearchBackend()
+    facets = ["local_custodians", "is_published"]
+
+    results = backend.search(Dataset, "genome", {}, facets=facets)
+    assert results.count() == 1
+    assert results.values("pk", "title")[0:10] == [
+        {"pk": published.pk, "title": "Genome dataset"}
+    ]
+    assert results.facet_counts()["fields"] == {
+        "local_custodians": [("Ann Smith", 1)],
+        "is_published": [("true", 1)],
+    }
+
+    results = backend.search(
+        Dataset, None, {"local_custodians": ["Ann Smith"]}, facets, order_by="-title_l"
+    )
+    assert [result["title"] for result in results.values("title")[0:10]] == [
+        "Other dataset",
+        "Genome dataset",
+    ]
+    assert results.facet_counts()["fields"]["is_published"] == [
+        ("false", 1),
+        ("true", 1),
+    ]
+
+    assert backend.search(Dataset, None, {"is_published": ["false"]}).count() == 1
+    assert backend.search(Dataset, '-"genome dat"', {}).count() == 1
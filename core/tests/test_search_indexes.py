@@ -0,0 +1,74 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Access, Dataset, Project
+from core.search_indexes import ContractIndex, DatasetIndex, ProjectIndex
+from core.search_updates import (
+    coalesced_index_updates,
+    deferred_indexing,
+    index_later,
+)
+from test.factories import ContractFactory, DatasetFactory, UserFactory
+
+
+def count_prepare_queries(index):
+    with CaptureQueriesContext(connection) as context:
+        for obj in index.index_queryset():
+            index.full_prepare(obj)
+    return len(context.captured_queries)
+
+
+def test_index_queryset_prefetches_prepared_fields():
+    """
+    Tests that preparing the documents of an index takes a number of queries
+    independent of the number of objects
+    """
+    indexes = [DatasetIndex(), ContractIndex(), ProjectIndex()]
+
+    def create_entities(prefix, count):
+        for i in range(count):
+            user = UserFactory()
+            contract = ContractFactory(local_custodians=[user])
+            DatasetFactory(
+                title=f"{prefix} {i}",
+                project=contract.project,
+                local_custodians=[user],
+            )
+
+    create_entities("First", 1)
+    queries_for_one = [count_prepare_queries(index) for index in indexes]
+    create_entities("Second", 3)
+    assert [count_prepare_queries(index) for index in indexes] == queries_for_one
+
+
+def test_index_updates_are_coalesced(mocker, django_capture_on_commit_callbacks):
+    """
+    Tests that the objects touched in a block are reindexed once it exits,
+    with a single task per index
+    """
+    delay = mocker.patch("core.tasks.update_search_index.delay")
+    with django_capture_on_commit_callbacks(execute=True):
+        with coalesced_index_updates():
+            index_later(Dataset, [1])
+            index_later(Dataset, [2, 1])
+            index_later(Project, [3])
+            # not indexed
+            index_later(Access, [4])
+            delay.assert_not_called()
+    assert sorted(call.args for call in delay.call_args_list) == [
+        ("core.Dataset", [1, 2]),
+        ("core.Project", [3]),
+    ]
+
+
+def test_deferred_indexing(mocker, django_capture_on_commit_callbacks):
+    """
+    Tests that the objects saved in a bulk job are reindexed once, in batches, when it ends
+    """
+    update = mocker.patch("core.search_updates.update_index_objects")
+    with django_capture_on_commit_callbacks(execute=True):
+        with deferred_indexing():
+            dataset = DatasetFactory(title="Deferred indexing")
+            dataset.save()
+            update.assert_not_called()
+    update.assert_any_call("core.Dataset", {dataset.pk})
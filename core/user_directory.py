@@ -0,0 +1,68 @@
+"""
+In-memory directory of the users, used by the user pickers.
+"""
+import threading
+import time
+
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from core.models import User
+
+
+class UserDirectory:
+    """
+    Snapshot of the users (without AnonymousUser), in the order of `User`.
+    It is loaded on first use and dropped when a user is saved or deleted in this process
+    (see `core.models.signals`), or after `ttl` seconds for the changes made in other processes.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._entries: Optional[List[Dict]] = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self) -> List[Dict]:
+        entries = []
+        for user in User.objects.exclude(username="AnonymousUser").only(
+            "username", "first_name", "last_name", "full_name", "email"
+        ):
+            searched_fields = [user.full_name, user.email, user.username]
+            entries.append(
+                {
+                    "id": user.pk,
+                    "text": str(user),
+                    "search": " ".join(
+                        field.lower() for field in searched_fields if field
+                    ),
+                }
+            )
+        return entries
+
+    def get_entries(self) -> List[Dict]:
+        entries = self._entries
+        if entries is None or self._expires < time.monotonic():
+            with self._lock:
+                entries = self._load()
+                self._entries = entries
+                self._expires = time.monotonic() + self.ttl
+        return entries
+
+    def search(self, term: Optional[str] = None) -> List[Dict]:
+        """
+        Returns the `id` and `text` of the users whose full name, email or username contains `term`
+        """
+        entries = self.get_entries()
+        if term:
+            term = term.lower()
+            entries = [entry for entry in entries if term in entry["search"]]
+        return [{"id": entry["id"], "text": entry["text"]} for entry in entries]
+
+    def clear(self):
+        with self._lock:
+            self._entries = None
+
+
+user_directory = UserDirectory(ttl=getattr(settings, "USER_DIRECTORY_TTL", 300))
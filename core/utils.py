@@ -1,11 +1,23 @@
 """
 Module that regroup some utilities.
 """
+import gzip
 import logging
 
 from django.conf import settings
 from django.utils.module_loading import import_string
 
+GZIP_SUFFIX = ".gz"
+
+
+def open_text_file(path, mode="r"):
+    """
+    Opens a UTF-8 text file, (de)compressed with gzip if its name ends with ".gz"
+    """
+    if path.endswith(GZIP_SUFFIX):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
 
 class DaisyLogger:
     def __init__(self, logger_name):
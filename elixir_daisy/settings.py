@@ -74,6 +74,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.permissions.context.PermissionContextMiddleware",
+    "core.search_updates.SearchIndexUpdateMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "auditlog.middleware.AuditlogMiddleware",
@@ -276,6 +278,10 @@ LOGGING = {
 }
 
 # search settings
+# Backend of the faceted search of the list pages. "core.search_backends.OrmSearchBackend"
+# searches the database instead of Solr, for the deployments and test environments without it
+SEARCH_BACKEND = "core.search_backends.SolrSearchBackend"
+
 FACET_FIELDS = {
     "dataset": (
         "local_custodians",
@@ -53,8 +53,8 @@ HAYSTACK_CONNECTIONS = {
     },
 }
 
-# http://celery-haystack.readthedocs.io/en/latest/#usage
-HAYSTACK_SIGNAL_PROCESSOR = "celery_haystack.signals.CelerySignalProcessor"
+# Updates coalesced per transaction, sent as one Celery task per index
+HAYSTACK_SIGNAL_PROCESSOR = "core.search_updates.CoalescingSignalProcessor"
 
 STATIC_ROOT = "/static"
 SASS_PROCESSOR_ROOT = "/static"
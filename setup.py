@@ -14,7 +14,6 @@ requirements = [
     "django-celery-beat==2.3.0",
     "django-celery-results==2.4.0",
     "django-sql-explorer==2.4.1",
-    "django-excel-response==2.0.5",
     "xlsxwriter==1.2.9",
     "django-model-utils==4.2.0",
     "django-sequences==2.6",
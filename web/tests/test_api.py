@@ -1,3 +1,7 @@
+import gzip
+
+from datetime import date, timedelta
+
 from json import loads
 
 from importlib import reload
@@ -7,9 +11,15 @@ from django.http import JsonResponse, HttpRequest, HttpResponse
 from django.urls import reverse
 from django.test import RequestFactory
 
+from core import api_keys
+from core.api_keys import verified_keys
+from core.models import ActiveEntitlement, Endpoint
+from core.models.access import StatusChoices
+from core.models.utils import digest_api_key
 from web.views import api
 
 from test.factories import (
+    AccessFactory,
     UserFactory,
     EndpointFactory,
     DatasetFactory,
@@ -20,6 +30,12 @@ from web.views.api import create_error_response, create_protect_with_api_key_dec
 from web.views.api import permissions
 
 
+def streamed_items(response):
+    if response.streaming:
+        return loads(b"".join(response.streaming_content)).get("items")
+    return loads(response.content).get("items")
+
+
 def test_create_error_response():
     assert type(create_error_response("test")) == JsonResponse
     assert create_error_response("test").status_code == 500
@@ -87,6 +103,50 @@ def test_protect_with_api_key():
     assert response.status_code == 200
 
 
+def test_protect_with_api_key_legacy_endpoint():
+    @api.protect_with_api_key
+    def dummy_protected_view(request):
+        return JsonResponse(request.COOKIES.get("endpoint_id"), safe=False)
+
+    # an endpoint saved before the key digest existed
+    endpoint = EndpointFactory()
+    Endpoint.objects.filter(pk=endpoint.pk).update(api_key_digest=None)
+    verified_keys.clear()
+
+    # check if it is authenticated by its hash, and its digest stored
+    request = RequestFactory().get("", data={"API_KEY": endpoint.api_key})
+    response = dummy_protected_view(request)
+    assert response.status_code == 200
+    assert loads(response.content) == endpoint.pk
+    endpoint.refresh_from_db()
+    assert endpoint.api_key_digest == digest_api_key(request.GET["API_KEY"])
+
+    # check if a deleted endpoint is not authenticated from the cache
+    Endpoint.objects.get(pk=endpoint.pk).delete()
+    response = dummy_protected_view(request)
+    assert response.status_code == 403
+
+
+def test_protect_with_api_key_rejected_cache(mocker):
+    # an endpoint saved before the key digest existed
+    endpoint = EndpointFactory()
+    Endpoint.objects.filter(pk=endpoint.pk).update(api_key_digest=None)
+    verified_keys.clear()
+    get_hasher = mocker.spy(api_keys, "get_hasher")
+
+    # check if an invalid key is hashed only once
+    assert api_keys.verify_api_key("definitely_invalid_key") is None
+    assert api_keys.verify_api_key("definitely_invalid_key") is None
+    assert get_hasher.call_count == 1
+
+    # check if a key rejected before its user got it is accepted once the user is saved
+    user = UserFactory()
+    assert api_keys.verify_api_key("new_user_key") is None
+    user.api_key = "new_user_key"
+    user.save()
+    assert api_keys.verify_api_key("new_user_key") == (api_keys.USER_KEY, user.pk)
+
+
 def test_permissions():
     user = UserFactory.create(
         first_name="Rebecca", last_name="Kafe", oidc_id="test_oidc_id"
@@ -121,13 +181,13 @@ def test_dataset_export_api():
     request = RequestFactory().get(path, {"API_KEY": endpoint.api_key})
     response = api.datasets(request)
     assert response.status_code == 200
-    assert len(loads(response.content).get("items")) == 0
+    assert len(streamed_items(response)) == 0
 
     # Check if the API returns datasets with Exposure
     _ = ExposureFactory(endpoint=endpoint)
     response = api.datasets(request)
     assert response.status_code == 200
-    assert len(loads(response.content).get("items")) == 1
+    assert len(streamed_items(response)) == 1
 
 
 def test_project_export_api():
@@ -139,10 +199,257 @@ def test_project_export_api():
     request = RequestFactory().get(path, {"API_KEY": endpoint.api_key})
     response = api.projects(request)
     assert response.status_code == 200
-    assert len(loads(response.content).get("items")) == 0
+    assert len(streamed_items(response)) == 0
 
     # Check if the API returns projects with Exposure
     _ = ExposureFactory(endpoint=endpoint, dataset=dataset_a)
     response = api.projects(request)
     assert response.status_code == 200
-    assert len(loads(response.content).get("items")) == 1
+    assert len(streamed_items(response)) == 1
+
+
+def test_dataset_export_api_snapshot(django_capture_on_commit_callbacks):
+    endpoint = EndpointFactory()
+    _ = ExposureFactory(endpoint=endpoint)
+    path = reverse("api_datasets")
+    request = RequestFactory().get(path, {"API_KEY": endpoint.api_key})
+    response = api.datasets(request)
+    assert response.status_code == 200
+    assert len(streamed_items(response)) == 1
+    etag = response["ETag"]
+
+    # Check if the stored export is served compressed
+    request = RequestFactory().get(
+        path, {"API_KEY": endpoint.api_key}, HTTP_ACCEPT_ENCODING="gzip, deflate"
+    )
+    response = api.datasets(request)
+    assert response["Content-Encoding"] == "gzip"
+    assert response["ETag"] == etag
+    assert len(loads(gzip.decompress(response.content)).get("items")) == 1
+
+    # Check if an up-to-date client is answered with 304
+    request = RequestFactory().get(
+        path, {"API_KEY": endpoint.api_key}, HTTP_IF_NONE_MATCH=etag
+    )
+    response = api.datasets(request)
+    assert response.status_code == 304
+
+    # Check if the snapshot is invalidated when the exposure of a dataset is committed
+    with django_capture_on_commit_callbacks(execute=True):
+        _ = ExposureFactory(endpoint=endpoint)
+    response = api.datasets(request)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert len(streamed_items(response)) == 2
+
+
+def test_dataset_export_api_snapshot_custodians(
+    partners, django_capture_on_commit_callbacks
+):
+    endpoint = EndpointFactory()
+    exposure = ExposureFactory(endpoint=endpoint)
+    request = RequestFactory().get(
+        reverse("api_datasets"), {"API_KEY": endpoint.api_key}
+    )
+    etag = api.datasets(request)["ETag"]
+
+    # Check if the snapshot is invalidated when a custodian is added
+    custodian = UserFactory(first_name="Ann", last_name="Custodian")
+    with django_capture_on_commit_callbacks(execute=True):
+        exposure.dataset.local_custodians.add(custodian)
+    response = api.datasets(request)
+    assert response["ETag"] != etag
+    etag = response["ETag"]
+
+    # Check if the snapshot is invalidated when the custodian is renamed
+    custodian.last_name = "Renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        custodian.save()
+    response = api.datasets(request)
+    assert response["ETag"] != etag
+    contacts = streamed_items(response)[0]["contacts"]
+    assert "Renamed" in [contact["last_name"] for contact in contacts]
+
+
+def test_dataset_export_api_error(mocker):
+    mocker.patch(
+        "core.importer.datasets_exporter.DatasetsExporter.iter_dicts",
+        side_effect=RuntimeError("query failed"),
+    )
+    endpoint = EndpointFactory()
+    request = RequestFactory().get(
+        reverse("api_datasets"), {"API_KEY": endpoint.api_key, "limit": 2}
+    )
+
+    # Check if an export failing before the response starts is answered with an error
+    response = api.datasets(request)
+    assert response.status_code == 500
+    assert loads(response.content)["more"] == "query failed"
+
+
+def test_dataset_export_api_pagination():
+    endpoint = EndpointFactory()
+    for _ in range(3):
+        ExposureFactory(endpoint=endpoint)
+    path = reverse("api_datasets")
+
+    # Check if the first page holds `limit` datasets and a cursor to the next one
+    request = RequestFactory().get(path, {"API_KEY": endpoint.api_key, "limit": 2})
+    response = api.datasets(request)
+    assert response.status_code == 200
+    page = loads(b"".join(response.streaming_content))
+    assert len(page["items"]) == 2
+    assert page["next_cursor"] is not None
+
+    # Check if the last page has no next cursor
+    request = RequestFactory().get(
+        path,
+        {"API_KEY": endpoint.api_key, "limit": 2, "cursor": page["next_cursor"]},
+    )
+    page = loads(b"".join(api.datasets(request).streaming_content))
+    assert len(page["items"]) == 1
+    assert page["next_cursor"] is None
+
+    # Check if nothing is returned when nothing was updated since
+    request = RequestFactory().get(
+        path,
+        {"API_KEY": endpoint.api_key, "updated_since": "2999-01-01T00:00:00+00:00"},
+    )
+    assert len(streamed_items(api.datasets(request))) == 0
+
+    # Check if invalid parameters are rejected
+    request = RequestFactory().get(path, {"API_KEY": endpoint.api_key, "limit": 0})
+    assert api.datasets(request).status_code == 400
+    request = RequestFactory().get(
+        path, {"API_KEY": endpoint.api_key, "cursor": "not-a-cursor"}
+    )
+    assert api.datasets(request).status_code == 400
+
+
+def test_dataset_export_api_ndjson():
+    endpoint = EndpointFactory()
+    for _ in range(2):
+        ExposureFactory(endpoint=endpoint)
+    path = reverse("api_datasets")
+    request = RequestFactory().get(
+        path, {"API_KEY": endpoint.api_key, "format": "ndjson"}
+    )
+    response = api.datasets(request)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).splitlines()
+    assert "$schema" in loads(lines[0])
+    assert len(lines) == 3
+
+    request = RequestFactory().get(path, {"API_KEY": endpoint.api_key, "format": "xml"})
+    assert api.datasets(request).status_code == 400
+
+
+def test_users_search_and_pagination():
+    UserFactory.create(first_name="Rebecca", last_name="Kafe")
+    UserFactory.create(first_name="Embury", last_name="Bask")
+    UserFactory.create(first_name="Rebecca", last_name="Bask")
+    path = reverse("api_users")
+
+    response = api.users(RequestFactory().get(path, {"search": "rebecca"}))
+    assert ["Rebecca Bask", "Rebecca Kafe"] == [
+        user["text"] for user in loads(response.content)["results"]
+    ]
+
+    request = RequestFactory().get(path, {"search": "bask", "page": 1, "page_size": 1})
+    body = loads(api.users(request).content)
+    assert 1 == len(body["results"])
+    assert body["pagination"]["more"]
+
+    request = RequestFactory().get(path, {"search": "bask", "page": 3, "page_size": 1})
+    assert 400 == api.users(request).status_code
+
+    request = RequestFactory().get(path, {"search": "bask", "page": 0, "page_size": 1})
+    assert 400 == api.users(request).status_code
+
+
+def test_entitlements():
+    endpoint = EndpointFactory()
+    dataset = DatasetFactory(title="Entitlements dataset", elu_accession="ELU_D_42")
+    ExposureFactory(dataset=dataset, endpoint=endpoint)
+    user = UserFactory(oidc_id="entitled_oidc_id")
+    expired_user = UserFactory(oidc_id="expired_oidc_id")
+    access = AccessFactory(user=user, dataset=dataset, status=StatusChoices.active)
+    AccessFactory(
+        user=expired_user,
+        dataset=dataset,
+        status=StatusChoices.active,
+        grant_expires_on=date.today() - timedelta(days=1),
+    )
+    oidc_ids = ["entitled_oidc_id", "expired_oidc_id", "unknown_oidc_id"]
+    path = f"{reverse('api_entitlements')}?API_KEY={endpoint.api_key}"
+
+    # all the ids are answered at once
+    request = RequestFactory().post(
+        path, data={"oidc_ids": oidc_ids}, content_type="application/json"
+    )
+    response = api.entitlements(request)
+    assert response.status_code == 200
+    assert loads(response.content) == {
+        "entitled_oidc_id": ["ELU_D_42"],
+        "expired_oidc_id": [],
+        "unknown_oidc_id": [],
+    }
+
+    # nothing changed since the previous answer
+    request = RequestFactory().get(
+        path,
+        {"oidc_id": oidc_ids},
+        HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+    )
+    assert api.entitlements(request).status_code == 304
+
+    # the single id endpoint reads the same table
+    request = RequestFactory().get(path)
+    response = permissions(request, "entitled_oidc_id")
+    assert loads(response.content) == ["ELU_D_42"]
+
+    # a terminated access is revoked
+    access.delete()
+    assert ActiveEntitlement.objects.get(access=access).revoked
+    request = RequestFactory().get(path, {"oidc_id": oidc_ids})
+    assert loads(api.entitlements(request).content)["entitled_oidc_id"] == []
+
+    # too many ids
+    request = RequestFactory().post(
+        path,
+        data={"oidc_ids": ["x"] * (api.MAX_ENTITLEMENTS_BATCH + 1)},
+        content_type="application/json",
+    )
+    assert api.entitlements(request).status_code == 400
+
+
+def test_search_suggest(mocker):
+    search = mocker.patch("web.views.api.SearchQuerySet")
+    matches = search.return_value.models.return_value.autocomplete.return_value.values
+    matches.return_value.__getitem__.return_value = [
+        {"pk": 1, "title": "Suggested dataset", "model_name": "dataset"}
+    ]
+    request = RequestFactory().get(reverse("api_search_suggest"), {"q": " Sugg  DAT "})
+
+    body = loads(api.suggest(request).content)
+    assert body["results"] == [
+        {
+            "id": 1,
+            "type": "dataset",
+            "title": "Suggested dataset",
+            "url": reverse("dataset", args=[1]),
+        }
+    ]
+    search.return_value.models.return_value.autocomplete.assert_called_once_with(
+        autocomplete="sugg dat"
+    )
+    matches.assert_called_once_with("pk", "title", "model_name")
+
+    # the same prefix is answered from the cache
+    request = RequestFactory().get(reverse("api_search_suggest"), {"q": "sugg dat"})
+    assert loads(api.suggest(request).content) == body
+    assert search.call_count == 1
+
+    request = RequestFactory().get(reverse("api_search_suggest"), {"q": " "})
+    assert loads(api.suggest(request).content) == {"results": []}
@@ -1,8 +1,16 @@
+import csv
+import io
+
 import pytest
 from test import factories
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from core.models import Partner
+from web.views.export import iter_export_objects
+
 
 @pytest.mark.parametrize(
     "url_name,factory",
@@ -30,3 +38,52 @@ def test_excel_export(permissions, client_user_data_steward, url_name, factory):
     # with io.BytesIO(response.content) as fh:
     #    pass
     #    df = pd.io.excel.read_excel(fh, sheetname=0)
+
+
+@pytest.mark.parametrize(
+    "factory",
+    [
+        factories.CohortFactory,
+        factories.ContactFactory,
+        factories.ContractFactory,
+        factories.DatasetFactory,
+        factories.ProjectFactory,
+    ],
+)
+def test_export_objects_queries(factory):
+    """
+    Tests that serializing the exported objects takes a number of queries
+    independent of the number of objects, and keeps the order of the search results
+    """
+    model = factory._meta.model
+
+    def serialize_all():
+        pks = list(model.objects.order_by("-pk").values_list("pk", flat=True))
+        with CaptureQueriesContext(connection) as context:
+            objects = list(iter_export_objects(model, pks))
+            for obj in objects:
+                obj.serialize_to_export()
+        assert [obj.pk for obj in objects] == pks
+        return len(context.captured_queries)
+
+    factory.create_batch(1)
+    queries_for_one = serialize_all()
+    factory.create_batch(3)
+    assert serialize_all() == queries_for_one
+
+
+def test_csv_export(permissions, client_user_data_steward):
+    """
+    Tests that the csv export streams a header and a line per exported object
+    """
+    factories.PartnerFactory.create_batch(3)
+    response = client_user_data_steward.get(
+        reverse("partners_export"), {"format": "csv"}
+    )
+
+    assert response.status_code == 200
+    assert response.streaming
+    content = b"".join(response.streaming_content).decode("utf-8")
+    rows = list(csv.reader(io.StringIO(content)))
+    assert rows[0][0] == "source"
+    assert len(rows) == Partner.objects.count() + 1
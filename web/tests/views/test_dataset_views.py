@@ -17,6 +17,9 @@ from core.constants import Permissions
 from core.models.user import User
 from core.models.dataset import Dataset
 from core.forms import DatasetForm
+from core.search_updates import bump_index_generation
+from web.views import facet_view_utils
+from web.views.datasets import RESULT_FIELDS
 
 from .utils import (
     check_response_status,
@@ -244,3 +247,42 @@ def test_dataset_views_scientific_metadata_field(
         url = reverse(url_name)
     response = client.get(url)
     assert (field_node in response.content.decode("utf-8")) is expected_result
+
+
+def test_dataset_list_pagination(permissions, mocker):
+    """
+    Tests that the dataset list renders one page of stored index fields, keeping the search parameters
+    """
+    mocker.patch.object(facet_view_utils, "SEARCH_PAGE_SIZE", 2)
+    for i in range(3):
+        DatasetFactory(title=f"Paginated dataset {i}")
+    user = UserFactory(groups=[DataStewardGroup()])
+    client = Client()
+    login_test_user(client, user)
+
+    response = client.get(reverse("datasets"), {"query": "Paginated", "page": 2})
+    assert response.status_code == 200
+    page = response.context["page_object"]
+    assert page.number == 2
+    assert len(page) <= 2
+    assert all(set(result) == set(RESULT_FIELDS) for result in page)
+    assert response.context["query_string"] == "query=Paginated&"
+
+
+def test_facets_cache_key():
+    """
+    Tests that equivalent searches share their cached facet counts until the index is updated
+    """
+    key = facet_view_utils.get_facets_cache_key(
+        Dataset,
+        {"project": ["B", "A"], "is_published": ["true"]},
+        " genome ",
+        ["b", "a"],
+    )
+    assert key == facet_view_utils.get_facets_cache_key(
+        Dataset, {"is_published": ["true"], "project": ["A", "B"]}, "genome", ["a", "b"]
+    )
+    bump_index_generation("core.Dataset")
+    assert key != facet_view_utils.get_facets_cache_key(
+        Dataset, {"is_published": ["true"], "project": ["A", "B"]}, "genome", ["a", "b"]
+    )
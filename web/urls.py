@@ -111,11 +111,13 @@ web_urls = [
     # API urls
     path("api/cohorts", api.cohorts, name="api_cohorts"),
     path("api/datasets", api.datasets, name="api_datasets"),
+    path("api/entitlements", api.entitlements, name="api_entitlements"),
     path("api/contracts", api.contracts, name="api_contracts"),
     path("api/partners", api.partners, name="api_partners"),
     path("api/permissions/<str:user_oidc_id>", api.permissions, name="api_permissions"),
     path("api/projects", api.projects, name="api_projects"),
     path("api/rems", api.rems_endpoint, name="api_rems_endpoint"),
+    path("api/search/suggest", api.suggest, name="api_search_suggest"),
     path("api/termsearch/<slug:category>", api.termsearch, name="api_termsearch"),
     path("api/users", api.users, name="api_users"),
     path(
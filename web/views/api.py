@@ -1,31 +1,59 @@
+import gzip
+import hashlib
 import json
+import re
 import sys
 
+from calendar import timegm
 from functools import wraps
-from io import StringIO
-from typing import Dict, Optional
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.core.paginator import Paginator
-from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest
+from django.http import (
+    JsonResponse,
+    HttpResponse,
+    HttpResponseBadRequest,
+    StreamingHttpResponse,
+)
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q, Count
-from django.contrib.auth.hashers import get_hasher
+from django.db.models import Q
 
+from haystack.query import SearchQuerySet
 from stronghold.decorators import public
 
+from core.api_keys import ENDPOINT_KEY, verify_api_key
+from core.entitlements import get_entitlements
+from core.importer.base_exporter import EXPORT_FORMATS, JSON_FORMAT, NDJSON_FORMAT
+from core.importer.contracts_exporter import ContractsExporter
 from core.importer.datasets_exporter import DatasetsExporter
+from core.importer.export_snapshots import get_export_snapshot
+from core.importer.pagination import (
+    decode_cursor,
+    paginate_by_update,
+    parse_aware_datetime,
+)
 from core.importer.projects_exporter import ProjectsExporter
 from core.lcsb.rems import handle_rems_callback
 from core.lcsb.rems import synchronizer
 from core.models import (
     User,
     Cohort,
+    Contact,
+    Contract,
+    Dataset,
     Partner,
+    Project,
     DiseaseTerm,
-    Endpoint,
 )
+from core.search_updates import get_index_generations
+from core.user_directory import user_directory
 from core.models.term_model import TermCategory, PhenotypeTerm, StudyTerm, GeneTerm
 from core.utils import DaisyLogger
 from web.views.utils import get_client_ip, get_user_or_contact_by_oidc_id
@@ -33,6 +61,21 @@ from web.views.utils import get_client_ip, get_user_or_contact_by_oidc_id
 
 logger = DaisyLogger(__name__)
 
+accepts_gzip_re = re.compile(r"\bgzip\b")
+
+# The largest page the API returns, whatever the `limit` requested
+MAX_PAGE_SIZE = getattr(settings, "API_MAX_PAGE_SIZE", 1000)
+
+# The most OIDC ids the entitlements API answers for in one call
+MAX_ENTITLEMENTS_BATCH = getattr(settings, "API_MAX_ENTITLEMENTS_BATCH", 5000)
+
+# The most matches the typeahead search returns, and how long (in seconds) they are cached
+MAX_SUGGESTIONS = getattr(settings, "SEARCH_MAX_SUGGESTIONS", 10)
+SUGGESTIONS_CACHE_TIMEOUT = getattr(settings, "SEARCH_SUGGESTIONS_CACHE_TIMEOUT", 300)
+
+# The models the typeahead search looks into, their detail views are named after them
+SUGGESTED_MODELS = (Dataset, Project, Contract, Partner, Contact)
+
 
 def create_error_response(
     message: str, more: Optional[Dict] = None, status: int = 500
@@ -43,6 +86,111 @@ def create_error_response(
     return JsonResponse({**more, **body}, status=status)
 
 
+def create_export_response(
+    exporter, output_format=JSON_FORMAT
+) -> StreamingHttpResponse:
+    """
+    Streams the exporter's JSON document (or NDJSON lines) one item at a time, so that the whole export
+    is never held in memory. Errors of single items are logged by the exporter.
+    The first item is serialized before returning, so that a failing export raises here,
+    while an error response can still be sent.
+    """
+    if output_format == NDJSON_FORMAT:
+        chunks = exporter.stream_ndjson()
+        content_type = "application/x-ndjson"
+    else:
+        chunks = exporter.stream()
+        content_type = "application/json"
+    # the header, then the first item which runs the export query
+    first_chunks = list(islice(chunks, 2))
+    return StreamingHttpResponse(
+        log_stream_errors(chain(first_chunks, chunks)), content_type=content_type
+    )
+
+
+def log_stream_errors(chunks: Iterable[str]) -> Iterator[str]:
+    try:
+        yield from chunks
+    except Exception as e:
+        # the response has started, the error can only be logged
+        logger.error("export interrupted", error=e)
+        raise
+
+
+def get_export_format(request) -> str:
+    """
+    Reads the `format` parameter, raises ValueError if it is not supported
+    """
+    output_format = request.GET.get("format", JSON_FORMAT)
+    if output_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {output_format}")
+    return output_format
+
+
+def get_pagination_params(request) -> Dict:
+    """
+    Reads the `updated_since`, `cursor` and `limit` parameters, see `paginate_by_update`.
+    Raises ValueError when one of them is invalid.
+    """
+    updated_since = request.GET.get("updated_since")
+    if updated_since is not None:
+        updated_since = parse_aware_datetime(updated_since)
+    cursor = request.GET.get("cursor")
+    if cursor is not None:
+        # fail before the response starts streaming
+        decode_cursor(cursor)
+    limit = request.GET.get("limit")
+    if limit is not None:
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError("The limit must be a positive integer")
+        limit = min(limit, MAX_PAGE_SIZE)
+    return {"updated_since": updated_since, "cursor": cursor, "limit": limit}
+
+
+def get_snapshot_key(request) -> Optional[Dict]:
+    """
+    Returns which stored export (see `ExportSnapshot`) answers the request,
+    or None when the export must be rendered on the fly, e.g. when it is filtered.
+    """
+    filters = ["project_id", "project_title", "updated_since", "cursor", "limit"]
+    if any(key in request.GET for key in filters):
+        return None
+    if request.GET.get("format", JSON_FORMAT) != JSON_FORMAT:
+        return None
+    if request.COOKIES.get("global"):
+        return {"endpoint_id": -1, "include_unpublished": True}
+    endpoint_id = request.COOKIES.get("endpoint_id")
+    if endpoint_id is None:
+        return None
+    return {"endpoint_id": int(endpoint_id), "include_unpublished": False}
+
+
+def create_snapshot_response(request, entity: str, snapshot_key: Dict) -> HttpResponse:
+    """
+    Serves the stored export, compressed if the client accepts it.
+    A client that already holds the current version (If-None-Match / If-Modified-Since)
+    gets a 304 without the export being read from the database.
+    """
+    snapshot = get_export_snapshot(entity, **snapshot_key)
+    etag = quote_etag(snapshot.etag)
+    last_modified = timegm(snapshot.last_modified.utctimetuple())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content = bytes(snapshot.content)
+        if accepts_gzip_re.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            response = HttpResponse(content, content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(
+                gzip.decompress(content), content_type="application/json"
+            )
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
 def create_protect_with_api_key_decorator(global_api_key=None):
     def protect_with_api_key(view):
         """
@@ -62,20 +210,15 @@ def create_protect_with_api_key_decorator(global_api_key=None):
                 request.COOKIES["global"] = True
                 return view(request, *args, **kwargs)
             elif req_key:
-                # Check the key from GET or POST from USER api_key
-                if User.objects.filter(Q(api_key=req_key)).count() > 0:
-                    return view(request, *args, **kwargs)
-                # Check the key from GET or POST from Endpoint hashed api_key
-                hashed_key = get_hasher("default").encode(
-                    req_key, salt=settings.SECRET_KEY
-                )
-                try:
-                    endpoint = Endpoint.objects.get(api_key=hashed_key)
-                except Endpoint.DoesNotExist:
+                # Check the key from GET or POST against User api_key and Endpoint hashed api_key
+                owner = verify_api_key(req_key)
+                if owner is None:
                     return create_error_response(
                         "There is no permitted endpoint with your API_KEY", status=403
                     )
-                request.COOKIES["endpoint_id"] = endpoint.id
+                owner_type, owner_id = owner
+                if owner_type == ENDPOINT_KEY:
+                    request.COOKIES["endpoint_id"] = owner_id
                 return view(request, *args, **kwargs)
             else:
                 return create_error_response(error_message, status=403)
@@ -96,13 +239,26 @@ Rapido API method, we should probably use django rest framework if we want to de
 
 
 def users(request):
+    matching_users = user_directory.search(request.GET.get("search"))
+    page = request.GET.get("page")
+    if page is None:
+        return JsonResponse({"results": matching_users})
+
+    try:
+        page = int(page)
+        page_size = min(int(request.GET.get("page_size", 25)), MAX_PAGE_SIZE)
+    except ValueError:
+        return HttpResponseBadRequest("invalid page or page_size parameter")
+    if page_size < 1:
+        return HttpResponseBadRequest("invalid page_size parameter")
+    paginator = Paginator(matching_users, page_size)
+    if page < 1 or page > paginator.num_pages:
+        return HttpResponseBadRequest("invalid page parameter")
+
     return JsonResponse(
         {
-            "results": [
-                {"id": user.pk, "text": str(user)}
-                for user in User.objects.all()
-                if not user.username == "AnonymousUser"
-            ]
+            "results": list(paginator.get_page(page)),
+            "pagination": {"more": page < paginator.num_pages},
         }
     )
 
@@ -110,26 +266,33 @@ def users(request):
 @public
 @csrf_exempt
 def cohorts(request):
-    return JsonResponse(
-        {
-            "results": [
-                cohort.to_dict() for cohort in Cohort.objects.filter(_is_published=True)
-            ]
-        }
+    try:
+        pagination = get_pagination_params(request)
+    except ValueError as e:
+        return create_error_response(str(e), status=400)
+    objects, next_cursor = paginate_by_update(
+        Cohort.objects.filter(_is_published=True), **pagination
     )
+    body = {"results": [cohort.to_dict() for cohort in objects]}
+    if pagination["limit"] is not None:
+        body["next_cursor"] = next_cursor
+    return JsonResponse(body)
 
 
 @public
 @csrf_exempt
 def partners(request):
-    return JsonResponse(
-        {
-            "results": [
-                partner.to_dict()
-                for partner in Partner.objects.filter(_is_published=True)
-            ]
-        }
+    try:
+        pagination = get_pagination_params(request)
+    except ValueError as e:
+        return create_error_response(str(e), status=400)
+    objects, next_cursor = paginate_by_update(
+        Partner.objects.filter(_is_published=True), **pagination
     )
+    body = {"results": [partner.to_dict() for partner in objects]}
+    if pagination["limit"] is not None:
+        body["next_cursor"] = next_cursor
+    return JsonResponse(body)
 
 
 @public
@@ -170,10 +333,63 @@ def termsearch(request, category):
     )
 
 
+def suggest(request) -> JsonResponse:
+    """
+    Returns the entities whose autocomplete field matches the beginning of the words typed,
+    across the models, with a single search request which fetches only their pk and title.
+    The matches of a prefix are cached until one of the indexes is updated.
+    """
+    query = " ".join(request.GET.get("q", "").lower().split())
+    if not query:
+        return JsonResponse({"results": []})
+
+    generations = get_index_generations(SUGGESTED_MODELS)
+    cache_key = (
+        "search-suggest:%s"
+        % hashlib.sha256(
+            json.dumps([query, sorted(generations.items())]).encode()
+        ).hexdigest()
+    )
+    results = cache.get(cache_key)
+    if results is None:
+        matches = (
+            SearchQuerySet()
+            .models(*SUGGESTED_MODELS)
+            .autocomplete(autocomplete=query)
+            # model_name is not a stored field, the search results read it from django_ct
+            .values("pk", "title", "model_name")[:MAX_SUGGESTIONS]
+        )
+        results = [
+            {
+                "id": match["pk"],
+                "type": match["model_name"],
+                "title": match["title"],
+                "url": reverse(match["model_name"], args=[match["pk"]]),
+            }
+            for match in matches
+        ]
+        cache.set(cache_key, results, SUGGESTIONS_CACHE_TIMEOUT)
+    return JsonResponse({"results": results})
+
+
 @public
 @csrf_exempt
 @protect_with_api_key
 def datasets(request):
+    snapshot_key = get_snapshot_key(request)
+    if snapshot_key is not None:
+        try:
+            return create_snapshot_response(request, "dataset", snapshot_key)
+        except Exception as e:
+            return create_error_response(
+                "Something went wrong during exporting the datasets", {"more": str(e)}
+            )
+
+    try:
+        pagination = get_pagination_params(request)
+        output_format = get_export_format(request)
+    except ValueError as e:
+        return create_error_response(str(e), status=400)
     endpoint_id = request.COOKIES.get("endpoint_id")
     global_export = request.COOKIES.get("global")
     objects = get_filtered_entities(request, "Dataset")
@@ -184,13 +400,14 @@ def datasets(request):
         project_title = request.GET.get("project_title", "")
         objects = objects.filter(project__title__iexact=project_title)
     exporter = DatasetsExporter(
-        objects=objects, endpoint_id=endpoint_id, include_unpublished=global_export
+        objects=objects,
+        endpoint_id=endpoint_id,
+        include_unpublished=global_export,
+        **pagination,
     )
 
     try:
-        buffer = exporter.export_to_buffer(StringIO())
-
-        return HttpResponse(buffer.getvalue())
+        return create_export_response(exporter, output_format)
     except Exception as e:
         return create_error_response(
             "Something went wrong during exporting the datasets", {"more": str(e)}
@@ -215,23 +432,26 @@ def get_filtered_entities(request, model_name):
 @csrf_exempt
 @protect_with_api_key
 def contracts(request):
+    try:
+        pagination = get_pagination_params(request)
+        output_format = get_export_format(request)
+    except ValueError as e:
+        return create_error_response(str(e), status=400)
+    endpoint_id = request.COOKIES.get("endpoint_id")
+    global_export = request.COOKIES.get("global")
     objects = get_filtered_entities(request, "Contract")
-    objects = objects.anotate(c=Count("project__datasets__exposures")).filter(
-        project__is_published=True, c__gt=0
-    )
     if "project_id" in request.GET:
         project_id = request.GET.get("project_id", "")
         objects = objects.filter(project__id=project_id)
-    object_dicts = []
-    for contract in objects:
-        cd = contract.to_dict()
-        cd["source"] = settings.SERVER_URL
-        object_dicts.append(cd)
-    objects_json_buffer = StringIO()
-    json.dump({"items": object_dicts}, objects_json_buffer, indent=4)
+    exporter = ContractsExporter(
+        objects=objects,
+        endpoint_id=endpoint_id,
+        include_unpublished=global_export,
+        **pagination,
+    )
 
     try:
-        return HttpResponse(objects_json_buffer.getvalue())
+        return create_export_response(exporter, output_format)
     except Exception as e:
         return create_error_response(
             "Something went wrong during exporting the contracts", {"more": str(e)}
@@ -242,6 +462,20 @@ def contracts(request):
 @csrf_exempt
 @protect_with_api_key
 def projects(request):
+    snapshot_key = get_snapshot_key(request)
+    if snapshot_key is not None:
+        try:
+            return create_snapshot_response(request, "project", snapshot_key)
+        except Exception as e:
+            return create_error_response(
+                "Something went wrong during exporting the projects", {"more": str(e)}
+            )
+
+    try:
+        pagination = get_pagination_params(request)
+        output_format = get_export_format(request)
+    except ValueError as e:
+        return create_error_response(str(e), status=400)
     endpoint_id = request.COOKIES.get("endpoint_id")
     global_export = request.COOKIES.get("global")
     objects = get_filtered_entities(request, "Project")
@@ -250,13 +484,14 @@ def projects(request):
         objects = objects.filter(id=project_id)
 
     exporter = ProjectsExporter(
-        objects=objects, endpoint_id=endpoint_id, include_unpublished=global_export
+        objects=objects,
+        endpoint_id=endpoint_id,
+        include_unpublished=global_export,
+        **pagination,
     )
 
     try:
-        buffer = exporter.export_to_buffer(StringIO())
-
-        return HttpResponse(buffer.getvalue())
+        return create_export_response(exporter, output_format)
     except Exception as e:
         return create_error_response(
             "Something went wrong during exporting the projects", {"more": str(e)}
@@ -333,27 +568,75 @@ def permissions(request, user_oidc_id: str) -> JsonResponse:
         system_daisy_user.save()
 
     logger.debug("Permission API endpoint called...")
-    user_found, contact_found, user, contact = get_user_or_contact_by_oidc_id(
-        user_oidc_id
-    )
-    logger.debug(
-        "...found User: " + str(user_found) + ", found Contact: " + str(contact_found)
-    )
+    entitlements_by_id, _ = get_entitlements([user_oidc_id])
+    permissions = entitlements_by_id[user_oidc_id]
+    if not permissions:
+        # only look the id up when it has no entitlement, to tell it apart from an unknown one
+        user_found, contact_found, _, _ = get_user_or_contact_by_oidc_id(user_oidc_id)
+        logger.debug(
+            "...found User: "
+            + str(user_found)
+            + ", found Contact: "
+            + str(contact_found)
+        )
+        if not user_found and not contact_found:
+            message = "No contact nor user found!"
+            logger.debug(message)
+            return create_error_response(message, status=404)
+    return JsonResponse(permissions, status=200, safe=False)
+
+
+def get_entitlements_oidc_ids(request) -> List[str]:
+    """
+    Reads the OIDC ids from the `oidc_id` parameters of a GET request,
+    or from the `oidc_ids` list of the JSON body of a POST request.
+    Raises ValueError when they are missing, malformed or too many.
+    """
+    if request.method == "POST":
+        try:
+            oidc_ids = json.loads(request.body or b"{}").get("oidc_ids")
+        except (AttributeError, json.JSONDecodeError) as e:
+            raise ValueError(f"Invalid JSON body: {e}")
+    else:
+        oidc_ids = request.GET.getlist("oidc_id")
+    if not oidc_ids or not isinstance(oidc_ids, list):
+        raise ValueError(
+            "Give the OIDC ids as `oidc_id` parameters or an `oidc_ids` list"
+        )
+    if not all(isinstance(oidc_id, str) for oidc_id in oidc_ids):
+        raise ValueError("The OIDC ids must be strings")
+    if len(oidc_ids) > MAX_ENTITLEMENTS_BATCH:
+        raise ValueError(f"At most {MAX_ENTITLEMENTS_BATCH} OIDC ids can be given")
+    return oidc_ids
 
-    if not user_found and not contact_found:
-        message = "No contact nor user found!"
-        logger.debug(message)
-        return create_error_response(message, status=404)
 
+@public
+@csrf_exempt
+@protect_with_api_key
+def entitlements(request) -> HttpResponse:
+    """
+    Returns the accession numbers of the datasets each of the OIDC ids is entitled to,
+    with a single query whatever the number of ids.
+    A client that sends If-Modified-Since gets a 304 when none of the entitlements changed since.
+    """
+    if request.method not in ("GET", "POST"):
+        return create_error_response("Only GET and POST are allowed", status=405)
     try:
-        if user:
-            permissions = user.get_access_permissions()
-            return JsonResponse(permissions, status=200, safe=False)
-        elif contact:
-            permissions = contact.get_access_permissions()
-            return JsonResponse(permissions, status=200, safe=False)
-    except Exception as e:
-        message = "Something went wrong during exporting the permissions"
-        more = str(e)
-        logger.debug(f"{message} ({more}")
-        return create_error_response(message, {"more": more}, status=404)
+        oidc_ids = get_entitlements_oidc_ids(request)
+    except ValueError as e:
+        return create_error_response(str(e), status=400)
+
+    results, last_modified = get_entitlements(oidc_ids)
+    if last_modified is not None:
+        last_modified = timegm(last_modified.utctimetuple())
+        if_modified_since = parse_http_date_safe(
+            request.META.get("HTTP_IF_MODIFIED_SINCE", "")
+        )
+        # unlike get_conditional_response, also answers the POST requests
+        if if_modified_since is not None and last_modified <= if_modified_since:
+            response = HttpResponse(status=304)
+        else:
+            response = JsonResponse(results, status=200)
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+    return JsonResponse(results, status=200)
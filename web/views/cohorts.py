@@ -14,6 +14,8 @@ from . import facet_view_utils
 
 
 FACET_FIELDS = settings.FACET_FIELDS["cohort"]
+# the stored index fields rendered by search/_items/cohorts.html
+RESULT_FIELDS = ["pk", "title", "owners", "institutes", "ethics_confirmation"]
 from core.models.utils import COMPANY
 
 
@@ -71,12 +73,13 @@ def cohort_list(request):
     query = request.GET.get("query")
     order_by = request.GET.get("order_by")
 
-    cohorts = facet_view_utils.search_objects(
+    page, facets = facet_view_utils.search_page(
         request,
         filters=request.GET.getlist("filters"),
         query=query,
         object_model=Cohort,
         facets=FACET_FIELDS,
+        fields=RESULT_FIELDS,
         order_by=order_by,
     )
     return render(
@@ -84,13 +87,15 @@ def cohort_list(request):
         "search/search_page.html",
         {
             "reset": True,
-            "facets": facet_view_utils.filter_empty_facets(cohorts.facet_counts()),
+            "facets": facets,
             "query": query or "",
             "title": "Cohorts",
             "help_text": Cohort.AppMeta.help_text,
             "search_url": "cohorts",
             "add_url": "cohort_add",
-            "data": {"cohorts": cohorts},
+            "data": {"cohorts": page},
+            "page_object": page,
+            "query_string": facet_view_utils.get_page_query_string(request),
             "results_template_name": "search/_items/cohorts.html",
             "company_name": COMPANY,
             "order_by_fields": [
@@ -15,6 +15,8 @@ from core.constants import Permissions
 from . import facet_view_utils
 
 FACET_FIELDS = settings.FACET_FIELDS["contact"]
+# the stored index fields rendered by search/_items/contacts.html
+RESULT_FIELDS = ["pk", "first_name", "last_name", "type", "partners"]
 from core.models.utils import COMPANY
 
 
@@ -124,12 +126,13 @@ class ContactEditView(UpdateView):
 def contact_search_view(request):
     query = request.GET.get("query")
     order_by = request.GET.get("order_by")
-    contacts = facet_view_utils.search_objects(
+    page, facets = facet_view_utils.search_page(
         request,
         filters=request.GET.getlist("filters"),
         query=query,
         object_model=Contact,
         facets=FACET_FIELDS,
+        fields=RESULT_FIELDS,
         order_by=order_by,
     )
     return render(
@@ -137,13 +140,15 @@ def contact_search_view(request):
         "search/search_page.html",
         {
             "reset": True,
-            "facets": facet_view_utils.filter_empty_facets(contacts.facet_counts()),
+            "facets": facets,
             "query": query or "",
             "title": "Contacts",
             "help_text": Contact.AppMeta.help_text,
             "search_url": "contacts",
             "add_url": "contact_add",
-            "data": {"contacts": contacts},
+            "data": {"contacts": page},
+            "page_object": page,
+            "query_string": facet_view_utils.get_page_query_string(request),
             "results_template_name": "search/_items/contacts.html",
             "company_name": COMPANY,
             "order_by_fields": [
@@ -20,6 +20,8 @@ from . import facet_view_utils
 
 
 FACET_FIELDS = settings.FACET_FIELDS["contract"]
+# the stored index fields rendered by search/_items/contracts.html
+RESULT_FIELDS = ["pk", "partners", "project", "partners_roles"]
 
 
 class ContractCreateView(CreateView):
@@ -87,12 +89,13 @@ class ContractEditView(CheckerMixin, UpdateView):
 def contract_list(request):
     query = request.GET.get("query")
     order_by = request.GET.get("order_by")
-    contracts = facet_view_utils.search_objects(
+    page, facets = facet_view_utils.search_page(
         request,
         filters=request.GET.getlist("filters"),
         query=query,
         object_model=Contract,
         facets=FACET_FIELDS,
+        fields=RESULT_FIELDS,
         order_by=order_by,
     )
     return render(
@@ -100,7 +103,7 @@ def contract_list(request):
         "search/search_page.html",
         {
             "reset": True,
-            "facets": facet_view_utils.filter_empty_facets(contracts.facet_counts()),
+            "facets": facets,
             "query": query or "",
             "order_by": order_by or "",
             "filters": request.GET.get("filters") or "",
@@ -108,7 +111,9 @@ def contract_list(request):
             "help_text": Contract.AppMeta.help_text,
             "search_url": "contracts",
             "add_url": "contract_add",
-            "data": {"contracts": contracts},
+            "data": {"contracts": page},
+            "page_object": page,
+            "query_string": facet_view_utils.get_page_query_string(request),
             "results_template_name": "search/_items/contracts.html",
             "order_by_fields": [("Contact", "contact"), ("Project", "project")],
         },
@@ -30,6 +30,9 @@ from core.utils import DaisyLogger
 
 log = DaisyLogger(__name__)
 
+# The most data declarations suggested, fetched in a single search request
+AUTOCOMPLETE_SIZE = 20
+
 DATA_DECLARATIONS_SUB_FORMS = [
     (DataDeclarationSubFormFromExisting, "data_declaration_sub_form_existing.html"),
     (DataDeclarationSubFormNew, "data_declaration_sub_form_new.html"),
@@ -130,7 +133,11 @@ def data_declarations_autocomplete(request):
 
     suggestions = []
     if query:
-        sqs = SearchQuerySet().models(DataDeclaration).autocomplete(autocomplete=query)
+        sqs = (
+            SearchQuerySet()
+            .models(DataDeclaration)
+            .autocomplete(autocomplete=query)[:AUTOCOMPLETE_SIZE]
+        )
         for result in sqs:
             cohorts = list_or_none("cohorts", result)
             local_custodians = list_or_none("local_custodians", result)
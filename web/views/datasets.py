@@ -12,6 +12,7 @@ from core.forms.dataset import DatasetFormEdit
 from core.models import Dataset, Exposure
 from core.models.utils import COMPANY
 from core.permissions import CheckerMixin
+from core.permissions.custodians import assign_custodian_permissions
 from core.utils import DaisyLogger
 from core.constants import Permissions
 from . import facet_view_utils
@@ -21,6 +22,8 @@ from typing import Any, Dict
 log = DaisyLogger(__name__)
 
 FACET_FIELDS = settings.FACET_FIELDS["dataset"]
+# the stored index fields rendered by search/_items/datasets.html
+RESULT_FIELDS = ["pk", "title", "is_published", "data_types", "local_custodians"]
 
 
 class DatasetWizardView(NamedUrlSessionWizardView):
@@ -170,12 +173,15 @@ class DatasetCreateView(CreateView):
 
     def form_valid(self, form):
         response = super().form_valid(form)
-        #  assign permissions to the user
-        self.request.user.assign_permissions_to_dataset(form.instance)
-
-        # assign also permissions to the people that are responsible
-        for local_custodian in form.instance.local_custodians.all():
-            local_custodian.assign_permissions_to_dataset(form.instance)
+        # assign permissions to the user and to the people that are responsible
+        custodian_ids = form.instance.local_custodians.values_list("pk", flat=True)
+        assign_custodian_permissions(
+            Dataset,
+            [
+                (form.instance.pk, user_id)
+                for user_id in [self.request.user.pk, *custodian_ids]
+            ],
+        )
 
         return response
 
@@ -228,12 +234,13 @@ class DatasetEditView(CheckerMixin, UpdateView):
 def dataset_list(request):
     query = request.GET.get("query")
     order_by = request.GET.get("order_by")
-    datasets = facet_view_utils.search_objects(
+    page, facets = facet_view_utils.search_page(
         request,
         filters=request.GET.getlist("filters"),
         query=query,
         object_model=Dataset,
         facets=FACET_FIELDS,
+        fields=RESULT_FIELDS,
         order_by=order_by,
     )
     return render(
@@ -243,13 +250,15 @@ def dataset_list(request):
             "reset": True,
             "filters": request.GET.get("filters") or "",
             "order_by": order_by or "",
-            "facets": facet_view_utils.filter_empty_facets(datasets.facet_counts()),
+            "facets": facets,
             "query": query or "",
             "title": "Datasets",
             "help_text": Dataset.AppMeta.help_text,
             "search_url": "datasets",
             "add_url": "wizard",
-            "data": {"datasets": datasets},
+            "data": {"datasets": page},
+            "page_object": page,
+            "query_string": facet_view_utils.get_page_query_string(request),
             "results_template_name": "search/_items/datasets.html",
             "company_name": COMPANY,
             "order_by_fields": [
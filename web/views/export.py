@@ -1,9 +1,21 @@
+import csv
+import tempfile
+
+from datetime import date, datetime
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List
+
+import xlsxwriter
+
 from django.conf import settings
-from django.http import HttpResponse
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseBadRequest,
+    StreamingHttpResponse,
+)
 from django.contrib.auth.decorators import user_passes_test, login_required
 
-from excel_response import ExcelResponse
-
 from core.models import Cohort, Contact, Contract, Dataset, Partner, Project
 from core.utils import DaisyLogger
 from web.views.utils import is_data_steward
@@ -12,45 +24,167 @@ from . import facet_view_utils
 log = DaisyLogger(__name__)
 
 
+# Number of objects loaded at once, with their relations, by the exports
+EXPORT_BATCH_SIZE = getattr(settings, "EXPORT_BATCH_SIZE", 500)
+
+XLSX_FORMAT = "xlsx"
+CSV_FORMAT = "csv"
+EXPORT_FORMATS = [XLSX_FORMAT, CSV_FORMAT]
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Rows of a worksheet (with the header), larger exports are sent as csv
+XLSX_MAX_ROWS = 1048576
+
+FILENAME = "excel_data"
+WORKSHEET_NAME = "Sheet 1"
+
+
+def iter_export_objects(object_model_class, pks: List, batch_size=None):
+    """
+    Yields the objects of the primary keys, in their order. They are loaded by batches,
+    with the relations walked by their serialization when the model defines `for_export`.
+    """
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+    for start in range(0, len(pks), batch_size):
+        batch_pks = pks[start : start + batch_size]
+        objects = object_model_class.objects.filter(pk__in=batch_pks)
+        if hasattr(objects, "for_export"):
+            objects = objects.for_export()
+        objects_by_pk = {obj.pk: obj for obj in objects}
+        for pk in batch_pks:
+            if pk in objects_by_pk:
+                yield objects_by_pk[pk]
+
+
+def iter_export_rows(object_model_class, pks: List) -> Iterator[Dict]:
+    for obj in iter_export_objects(object_model_class, pks):
+        yield obj.serialize_to_export()
+
+
+def get_cell_value(value):
+    """
+    Returns the value as written in a cell, the values that are not numbers, booleans or dates as text
+    """
+    if value is None or isinstance(value, (str, bool, int, float, date)):
+        return value
+    return str(value)
+
+
+class Echo:
+    """
+    File-like object returning what is written, so that the csv writer's rows can be streamed
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(headers: List[str], rows: Iterable[Dict]) -> Iterator[str]:
+    """
+    Yields the header and each row as csv lines, as soon as they are serialized
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    try:
+        for row in rows:
+            yield writer.writerow(
+                [get_cell_value(row.get(header)) for header in headers]
+            )
+    except Exception as e:
+        # the response has started, the error can only be logged
+        log.error("csv export interrupted", error=e)
+        raise
+
+
+def write_xlsx(headers: List[str], rows: Iterable[Dict], output):
+    """
+    Writes the header and the rows in a workbook, to the `output` file.
+    In constant memory mode, each row is flushed to a temporary file once written.
+    """
+    workbook = xlsxwriter.Workbook(
+        output,
+        {
+            "constant_memory": True,
+            "remove_timezone": True,
+            # the exported values are written as they are
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+        },
+    )
+    worksheet = workbook.add_worksheet(WORKSHEET_NAME)
+    date_format = workbook.add_format({"num_format": "yyyy-mm-dd"})
+    datetime_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+    worksheet.write_row(0, 0, headers)
+    for row_number, row in enumerate(rows, start=1):
+        for column, header in enumerate(headers):
+            value = get_cell_value(row.get(header))
+            if isinstance(value, datetime):
+                worksheet.write_datetime(row_number, column, value, datetime_format)
+            elif isinstance(value, date):
+                worksheet.write_datetime(row_number, column, value, date_format)
+            elif value is not None:
+                worksheet.write(row_number, column, value)
+    workbook.close()
+
+
 @login_required
 @user_passes_test(is_data_steward)
 def generic_export(request, object_model_class, object_name):
-    def _get_objects(request, object_model_class, object_name):
-        query = request.GET.get("query", "")
-        order_by = request.GET.get("order_by", "")
-        objects = facet_view_utils.search_objects(
+    """
+    Exports the search results as an Excel workbook, or as csv with `format=csv`.
+    The csv rows are streamed as they are serialized. The workbook is written
+    to a temporary file in constant memory, then streamed.
+    """
+    export_format = request.GET.get("format", XLSX_FORMAT)
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"Unsupported format: {export_format}")
+
+    try:
+        pks = facet_view_utils.search_pks(
             request,
             filters=request.GET.getlist("filters"),
-            query=query,
+            query=request.GET.get("query", ""),
             object_model=object_model_class,
-            facets=settings.FACET_FIELDS[object_name],
-            order_by=order_by,
+            order_by=request.GET.get("order_by", ""),
         )
-
-        objects_ids = [obj.__dict__["pk"] for obj in objects]
-        objects = object_model_class.objects.filter(id__in=objects_ids)
-        values = [obj.serialize_to_export() for obj in objects]
-        return values
-
-    def _do_export(values):
-        if len(values) == 0:
-            raise ValueError("There are no values to export - your selection was empty")
-        return ExcelResponse(values)
-
-    try:
-        values = _get_objects(request, object_model_class, object_name)
+        rows = iter_export_rows(object_model_class, pks)
+        # the first row gives the headers
+        first_row = next(rows, None)
     except Exception as e:
         return HttpResponse(
             f"There was a problem with serialization during export: \r\n{str(e)}"
         )
+    if first_row is None:
+        return HttpResponse(
+            "There was a problem during export to Excel file: \r\n"
+            "There are no values to export - your selection was empty"
+        )
+    headers = list(first_row)
+    rows = chain([first_row], rows)
 
-    try:
-        response = _do_export(values)
+    if export_format == CSV_FORMAT or len(pks) >= XLSX_MAX_ROWS:
+        response = StreamingHttpResponse(
+            stream_csv(headers, rows), content_type="text/csv; charset=utf-8"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{FILENAME}.csv"'
         return response
+
+    output = tempfile.TemporaryFile()
+    try:
+        write_xlsx(headers, rows, output)
     except Exception as e:
+        output.close()
         return HttpResponse(
             f"There was a problem during export to Excel file: \r\n{str(e)}"
         )
+    output.seek(0)
+    # closes (and so deletes) the temporary file once sent
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"{FILENAME}.xlsx",
+        content_type=XLSX_CONTENT_TYPE,
+    )
 
 
 def cohorts_export(request):
@@ -1,14 +1,24 @@
-from collections import defaultdict
-
-from django.db.models import Q
+import hashlib
+import json
 
-from haystack.inputs import Exact, AutoQuery
-from haystack.query import SearchQuerySet
+from collections import defaultdict
+from typing import Dict, List, Tuple
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from core.search_backends import get_search_backend
+from core.search_updates import get_index_generation
 from core.utils import DaisyLogger
 
 log = DaisyLogger(__name__)
 
+# Number of search results rendered per page
+SEARCH_PAGE_SIZE = getattr(settings, "SEARCH_PAGE_SIZE", 25)
+
+# How long the facet counts of a search are reused, in seconds
+FACETS_CACHE_TIMEOUT = getattr(settings, "SEARCH_FACETS_CACHE_TIMEOUT", 60)
+
 """
 Utility method to rapidly build a facetted view of a search index.
 """
@@ -46,12 +56,12 @@ def _filter_query_to_search_parameters(request, filters):
 
 def _search_objects(query, filters, facets, model_object, order_by=None):
     """
-    Search objects via solR.
+    Search objects with the configured search backend (see `core.search_backends`).
     query: the user search query
     filters: list containing filters
     facets: the list of facets
     model_object: the model the search is refering to
-    If a filter key is repeated, we apply a OR lookup.
+    If a filter key is repeated, the objects must have all its values.
     return a queryset
     """
     log.debug(
@@ -62,36 +72,9 @@ def _search_objects(query, filters, facets, model_object, order_by=None):
         model_object=model_object,
         order_by=order_by,
     )
-    # start queryset
-    queryset = SearchQuerySet().models(
-        model_object
-    )  # .narrow("namespace:(%s)" % namespace.name)
-    # filter by facets filters
-    for key, values in filters.items():
-        tmp = None
-        if isinstance(values, (list, tuple)):
-            # apply OR lookup if same key is repeated.
-            for value in values:
-                if tmp is None:
-                    tmp = Q(**{key: Exact(value)})
-                else:
-                    tmp &= Q(**{key: Exact(value)})
-        else:
-            # only one value, no need to loop.
-            tmp = Q(**{key: Exact(values)})
-        queryset = queryset.filter(tmp)
-
-    # execute the query
-    if query:
-        queryset = queryset.filter(content=AutoQuery(query))
-    # get facets
-    if facets:
-        for field in facets:
-            queryset = queryset.facet(field)
-    # apply order_by if any
-    if order_by:
-        queryset = queryset.order_by(order_by)
-    return queryset
+    return get_search_backend().search(
+        model_object, query, filters, facets=facets, order_by=order_by
+    )
 
 
 def filter_empty_facets(facets):
@@ -112,7 +95,7 @@ def filter_empty_facets(facets):
 
 def search_objects(request, filters, query, object_model, facets, order_by=None):
     """
-    Search objects on the indexer (solR)
+    Search objects with the configured search backend
     filters: filters parameters
     query: the user search
     object_model: which index model to search
@@ -120,3 +103,90 @@ def search_objects(request, filters, query, object_model, facets, order_by=None)
     """
     filters = _filter_query_to_search_parameters(request, filters)
     return _search_objects(query, filters, facets, object_model, order_by=order_by)
+
+
+def search_pks(request, filters, query, object_model, order_by=None) -> List:
+    """
+    Returns the primary keys of all the objects matching the search, in the order of the results
+    filters: filters parameters
+    query: the user search
+    object_model: which index model to search
+    """
+    filters = _filter_query_to_search_parameters(request, filters)
+    return get_search_backend().search_pks(
+        object_model, query, filters, order_by=order_by
+    )
+
+
+def paginate_search_results(request, queryset, fields, page_size=None) -> Page:
+    """
+    Returns the page of results requested by the `page` parameter.
+    The results are dictionaries of the stored index `fields` only (Solr `fl`), so that rendering
+    them runs no database query. The page is fetched first, with a single Solr request
+    which also returns the hit count and the facets of `page.paginator.object_list`.
+    """
+    page_size = page_size or SEARCH_PAGE_SIZE
+    queryset = queryset.values(*fields)
+    try:
+        number = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        number = 1
+    # fills the result cache of the page, Paginator reuses it and the hit count
+    queryset[(number - 1) * page_size : number * page_size]
+    return Paginator(queryset, page_size).get_page(number)
+
+
+def get_page_query_string(request) -> str:
+    """
+    Returns the parameters of the search (query, filters, order), to be followed by `page=`
+    """
+    parameters = request.GET.copy()
+    parameters.pop("page", None)
+    query_string = parameters.urlencode()
+    return f"{query_string}&" if query_string else ""
+
+
+def get_facets_cache_key(model_object, filters, query, facets) -> str:
+    """
+    Returns the cache key of the facet counts of a search. It contains the generation
+    of the model's index, so that the counts cached before the index was updated are not used.
+    """
+    search = {
+        "filters": {key: sorted(values) for key, values in filters.items()},
+        "query": (query or "").strip(),
+        "facets": sorted(facets or []),
+    }
+    digest = hashlib.sha256(
+        json.dumps(search, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    generation = get_index_generation(model_object)
+    return f"search_facets:{model_object._meta.label}:{generation}:{digest}"
+
+
+def search_page(
+    request, filters, query, object_model, facets, fields, order_by=None
+) -> Tuple[Page, Dict]:
+    """
+    Searches the objects and returns the requested page of results (see `paginate_search_results`)
+    with the non-empty facet counts. Unless the backend computes them from the database, the facet counts
+    are cached for `FACETS_CACHE_TIMEOUT` seconds, the search then asks Solr for the page only.
+    """
+    filters = _filter_query_to_search_parameters(request, filters)
+    cache_key = None
+    facet_counts = None
+    if get_search_backend().cache_facets:
+        cache_key = get_facets_cache_key(object_model, filters, query, facets)
+        facet_counts = cache.get(cache_key)
+    queryset = _search_objects(
+        query,
+        filters,
+        facets if facet_counts is None else None,
+        object_model,
+        order_by=order_by,
+    )
+    page = paginate_search_results(request, queryset, fields)
+    if facet_counts is None:
+        facet_counts = filter_empty_facets(page.paginator.object_list.facet_counts())
+        if cache_key is not None:
+            cache.set(cache_key, facet_counts, FACETS_CACHE_TIMEOUT)
+    return page, facet_counts
@@ -23,6 +23,15 @@ from web.views.utils import AjaxViewMixin, is_data_steward
 
 
 FACET_FIELDS = settings.FACET_FIELDS["partner"]
+# the stored index fields rendered by search/_items/partners.html
+RESULT_FIELDS = [
+    "pk",
+    "name",
+    "acronym",
+    "is_clinical",
+    "geo_category",
+    "sector_category",
+]
 
 
 class PartnerCreateView(CreateView, AjaxViewMixin):
@@ -84,12 +93,13 @@ class PartnerEditView(UpdateView):
 def partner_search_view(request):
     query = request.GET.get("query")
     order_by = request.GET.get("order_by")
-    partners = facet_view_utils.search_objects(
+    page, facets = facet_view_utils.search_page(
         request,
         filters=request.GET.getlist("filters"),
         query=query,
         object_model=Partner,
         facets=FACET_FIELDS,
+        fields=RESULT_FIELDS,
         order_by=order_by,
     )
     return render(
@@ -97,13 +107,15 @@ def partner_search_view(request):
         "search/search_page.html",
         {
             "reset": True,
-            "facets": facet_view_utils.filter_empty_facets(partners.facet_counts()),
+            "facets": facets,
             "query": query or "",
             "title": "Partners",
             "help_text": Partner.AppMeta.help_text,
             "search_url": "partners",
             "add_url": "partner_add",
-            "data": {"partners": partners},
+            "data": {"partners": page},
+            "page_object": page,
+            "query_string": facet_view_utils.get_page_query_string(request),
             "results_template_name": "search/_items/partners.html",
             "company_name": COMPANY,
             "order_by_fields": [
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from django.shortcuts import render, redirect
 from django.core.paginator import Paginator
 from django.core.exceptions import PermissionDenied
@@ -6,15 +8,15 @@ from django.urls import reverse_lazy
 
 from guardian.shortcuts import (
     get_objects_for_user,
-    get_users_with_perms,
     assign_perm,
     remove_perm,
 )
 
 from core.constants import Permissions, Groups
-from core.models import Dataset, Project
+from core.models import Dataset, EffectivePermission, Project
 from core.forms import UserPermFormSet
-from core.permissions.checker import AutoChecker
+from core.permissions.context import get_permission_context
+from core.permissions.effective import deferred_effective_permissions
 
 PAGINATE_BY = 5
 
@@ -36,18 +38,30 @@ def index(request, selection, pk):
     # get selected object (project or dataset)
     obj = klass.objects.get(pk=pk)
 
-    checker = AutoChecker(request.user)
+    checker = get_permission_context(request.user)
     # check if admin permission is there, otherwise forbid access
     if not checker.check(f"core.{Permissions.ADMIN.value}_{selection}", obj):
         raise PermissionDenied
 
-    # get all users with permissions attached to the object (Project or Dataset)
-    users_with_perms = get_users_with_perms(obj, attach_perms=True)
+    # get all users with permissions attached to the object (Project or Dataset),
+    # directly or through their groups, and the ones inherited from the parent project
+    users_with_perms = defaultdict(list)
+    inherited_permissions = defaultdict(list)
+    effective_permissions = EffectivePermission.objects.for_object(obj).select_related(
+        "user"
+    )
+    for permission in effective_permissions:
+        if permission.source == EffectivePermission.SOURCES.inherited:
+            inherited_permissions[permission.user].append(
+                permission.codename.replace(selection, "project")
+            )
+        elif permission.codename not in users_with_perms[permission.user]:
+            users_with_perms[permission.user].append(permission.codename)
 
     # prepare the initial data to render in the form
     # remove request user and local custodians from it and treat them separately
     initial = []
-    local_custodians = obj.local_custodians.all()
+    local_custodians = obj.local_custodians.prefetch_related("groups")
     local_vips = [u for u in local_custodians if u.is_part_of(Groups.VIP.value)]
     context = {
         "object": obj,
@@ -62,9 +76,7 @@ def index(request, selection, pk):
     }
     # get inherited permissions from the parent project
     if klass == Dataset and obj.project is not None:
-        context["inherited_permissions"] = get_users_with_perms(
-            obj.project, attach_perms=True
-        )
+        context["inherited_permissions"] = dict(inherited_permissions)
     for user, permissions in users_with_perms.items():
         if len(permissions) == 1 and "view" in permissions[0]:
             continue
@@ -90,48 +102,50 @@ def index(request, selection, pk):
     formset = UserPermFormSet(request.POST, form_kwargs={"model": selection})
     if formset.is_valid():
         # assing/remove permission for each form in the formset
-        for form in formset:
-            data = form.cleaned_data
-            if not data or "user" not in data:
-                continue
-            user = data.pop("user")
-            delete = data.pop("DELETE")
-
-            # delete any permissions for the user if not a local custodian.
-            if delete:
-                if user in local_custodians:
-                    messages.add_message(
-                        request,
-                        messages.ERROR,
-                        f"Cannot delete permission set for {user} - user is local custodian.",
-                    )
+        # the effective permissions of the object are refreshed once, at the end
+        with deferred_effective_permissions():
+            for form in formset:
+                data = form.cleaned_data
+                if not data or "user" not in data:
+                    continue
+                user = data.pop("user")
+                delete = data.pop("DELETE")
+
+                # delete any permissions for the user if not a local custodian.
+                if delete:
+                    if user in local_custodians:
+                        messages.add_message(
+                            request,
+                            messages.ERROR,
+                            f"Cannot delete permission set for {user} - user is local custodian.",
+                        )
+                        continue
+                    for perm in Permissions:
+                        remove_perm(f"{perm.value}_{selection}", user, obj)
+                    continue
+
+                if user in local_vips:
+                    # don't do anything for local vips.
                     continue
-                for perm in Permissions:
-                    remove_perm(f"{perm.value}_{selection}", user, obj)
-                continue
-
-            if user in local_vips:
-                # don't do anything for local vips.
-                continue
-            elif user in local_custodians:
-                # local custodians that are not VIP can be assigned or removed an ADMIN or PROTECTED perm. All other must stay the same
-                for perm, value in data.items():
-                    if value or data.get(f"{Permissions.ADMIN.value}_{selection}"):
-                        assign_perm(perm, user, obj)
-                    elif perm not in map(
-                        lambda x: f"{x}_{selection}",
-                        [Permissions.EDIT.value, Permissions.DELETE.value],
-                    ):
-                        remove_perm(perm, user, obj)
-            else:
-                # if no `if` has been executed, we loop over the permission and update them accordingly
-                for perm, value in data.items():
-                    if value or data.get(
-                        f"{Permissions.ADMIN.value}_{selection}"
-                    ):  # if admin perm is set, all other permssions must be true
-                        assign_perm(perm, user, obj)
-                    else:
-                        remove_perm(perm, user, obj)
+                elif user in local_custodians:
+                    # local custodians that are not VIP can be assigned or removed an ADMIN or PROTECTED perm. All other must stay the same
+                    for perm, value in data.items():
+                        if value or data.get(f"{Permissions.ADMIN.value}_{selection}"):
+                            assign_perm(perm, user, obj)
+                        elif perm not in map(
+                            lambda x: f"{x}_{selection}",
+                            [Permissions.EDIT.value, Permissions.DELETE.value],
+                        ):
+                            remove_perm(perm, user, obj)
+                else:
+                    # if no `if` has been executed, we loop over the permission and update them accordingly
+                    for perm, value in data.items():
+                        if value or data.get(
+                            f"{Permissions.ADMIN.value}_{selection}"
+                        ):  # if admin perm is set, all other permssions must be true
+                            assign_perm(perm, user, obj)
+                        else:
+                            remove_perm(perm, user, obj)
 
         return redirect(reverse_lazy(selection, kwargs={"pk": pk}))
     context["formset"] = formset
@@ -22,9 +22,12 @@ from core.models import Project, Contract
 from core.models.utils import COMPANY
 from core.permissions import permission_required
 from core.permissions.checker import CheckerMixin
+from core.permissions.custodians import assign_custodian_permissions
 from . import facet_view_utils
 
 FACET_FIELDS = settings.FACET_FIELDS["project"]
+# the stored index fields rendered by search/_items/projects.html
+RESULT_FIELDS = ["pk", "acronym", "title", "project_web_page", "publications"]
 
 
 class ProjectListView(ListView):
@@ -35,12 +38,13 @@ class ProjectListView(ListView):
 def project_list(request):
     query = request.GET.get("query")
     order_by = request.GET.get("order_by")
-    projects = facet_view_utils.search_objects(
+    page, facets = facet_view_utils.search_page(
         request,
         filters=request.GET.getlist("filters"),
         query=query,
         object_model=Project,
         facets=FACET_FIELDS,
+        fields=RESULT_FIELDS,
         order_by=order_by,
     )
     return render(
@@ -48,7 +52,7 @@ def project_list(request):
         "search/search_page.html",
         {
             "reset": True,
-            "facets": facet_view_utils.filter_empty_facets(projects.facet_counts()),
+            "facets": facets,
             "query": query or "",
             "filters": request.GET.get("filters") or "",
             "order_by": order_by or "",
@@ -56,7 +60,9 @@ def project_list(request):
             "help_text": Project.AppMeta.help_text,
             "search_url": "projects",
             "add_url": "project_add",
-            "data": {"projects": projects},
+            "data": {"projects": page},
+            "page_object": page,
+            "query_string": facet_view_utils.get_page_query_string(request),
             "results_template_name": "search/_items/projects.html",
             "company_name": COMPANY,
             "order_by_fields": [
@@ -100,12 +106,15 @@ class ProjectCreateView(CreateView):
                 "Project has no document attachments, please upload documents.",
             )
 
-        # assign perm to user
-        self.request.user.assign_permissions_to_project(form.instance)
-
-        # assign perm to responsible peoples
-        for local_custodian in form.instance.local_custodians.all():
-            local_custodian.assign_permissions_to_project(form.instance)
+        # assign perm to user and to responsible peoples
+        custodian_ids = form.instance.local_custodians.values_list("pk", flat=True)
+        assign_custodian_permissions(
+            Project,
+            [
+                (form.instance.pk, user_id)
+                for user_id in [self.request.user.pk, *custodian_ids]
+            ],
+        )
 
         return response
 
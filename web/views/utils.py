@@ -5,7 +5,6 @@ from typing import Tuple, Optional, TYPE_CHECKING
 from django.http import JsonResponse
 from django.conf import settings
 from django.core.exceptions import PermissionDenied
-from django.contrib.auth.models import Group
 from django.views.generic.detail import SingleObjectTemplateResponseMixin
 from django.views.generic.edit import FormMixin
 from sequences import get_next_value
@@ -22,8 +21,7 @@ def is_ajax_request(request: "HttpRequest") -> bool:
 
 
 def is_data_steward(user):
-    ds_group, _ = Group.objects.get_or_create(name=Groups.DATA_STEWARD.value)
-    if user.is_part_of(ds_group):
+    if user.is_part_of(Groups.DATA_STEWARD.value):
         return True
     else:
         raise PermissionDenied